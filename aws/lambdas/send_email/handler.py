@@ -0,0 +1,142 @@
+"""
+send_email Lambda: consumer for the backend email outbox.
+
+The backend's outbox dispatcher (SQS transport) publishes one JSON message per
+email to the email queue; this function receives them in batches and delivers
+them over a single SMTP connection per invocation. Failed records are reported
+through ``batchItemFailures`` so SQS only redelivers those.
+
+Local testing against stand-ins:
+
+    # SMTP stand-in
+    python -m aiosmtpd -n -l localhost:1025
+
+    # Replay a captured SQS event
+    SMTP_HOST=localhost SMTP_PORT=1025 python handler.py --event event.json
+
+    # Or poll a local SQS stand-in (ElasticMQ / LocalStack)
+    SMTP_HOST=localhost SMTP_PORT=1025 python handler.py \\
+        --queue-url http://localhost:9324/000000000000/forewarn-email \\
+        --endpoint-url http://localhost:9324
+"""
+import argparse
+import json
+import logging
+import os
+import smtplib
+from email.message import EmailMessage
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SMTP_HOST = os.environ.get('SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '25'))
+SMTP_USER = os.environ.get('SMTP_USER', '')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
+SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'false').lower() in ('1', 'true', 'yes')
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', '10'))
+EMAIL_FROM = os.environ.get('EMAIL_FROM', 'no-reply@forewarn-ibf.org')
+
+
+def build_message(payload):
+    """Build an EmailMessage from an outbox payload"""
+    message = EmailMessage()
+    message['From'] = EMAIL_FROM
+    message['To'] = ', '.join(payload['to'])
+    message['Subject'] = payload['subject']
+    if payload.get('id') is not None:
+        message['X-Outbox-Id'] = str(payload['id'])
+    message.set_content(payload['body'])
+    if payload.get('html_body'):
+        message.add_alternative(payload['html_body'], subtype='html')
+    return message
+
+
+def open_connection():
+    """Open an authenticated SMTP connection"""
+    connection = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    if SMTP_USE_TLS:
+        connection.starttls()
+    if SMTP_USER:
+        connection.login(SMTP_USER, SMTP_PASSWORD)
+    return connection
+
+
+def send_records(records):
+    """
+    Deliver SQS records over one SMTP connection.
+
+    Returns:
+        List of messageIds that failed and should be retried
+    """
+    failures = []
+    try:
+        connection = open_connection()
+    except (OSError, smtplib.SMTPException):
+        logger.exception('SMTP connection failed')
+        return [record['messageId'] for record in records]
+
+    try:
+        for record in records:
+            try:
+                payload = json.loads(record['body'])
+                connection.send_message(build_message(payload))
+            except (ValueError, KeyError, smtplib.SMTPException, OSError):
+                logger.exception('Failed to send record %s', record['messageId'])
+                failures.append(record['messageId'])
+    finally:
+        try:
+            connection.quit()
+        except (OSError, smtplib.SMTPException):
+            pass
+    return failures
+
+
+def handler(event, context):
+    """Lambda entry point for SQS batches (ReportBatchItemFailures enabled)"""
+    records = event.get('Records', [])
+    failures = send_records(records)
+    logger.info('Processed %s records, %s failed', len(records), len(failures))
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]}
+
+
+def poll_queue(queue_url, endpoint_url=None, region_name=None):
+    """Long-poll an SQS queue and feed batches to the handler, mimicking the Lambda event source"""
+    import boto3
+
+    client = boto3.client('sqs', endpoint_url=endpoint_url, region_name=region_name or 'us-east-1')
+    while True:
+        response = client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=20)
+        messages = response.get('Messages', [])
+        if not messages:
+            continue
+        event = {
+            'Records': [
+                {'messageId': m['MessageId'], 'receiptHandle': m['ReceiptHandle'], 'body': m['Body']}
+                for m in messages
+            ]
+        }
+        failed = {item['itemIdentifier'] for item in handler(event, None)['batchItemFailures']}
+        done = [
+            {'Id': str(i), 'ReceiptHandle': record['receiptHandle']}
+            for i, record in enumerate(event['Records'])
+            if record['messageId'] not in failed
+        ]
+        if done:
+            client.delete_message_batch(QueueUrl=queue_url, Entries=done)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Run the send_email handler locally')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--event', help='Path to an SQS event JSON file')
+    source.add_argument('--queue-url', help='SQS queue URL to poll')
+    parser.add_argument('--endpoint-url', help='SQS endpoint for a local stand-in')
+    args = parser.parse_args()
+
+    if args.event:
+        with open(args.event) as f:
+            print(json.dumps(handler(json.load(f), None), indent=2))
+    else:
+        poll_queue(args.queue_url, endpoint_url=args.endpoint_url)
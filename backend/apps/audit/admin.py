@@ -0,0 +1,20 @@
+from django.contrib import admin
+from .models import AuditEvent
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    """Read-only admin interface for the audit log"""
+    list_display = ('occurred_at', 'actor_username', 'action', 'target_type', 'target_id', 'target_repr')
+    list_filter = ('action', 'target_type')
+    ordering = ('-occurred_at', '-id')
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class AuditConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.audit'
+    verbose_name = 'Audit'
+
+    def ready(self):
+        from .partitions import install_audit_table
+        post_migrate.connect(install_audit_table, sender=self)
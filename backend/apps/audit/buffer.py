@@ -0,0 +1,165 @@
+"""
+In-process write-behind buffer for audit events.
+
+Views call ``record_action`` which only appends to a per-process buffer once
+the surrounding transaction commits. A daemon thread flushes the buffer with
+a single ``bulk_create`` whenever it reaches ``FLUSH_SIZE`` events or
+``FLUSH_INTERVAL`` seconds have passed, so no request pays for an extra
+synchronous INSERT. Anything still buffered is flushed at interpreter exit;
+a hard kill can lose at most one flush interval of events. A batch the
+database rejects is written row by row, and rows that still cannot be
+stored are logged and dropped rather than retried forever.
+"""
+import atexit
+import ipaddress
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from rest_framework.throttling import BaseThrottle
+
+from apps.users.tenancy import tenant_of
+
+from .models import AuditEvent
+from .partitions import ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """Thread-safe buffer that batches AuditEvent inserts"""
+
+    def __init__(self, flush_size=None, flush_interval=None, max_size=None):
+        audit_settings = settings.AUDIT_LOG
+        self.flush_size = flush_size or audit_settings['FLUSH_SIZE']
+        self.flush_interval = flush_interval or audit_settings['FLUSH_INTERVAL']
+        self.max_size = max_size or audit_settings['MAX_BUFFER_SIZE']
+        self._events = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._partitions_checked = None
+        self.dropped = 0
+        self.rejected = 0
+
+    def add(self, event):
+        """Append an unsaved AuditEvent, waking the flusher if the size threshold is reached"""
+        with self._lock:
+            if len(self._events) >= self.max_size:
+                # Never let a stalled database grow memory without bound
+                self.dropped += 1
+                return
+            self._events.append(event)
+            size = len(self._events)
+        self._ensure_thread()
+        if size >= self.flush_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all buffered events with one bulk INSERT; returns the number written"""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+
+        try:
+            self._ensure_partitions()
+            AuditEvent.objects.bulk_create(events, batch_size=self.flush_size)
+        except (DataError, IntegrityError):
+            # One bad row fails the whole INSERT: find it instead of re-queueing the batch
+            return self._write_each(events)
+        except Exception:
+            logger.exception('Failed to flush %s audit events; re-queueing', len(events))
+            self._requeue(events)
+            return 0
+        return len(events)
+
+    def _write_each(self, events):
+        written = 0
+        for index, event in enumerate(events):
+            try:
+                with transaction.atomic():
+                    event.save(force_insert=True)
+            except (DataError, IntegrityError):
+                self.rejected += 1
+                logger.exception('Dropping audit event the database rejects: %r', event.as_dict())
+                continue
+            except Exception:
+                logger.exception('Failed to flush %s audit events; re-queueing', len(events) - index)
+                self._requeue(events[index:])
+                break
+            written += 1
+        return written
+
+    def _requeue(self, events):
+        with self._lock:
+            self._events[:0] = events[:self.max_size - len(self._events)]
+
+    def _ensure_partitions(self):
+        # Roll partitions forward once per process per day
+        today = timezone.now().date()
+        if self._partitions_checked != today:
+            ensure_partitions()
+            self._partitions_checked = today
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+
+audit_buffer = AuditBuffer()
+atexit.register(audit_buffer.flush)
+
+
+def _client_ip(request):
+    # REMOTE_ADDR, or the X-Forwarded-For entry REST_FRAMEWORK['NUM_PROXIES'] says to trust
+    try:
+        return str(ipaddress.ip_address((BaseThrottle().get_ident(request) or '').strip()))
+    except ValueError:
+        return None
+
+
+def record_action(request, action, target=None, changes=None, target_type=None, target_id=None):
+    """
+    Record an admin action in the audit log.
+
+    The event is buffered only after the current transaction commits, so
+    rolled-back changes are never audited.
+
+    Args:
+        request: The current request (actor, its organization and client IP are taken from it)
+        action: Dotted action name, e.g. 'group.create' or 'user.deactivate'
+        target: Model instance acted upon (optional)
+        changes: JSON-serializable dict describing what changed
+        target_type: Override for the target's model name
+        target_id: Override for the target's primary key
+    """
+    user = getattr(request, 'user', None)
+    actor = user if user is not None and user.is_authenticated else None
+    event = AuditEvent(
+        occurred_at=timezone.now(),
+        actor_id=actor.pk if actor else None,
+        actor_username=actor.get_username() if actor else '',
+        organization_id=tenant_of(actor) if actor else None,
+        action=action,
+        target_type=target_type or (target._meta.model_name if target is not None else ''),
+        target_id=str(target_id if target_id is not None else getattr(target, 'pk', '') or ''),
+        target_repr=str(target)[:255] if target is not None else '',
+        changes=changes or {},
+        ip_address=_client_ip(request),
+    )
+    transaction.on_commit(lambda: audit_buffer.add(event))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.audit.partitions import drop_expired_partitions, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly audit log partitions and drop those past retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--months-ahead', type=int, help='Override AUDIT_LOG_PARTITION_MONTHS_AHEAD')
+        parser.add_argument('--retention-months', type=int, help='Override AUDIT_LOG_RETENTION_MONTHS')
+        parser.add_argument('--no-drop', action='store_true', help='Only create partitions')
+
+    def handle(self, *args, **options):
+        created = ensure_partitions(options['database'], months_ahead=options['months_ahead'])
+        self.stdout.write(f'Ensured partitions: {", ".join(created) or "none (not PostgreSQL)"}')
+        if not options['no_drop']:
+            dropped = drop_expired_partitions(options['database'], retention_months=options['retention_months'])
+            self.stdout.write(f'Dropped partitions: {", ".join(dropped) or "none"}')
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+
+
+class AuditEvent(models.Model):
+    """
+    Admin action recorded by the write-behind audit buffer.
+
+    The table is range-partitioned by month on ``occurred_at`` in PostgreSQL,
+    so it is created by ``partitions.install_audit_table`` instead of a
+    regular migration. ``actor`` and ``organization`` have no database
+    constraint because audit rows must outlive the rows they reference.
+    """
+    id = models.BigAutoField(primary_key=True)
+    occurred_at = models.DateTimeField()
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    actor_username = models.CharField(max_length=150, blank=True)
+    # The actor's organization; NULL for platform accounts
+    organization = models.ForeignKey(
+        'users.Organization',
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    action = models.CharField(max_length=64)
+    target_type = models.CharField(max_length=64, blank=True)
+    target_id = models.CharField(max_length=64, blank=True)
+    target_repr = models.CharField(max_length=255, blank=True)
+    changes = models.JSONField(default=dict)
+    ip_address = models.GenericIPAddressField(null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'audit_events'
+        ordering = ['-occurred_at', '-id']
+
+    def __str__(self):
+        return f'{self.actor_username} {self.action} {self.target_type}:{self.target_id}'
+
+    def as_dict(self):
+        """Return the JSON representation used by the audit API and dashboard"""
+        return {
+            'id': self.id,
+            'occurred_at': self.occurred_at.isoformat(),
+            'actor_id': self.actor_id,
+            'actor_username': self.actor_username,
+            'action': self.action,
+            'target_type': self.target_type,
+            'target_id': self.target_id,
+            'target_repr': self.target_repr,
+            'changes': self.changes,
+            'ip_address': self.ip_address,
+        }
@@ -0,0 +1,114 @@
+"""
+Table and partition management for the audit log.
+
+On PostgreSQL ``audit_events`` is declaratively partitioned by month on
+``occurred_at``; keyset queries and retention then only touch the partitions
+they need. Other databases (e.g. SQLite in local development) get a plain table.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import connections
+
+TABLE = 'audit_events'
+
+CREATE_PARTITIONED_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    occurred_at timestamp with time zone NOT NULL,
+    actor_id bigint NULL,
+    actor_username varchar(150) NOT NULL DEFAULT '',
+    organization_id bigint NULL,
+    action varchar(64) NOT NULL,
+    target_type varchar(64) NOT NULL DEFAULT '',
+    target_id varchar(64) NOT NULL DEFAULT '',
+    target_repr varchar(255) NOT NULL DEFAULT '',
+    changes jsonb NOT NULL DEFAULT '{{}}'::jsonb,
+    ip_address inet NULL,
+    PRIMARY KEY (occurred_at, id)
+) PARTITION BY RANGE (occurred_at);
+ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS organization_id bigint NULL;
+CREATE INDEX IF NOT EXISTS {TABLE}_organization_idx ON {TABLE} (organization_id, occurred_at DESC);
+CREATE INDEX IF NOT EXISTS {TABLE}_actor_idx ON {TABLE} (actor_id, occurred_at DESC);
+CREATE INDEX IF NOT EXISTS {TABLE}_target_idx ON {TABLE} (target_type, target_id, occurred_at DESC);
+CREATE INDEX IF NOT EXISTS {TABLE}_action_idx ON {TABLE} (action, occurred_at DESC);
+"""
+
+
+def _add_months(day, months):
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month_start):
+    return f'{TABLE}_y{month_start.year}m{month_start.month:02d}'
+
+
+def ensure_partitions(using='default', months_ahead=None, start=None):
+    """Create monthly partitions from ``start`` (default: this month) up to ``months_ahead`` months ahead"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return []
+
+    if months_ahead is None:
+        months_ahead = settings.AUDIT_LOG['PARTITION_MONTHS_AHEAD']
+    first = (start or date.today()).replace(day=1)
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            lower = _add_months(first, offset)
+            upper = _add_months(lower, 1)
+            name = partition_name(lower)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [lower.isoformat(), upper.isoformat()],
+            )
+            created.append(name)
+    return created
+
+
+def drop_expired_partitions(using='default', retention_months=None):
+    """Drop monthly partitions that are entirely older than the retention window"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return []
+
+    if retention_months is None:
+        retention_months = settings.AUDIT_LOG['RETENTION_MONTHS']
+    cutoff = partition_name(_add_months(date.today().replace(day=1), -retention_months))
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = %s ORDER BY child.relname",
+            [TABLE],
+        )
+        for (name,) in cursor.fetchall():
+            # Names sort chronologically: audit_events_yYYYYmMM
+            if name < cutoff:
+                cursor.execute(f'DROP TABLE IF EXISTS {name}')
+                dropped.append(name)
+    return dropped
+
+
+def install_audit_table(sender=None, using='default', **kwargs):
+    """post_migrate handler: create the audit table (and upcoming partitions) if missing"""
+    from .models import AuditEvent
+
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_PARTITIONED_TABLE)
+        ensure_partitions(using)
+    elif TABLE not in connection.introspection.table_names():
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(AuditEvent)
+    else:
+        with connection.cursor() as cursor:
+            columns = {column.name for column in connection.introspection.get_table_description(cursor, TABLE)}
+        if 'organization_id' not in columns:
+            with connection.schema_editor() as schema_editor:
+                schema_editor.add_field(AuditEvent, AuditEvent._meta.get_field('organization'))
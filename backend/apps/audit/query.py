@@ -0,0 +1,81 @@
+"""
+Keyset-paginated queries over the audit log.
+
+Pages are ordered by (occurred_at DESC, id DESC), which matches the table's
+primary key, so each page is an index range scan regardless of depth and
+time-bounded queries only touch the matching monthly partitions.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import AuditEvent
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(event):
+    raw = f'{event.occurred_at.isoformat()}|{event.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        occurred_at, event_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(occurred_at), int(event_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def _for_organization(queryset, organization_id):
+    return queryset if organization_id is None else queryset.filter(organization_id=organization_id)
+
+
+def filter_events(actor_id=None, action=None, target_type=None, target_id=None,
+                  occurred_after=None, occurred_before=None, organization_id=None):
+    """Build a filtered AuditEvent queryset; all filters are optional (organization None: all)"""
+    queryset = _for_organization(AuditEvent.objects.all(), organization_id)
+    if actor_id is not None:
+        queryset = queryset.filter(actor_id=actor_id)
+    if action:
+        queryset = queryset.filter(action=action)
+    if target_type:
+        queryset = queryset.filter(target_type=target_type)
+    if target_id is not None:
+        queryset = queryset.filter(target_id=str(target_id))
+    if occurred_after:
+        queryset = queryset.filter(occurred_at__gte=occurred_after)
+    if occurred_before:
+        queryset = queryset.filter(occurred_at__lt=occurred_before)
+    return queryset
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Return one page of events after ``cursor``.
+
+    Returns:
+        Tuple of (events, next_cursor); next_cursor is None on the last page
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    if cursor:
+        occurred_at, event_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(occurred_at__lt=occurred_at) | Q(occurred_at=occurred_at, id__lt=event_id)
+        )
+    events = list(queryset.order_by('-occurred_at', '-id')[:limit + 1])
+    next_cursor = encode_cursor(events[limit - 1]) if len(events) > limit else None
+    return events[:limit], next_cursor
+
+
+def recent_events(limit=10, organization_id=None):
+    """Latest events of the organization (all when None), used by the dashboard's recent activity feed"""
+    events, _ = keyset_page(_for_organization(AuditEvent.objects.all(), organization_id), limit=limit)
+    return events
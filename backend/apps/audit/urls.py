@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+# Audit log URLs
+
+app_name = 'audit'
+
+urlpatterns = [
+    path('events/', views.audit_events, name='events'),
+]
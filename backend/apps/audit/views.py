@@ -0,0 +1,49 @@
+# Audit log views for the forewarn-ibf-portal backend
+from django.contrib.auth.decorators import permission_required
+from django.utils.dateparse import parse_datetime
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from apps.core.responses import APIResponse
+from apps.users.tenancy import tenant_of
+from .query import DEFAULT_LIMIT, InvalidCursor, filter_events, keyset_page
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@permission_required(['audit.view_auditevent'], raise_exception=True)
+def audit_events(request):
+    """
+    List audit events, newest first, with keyset pagination
+    Query params: actor_id, action, target_type, target_id, from, to, cursor, limit
+    """
+    params = request.query_params
+    try:
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+        actor_id = int(params['actor_id']) if params.get('actor_id') else None
+    except ValueError:
+        return APIResponse.validation_error(errors={'limit': 'Must be an integer', 'actor_id': 'Must be an integer'})
+
+    occurred_after = parse_datetime(params['from']) if params.get('from') else None
+    occurred_before = parse_datetime(params['to']) if params.get('to') else None
+
+    queryset = filter_events(
+        actor_id=actor_id,
+        action=params.get('action'),
+        target_type=params.get('target_type'),
+        target_id=params.get('target_id'),
+        occurred_after=occurred_after,
+        occurred_before=occurred_before,
+        organization_id=tenant_of(request.user),
+    )
+    try:
+        events, next_cursor = keyset_page(queryset, cursor=params.get('cursor'), limit=limit)
+    except InvalidCursor:
+        return APIResponse.validation_error(errors={'cursor': 'Invalid cursor'})
+
+    return APIResponse.success(
+        data={
+            'events': [event.as_dict() for event in events],
+            'next_cursor': next_cursor,
+        },
+        message='Audit events retrieved successfully'
+    )
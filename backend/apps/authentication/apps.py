@@ -1,7 +1,25 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def invalidate_permission_cache(sender, **kwargs):
+    # New models and permissions are only ever created by migrate
+    from apps.core.cache import bump_namespace
+    bump_namespace('permissions')
 
 
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.authentication'
     verbose_name = 'Authentication'
+
+    def ready(self):
+        # Connected for every app, since each app's permissions are created by its own post_migrate
+        post_migrate.connect(invalidate_permission_cache, dispatch_uid='authentication.invalidate_permission_cache')
+
+        # Imported for its side effect: registers the group job handlers for run_jobs
+        from . import jobs  # noqa: F401
+        from .matrix import install_group_matrix
+        from .signals import connect_signals
+        post_migrate.connect(install_group_matrix, sender=self)
+        connect_signals()
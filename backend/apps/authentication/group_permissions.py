@@ -0,0 +1,169 @@
+"""
+Diff-based group permission edits.
+
+Permission ids are validated against a cached catalogue of every
+permission (no query), and the edits for any number of groups are applied
+with one read of their current rows, one DELETE and one bulk INSERT on the
+group-permission through table. Responses are built from the catalogue
+and the computed diff, without re-reading ``group.permissions``.
+
+Bulk statements bypass ``m2m_changed``, so the hooks that signal would
+have triggered (delta-sync change stamps, the group permission matrix
+refresh and dashboard permission notices) are called explicitly.
+"""
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models import Q
+
+from apps.core.cache import get_or_compute, namespaced_key
+from apps.dashboard.events import permissions_changed
+from apps.users.signals import stamp_groups
+from .matrix import schedule_refresh
+
+GroupPermission = Group.permissions.through
+
+
+class PermissionEditError(ValueError):
+    """Invalid edit request; ``errors`` maps a field to its messages"""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _build_catalogue():
+    return {
+        perm['id']: perm
+        for perm in Permission.objects.values('id', 'name', 'codename')
+    }
+
+
+def permission_catalogue():
+    """{permission id: {'id', 'name', 'codename'}} of every permission (cached until the next migrate)"""
+    return get_or_compute(namespaced_key('permissions', 'catalogue'), _build_catalogue, timeout=3600)
+
+
+def _id_list(value, field):
+    if value is None:
+        return []
+    if not isinstance(value, (list, tuple)):
+        raise PermissionEditError({field: 'Must be a list of permission ids'})
+    try:
+        return [int(item) for item in value]
+    except (TypeError, ValueError):
+        raise PermissionEditError({field: 'Must be a list of permission ids'})
+
+
+def parse_edits(items):
+    """
+    Validate ``[{'id': group_id, 'add': [...], 'remove': [...]}, ...]``.
+
+    Returns {group_id: (add set, remove set)}; unknown permission ids are
+    rejected using the cached catalogue.
+    """
+    if not isinstance(items, list) or not items:
+        raise PermissionEditError({'groups': 'Provide a non-empty list of group edits'})
+
+    catalogue = permission_catalogue()
+    edits = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or 'id' not in item:
+            raise PermissionEditError({f'groups[{index}]': 'Each edit needs an id'})
+        try:
+            group_id = int(item['id'])
+        except (TypeError, ValueError):
+            raise PermissionEditError({f'groups[{index}].id': 'Must be an integer'})
+        if group_id in edits:
+            raise PermissionEditError({f'groups[{index}].id': f'Group {group_id} is listed twice'})
+
+        add = set(_id_list(item.get('add'), f'groups[{index}].add'))
+        remove = set(_id_list(item.get('remove'), f'groups[{index}].remove'))
+        unknown = sorted((add | remove) - catalogue.keys())
+        if unknown:
+            raise PermissionEditError({f'groups[{index}]': f'Unknown permission ids: {unknown}'})
+        overlap = sorted(add & remove)
+        if overlap:
+            raise PermissionEditError({f'groups[{index}]': f'Ids both added and removed: {overlap}'})
+        edits[group_id] = (add, remove)
+    return edits
+
+
+def validate_permission_ids(value, field='permission_ids'):
+    """Validate a full list of permission ids against the catalogue; returns a set"""
+    ids = set(_id_list(value, field))
+    unknown = sorted(ids - permission_catalogue().keys())
+    if unknown:
+        raise PermissionEditError({field: f'Unknown permission ids: {unknown}'})
+    return ids
+
+
+def serialize_permissions(permission_ids):
+    catalogue = permission_catalogue()
+    return [dict(catalogue[pk]) for pk in sorted(permission_ids) if pk in catalogue]
+
+
+def apply_permission_edits(edits, group_names=None, current=None):
+    """
+    Apply {group_id: (add, remove)} and return one result per group:
+    {'id', 'name', 'permissions', 'added', 'removed'}.
+
+    Adds of permissions a group already has and removes of ones it lacks
+    are no-ops, so the same request can be retried safely. Callers that
+    already know the groups' names or current permission ids can pass them
+    to skip those reads.
+    """
+    group_ids = list(edits)
+    if group_names is None:
+        group_names = dict(Group.objects.filter(id__in=group_ids).values_list('id', 'name'))
+    missing = [group_id for group_id in group_ids if group_id not in group_names]
+    if missing:
+        raise PermissionEditError({'groups': f'Unknown group ids: {missing}'})
+
+    if current is None:
+        current = {group_id: set() for group_id in group_ids}
+        for group_id, permission_id in GroupPermission.objects.filter(group_id__in=group_ids).values_list(
+            'group_id', 'permission_id'
+        ):
+            current[group_id].add(permission_id)
+
+    to_delete = Q()
+    to_insert = []
+    results = []
+    changed = []
+    for group_id, (add, remove) in edits.items():
+        added = add - current[group_id]
+        removed = remove & current[group_id]
+        if removed:
+            to_delete |= Q(group_id=group_id, permission_id__in=removed)
+        to_insert.extend(GroupPermission(group_id=group_id, permission_id=pk) for pk in added)
+        if added or removed:
+            changed.append(group_id)
+        results.append({
+            'id': group_id,
+            'name': group_names[group_id],
+            'permissions': serialize_permissions((current[group_id] | added) - removed),
+            'added': sorted(added),
+            'removed': sorted(removed),
+        })
+
+    with transaction.atomic():
+        if to_delete:
+            GroupPermission.objects.filter(to_delete).delete()
+        if to_insert:
+            GroupPermission.objects.bulk_create(to_insert, ignore_conflicts=True)
+        if changed:
+            stamp_groups(changed)
+            schedule_refresh()
+            permissions_changed(group_ids=changed)
+    return results
+
+
+def set_group_permissions(group, permission_ids, current=None):
+    """
+    Replace a group's permissions with ``permission_ids`` via the same diff.
+    Pass ``current=set()`` for a group that was just created.
+    """
+    if current is None:
+        current = set(GroupPermission.objects.filter(group_id=group.id).values_list('permission_id', flat=True))
+    edits = {group.id: (permission_ids - current, current - permission_ids)}
+    return apply_permission_edits(edits, group_names={group.id: group.name}, current={group.id: current})[0]
@@ -0,0 +1,65 @@
+"""
+Background jobs for group administration (run by ``manage.py run_jobs``)
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from apps.dashboard.events import permissions_changed
+from apps.jobs.queue import register
+
+from .matrix import REFRESH_GROUP_MATRIX, refresh_group_matrix
+
+User = get_user_model()
+Membership = User.groups.through
+
+DELETE_GROUP = 'auth.delete_group'
+
+
+@register(DELETE_GROUP)
+def delete_group(job):
+    """
+    Remove a group's memberships CHUNK_SIZE at a time, then the group itself.
+
+    Each chunk does what removing the members through ``group.user_set``
+    would do for delta sync and the dashboard stream. It skips the group
+    matrix refresh, which runs once when the group row is deleted.
+    """
+    group_id = job.payload['group_id']
+    if job.progress_total is None:
+        job.progress_total = Membership.objects.filter(group_id=group_id).count()
+
+    rows = list(
+        Membership.objects.filter(group_id=group_id).order_by('id').values_list('id', 'user_id')[
+            :settings.JOBS['CHUNK_SIZE']
+        ]
+    )
+    if rows:
+        user_ids = [user_id for _, user_id in rows]
+        Membership.objects.filter(id__in=[row_id for row_id, _ in rows]).delete()
+        User.objects.filter(pk__in=user_ids).update(updated_at=timezone.now())
+        permissions_changed(user_ids=user_ids)
+        job.progress_done += len(rows)
+        return False
+
+    group = Group.objects.filter(pk=group_id).first()
+    if group is not None:
+        group.delete()
+    job.result = {'id': group_id, 'name': job.payload.get('name'), 'removed_memberships': job.progress_done}
+    return True
+
+
+@register(REFRESH_GROUP_MATRIX)
+def refresh_matrix(job):
+    """
+    Refresh the group permission matrix (queued by ``matrix.schedule_refresh``).
+
+    The first chunk only releases the dedupe key, so a change committed
+    while the refresh runs queues another refresh instead of joining this one.
+    """
+    if job.dedupe_key is not None:
+        job.dedupe_key = None
+        return False
+    refresh_group_matrix(job.payload.get('using', 'default'))
+    return True
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from apps.authentication.throttling import local_blocks
+from apps.core.benchmark import format_summary, summarize
+
+User = get_user_model()
+
+LOGIN_URL = '/api/auth/login/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark legitimate login latency while a credential-stuffing burst hits the '
+        'login endpoint, with login throttling disabled and enabled'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds measured per phase')
+        parser.add_argument('--warmup', type=float, default=10.0,
+                            help='Seconds the attack runs before measuring, so burst capacity is used up')
+        parser.add_argument('--ip-rate', help='Override LOGIN_THROTTLE login_ip rate, e.g. 5/min')
+        parser.add_argument('--attackers', type=int, default=8, help='Concurrent attacking threads')
+        parser.add_argument('--attack-rate', type=float, default=40.0,
+                            help='Target attack requests per second across all attacking threads')
+        parser.add_argument('--attack-ips', type=int, default=4, help='Distinct attacker source IPs')
+        parser.add_argument('--legit-users', type=int, default=50, help='Distinct legitimate accounts')
+        parser.add_argument('--legit-interval', type=float, default=0.1, help='Seconds between legitimate logins')
+
+    def handle(self, *args, **options):
+        # Every rejected attempt would otherwise log a 401/429 warning
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        setup_test_environment()
+        prefix = f'bench_{uuid.uuid4().hex[:8]}'
+        password = uuid.uuid4().hex
+        users = self.create_users(prefix, password, options['legit_users'])
+        try:
+            base = settings.LOGIN_THROTTLE
+            if options['ip_rate']:
+                base = {**base, 'RATES': {**base['RATES'], 'login_ip': options['ip_rate']}}
+            self.stdout.write(f'Rates: {base["RATES"]}')
+            phases = [
+                ('no attack', False, base),
+                ('attack, throttle off', True, {**base, 'ENABLED': False}),
+                ('attack, throttle on', True, {**base, 'ENABLED': True}),
+            ]
+            for label, attack, throttle_settings in phases:
+                caches[base['CACHE_ALIAS']].clear()
+                local_blocks.clear()
+                with override_settings(LOGIN_THROTTLE=throttle_settings):
+                    latencies, attack_statuses = self.run_phase(users, password, attack, options)
+                self.stdout.write(format_summary(label, summarize(latencies)))
+                if attack:
+                    self.stdout.write(f'{"":<28} attack responses: {dict(attack_statuses)}')
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+            teardown_test_environment()
+
+    def create_users(self, prefix, password, count):
+        # Hash once and reuse it; hashing per user would dominate setup time
+        template = User(username=prefix)
+        template.set_password(password)
+        User.objects.bulk_create([
+            User(username=f'{prefix}_{i}', email=f'{prefix}_{i}@example.com', password=template.password)
+            for i in range(count)
+        ])
+        return [f'{prefix}_{i}' for i in range(count)]
+
+    def run_phase(self, users, password, attack, options):
+        stop = threading.Event()
+        attack_statuses = Counter()
+        latencies = []
+
+        # Each attacker paces itself so the total offered load matches --attack-rate
+        attack_interval = options['attackers'] / options['attack_rate']
+
+        def attacker(index):
+            client = Client()
+            ip = f'203.0.113.{index % options["attack_ips"] + 1}'
+            next_at = time.monotonic()
+            while not stop.is_set():
+                next_at += attack_interval
+                response = client.post(
+                    LOGIN_URL,
+                    {'username': f'victim{uuid.uuid4().hex[:6]}', 'password': 'wrong'},
+                    content_type='application/json',
+                    REMOTE_ADDR=ip,
+                )
+                attack_statuses[response.status_code] += 1
+                stop.wait(max(0.0, next_at - time.monotonic()))
+            connection.close()
+
+        threads = [threading.Thread(target=attacker, args=(i,)) for i in range(options['attackers'] if attack else 0)]
+        for thread in threads:
+            thread.start()
+
+        if attack:
+            time.sleep(options['warmup'])
+
+        client = Client()
+        deadline = time.monotonic() + options['duration']
+        i = 0
+        while time.monotonic() < deadline:
+            username = users[i % len(users)]
+            started = time.perf_counter()
+            response = client.post(
+                LOGIN_URL,
+                {'username': username, 'password': password},
+                content_type='application/json',
+                REMOTE_ADDR=f'198.51.100.{i % len(users) + 1}',
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                self.stderr.write(f'Legitimate login failed with {response.status_code}')
+            i += 1
+            time.sleep(options['legit_interval'])
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return latencies, attack_statuses
@@ -0,0 +1,22 @@
+"""
+Rebuild the group permission matrix.
+
+Changes made through the ORM refresh it automatically; run this after bulk
+SQL edits of groups, memberships or permissions:
+
+    python manage.py refresh_group_matrix
+"""
+from django.core.management.base import BaseCommand
+
+from apps.authentication.matrix import install_group_matrix
+
+
+class Command(BaseCommand):
+    help = 'Create (if missing) and concurrently refresh the group permission matrix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        install_group_matrix(using=options['database'])
+        self.stdout.write(self.style.SUCCESS('Group permission matrix refreshed'))
@@ -0,0 +1,163 @@
+"""
+Group × membership × permission matrix (GroupPermissionMatrix).
+
+PostgreSQL gets a materialized view with a unique index on ``group_id`` so
+it can be refreshed CONCURRENTLY: readers keep seeing the previous rows
+while it is rebuilt. Any change to groups, group permissions or group
+membership queues a refresh job (debounced and deduplicated) once the
+surrounding transaction commits; GroupMatrixRefresh records when the rows
+were last rebuilt.
+Other databases (SQLite in local development) get a plain view over the
+same query.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from apps.jobs.queue import enqueue
+from apps.users.models import OrganizationGroup
+
+from .models import GroupMatrixRefresh
+
+logger = logging.getLogger(__name__)
+
+VIEW = 'group_permission_matrix'
+REFRESH_GROUP_MATRIX = 'auth.refresh_group_matrix'
+
+
+def _matrix_query(vendor):
+    membership = get_user_model().groups.through._meta
+    group_permissions = Group.permissions.through._meta
+    tables = {
+        'group': Group._meta.db_table,
+        'organization_group': OrganizationGroup._meta.db_table,
+        'membership': membership.db_table,
+        'membership_group': membership.get_field('group').column,
+        'group_permissions': group_permissions.db_table,
+        'gp_group': group_permissions.get_field('group').column,
+        'gp_permission': group_permissions.get_field('permission').column,
+        'permission': Permission._meta.db_table,
+        'content_type': ContentType._meta.db_table,
+    }
+    if vendor == 'postgresql':
+        tables.update(
+            permissions_agg="jsonb_agg(jsonb_build_object("
+                            "'id', perm.id, 'name', perm.name, 'codename', perm.codename, 'content_type', ct.model"
+                            ") ORDER BY perm.id)",
+            codenames_agg='jsonb_agg(perm.codename ORDER BY perm.id)',
+            empty="'[]'::jsonb",
+        )
+    else:
+        tables.update(
+            permissions_agg="json_group_array(json_object("
+                            "'id', perm.id, 'name', perm.name, 'codename', perm.codename, 'content_type', ct.model"
+                            "))",
+            codenames_agg='json_group_array(perm.codename)',
+            empty="'[]'",
+        )
+    return """
+        SELECT g.id AS group_id,
+               g.name AS name,
+               og.organization_id AS organization_id,
+               COALESCE(m.user_count, 0) AS user_count,
+               COALESCE(p.permission_count, 0) AS permission_count,
+               COALESCE(p.permissions, {empty}) AS permissions,
+               COALESCE(p.permission_codenames, {empty}) AS permission_codenames
+        FROM {group} g
+        LEFT JOIN {organization_group} og ON og.group_id = g.id
+        LEFT JOIN (
+            SELECT {membership_group} AS group_id, COUNT(*) AS user_count
+            FROM {membership}
+            GROUP BY {membership_group}
+        ) m ON m.group_id = g.id
+        LEFT JOIN (
+            SELECT gp.{gp_group} AS group_id,
+                   COUNT(*) AS permission_count,
+                   {permissions_agg} AS permissions,
+                   {codenames_agg} AS permission_codenames
+            FROM {group_permissions} gp
+            JOIN {permission} perm ON perm.id = gp.{gp_permission}
+            JOIN {content_type} ct ON ct.id = perm.content_type_id
+            GROUP BY gp.{gp_group}
+        ) p ON p.group_id = g.id
+    """.format(**tables)
+
+
+def install_group_matrix(sender=None, using='default', **kwargs):
+    """post_migrate handler: create the matrix view if missing or outdated, then bring it up to date"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if VIEW in connection.introspection.table_names(cursor, include_views=True):
+            columns = {column.name for column in connection.introspection.get_table_description(cursor, VIEW)}
+            if 'organization_id' not in columns:
+                kind = 'MATERIALIZED VIEW' if connection.vendor == 'postgresql' else 'VIEW'
+                cursor.execute(f'DROP {kind} {VIEW}')
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'CREATE MATERIALIZED VIEW IF NOT EXISTS {VIEW} AS {_matrix_query(connection.vendor)}')
+            cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {VIEW}_group_idx ON {VIEW} (group_id)')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {VIEW}_name_idx ON {VIEW} (name)')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {VIEW}_organization_idx ON {VIEW} (organization_id, group_id)')
+        else:
+            cursor.execute(f'CREATE VIEW IF NOT EXISTS {VIEW} AS {_matrix_query(connection.vendor)}')
+    refresh_group_matrix(using)
+
+
+def refresh_group_matrix(using='default'):
+    """Rebuild the materialized view without blocking readers (no-op for a plain view)"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with transaction.atomic(using=using):
+        # Taken before the rebuild: every change committed by then is in the new rows
+        started = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {VIEW}')
+        GroupMatrixRefresh.objects.using(using).update_or_create(pk=1, defaults={'refreshed_at': started})
+
+
+def matrix_refreshed_at():
+    """When the matrix rows being read were computed, or None for a plain view"""
+    return GroupMatrixRefresh.objects.filter(pk=1).values_list('refreshed_at', flat=True).first()
+
+
+def _enqueue_after_commit(using):
+    run_at = timezone.now() + timedelta(seconds=settings.GROUP_MATRIX_REFRESH_DELAY_SECONDS)
+    try:
+        enqueue(
+            REFRESH_GROUP_MATRIX,
+            payload={'using': using},
+            dedupe_key=f'{REFRESH_GROUP_MATRIX}:{using}',
+            run_at=run_at,
+        )
+    except DatabaseError:
+        logger.exception('Could not queue a group permission matrix refresh')
+
+
+def schedule_refresh(using='default'):
+    """
+    Queue a refresh of the matrix once the current transaction commits.
+
+    The job worker runs it GROUP_MATRIX_REFRESH_DELAY_SECONDS later, so a
+    burst of writes shares one refresh, and retries it if it fails. Several
+    changes in one transaction also share a single enqueue. Callbacks of a
+    rolled back transaction are discarded by Django, so nothing is queued.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    if connection.in_atomic_block and any(
+        getattr(callback, 'refreshes_group_matrix', False) for _, callback, *_ in connection.run_on_commit
+    ):
+        return
+
+    def refresh():
+        _enqueue_after_commit(using)
+
+    refresh.refreshes_group_matrix = True
+    transaction.on_commit(refresh, using=using)
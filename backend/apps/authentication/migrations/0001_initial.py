@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupPermissionMatrix",
+            fields=[
+                (
+                    "group",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="permission_matrix",
+                        serialize=False,
+                        to="auth.group",
+                    ),
+                ),
+                ("name", models.CharField(max_length=150)),
+                ("organization_id", models.BigIntegerField(null=True)),
+                ("user_count", models.IntegerField()),
+                ("permission_count", models.IntegerField()),
+                ("permissions", models.JSONField()),
+                ("permission_codenames", models.JSONField()),
+            ],
+            options={
+                "db_table": "group_permission_matrix",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="GroupMatrixRefresh",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("refreshed_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "group_matrix_refresh",
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import Group
+from django.db import models
+
+
+class GroupPermissionMatrix(models.Model):
+    """
+    Per-group member count and permissions, precomputed.
+
+    A materialized view on PostgreSQL, refreshed concurrently by the job
+    worker shortly after every change to groups, their permissions or their
+    members (see ``matrix.py``); a plain view elsewhere. Listing groups is then a single
+    scan of this relation instead of aggregating the membership tables.
+    """
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='permission_matrix',
+    )
+    name = models.CharField(max_length=150)
+    # From apps.users.models.OrganizationGroup; NULL for platform groups
+    organization_id = models.BigIntegerField(null=True)
+    user_count = models.IntegerField()
+    permission_count = models.IntegerField()
+    # [{'id', 'name', 'codename', 'content_type'}, ...] ordered by permission id
+    permissions = models.JSONField()
+    permission_codenames = models.JSONField()
+
+    class Meta:
+        managed = False
+        db_table = 'group_permission_matrix'
+
+    def __str__(self):
+        return self.name
+
+
+class GroupMatrixRefresh(models.Model):
+    """
+    When the materialized GroupPermissionMatrix was last rebuilt (one row).
+
+    Written in the refresh's transaction, so it always matches the matrix
+    rows readers see. Never written for the plain view, which is always current.
+    """
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'group_matrix_refresh'
+
+    def __str__(self):
+        return f'Group matrix refreshed at {self.refreshed_at}'
@@ -0,0 +1,37 @@
+"""
+Keep the group permission matrix (models.GroupPermissionMatrix) current.
+
+Every change that alters a group's row (the group itself, its organization,
+its permissions, its members, or a member being deleted, which cascades
+without m2m_changed) schedules one refresh after commit.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from apps.users.models import OrganizationGroup
+
+from .matrix import schedule_refresh
+
+User = get_user_model()
+
+
+def matrix_changed(sender, using='default', **kwargs):
+    action = kwargs.get('action')
+    if action is not None and action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    schedule_refresh(using)
+
+
+def connect_signals():
+    post_save.connect(matrix_changed, sender=Group, dispatch_uid='authentication.matrix_group_saved')
+    post_delete.connect(matrix_changed, sender=Group, dispatch_uid='authentication.matrix_group_deleted')
+    post_delete.connect(matrix_changed, sender=User, dispatch_uid='authentication.matrix_user_deleted')
+    post_save.connect(matrix_changed, sender=OrganizationGroup, dispatch_uid='authentication.matrix_tenant_saved')
+    post_delete.connect(matrix_changed, sender=OrganizationGroup, dispatch_uid='authentication.matrix_tenant_deleted')
+    m2m_changed.connect(
+        matrix_changed, sender=Group.permissions.through, dispatch_uid='authentication.matrix_permissions_changed'
+    )
+    m2m_changed.connect(
+        matrix_changed, sender=User.groups.through, dispatch_uid='authentication.matrix_members_changed'
+    )
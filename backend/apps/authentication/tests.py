@@ -0,0 +1,114 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.authentication.throttling import (
+    LocalBlockList, LoginIPThrottle, consume_token, local_blocks, parse_rate,
+)
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-default'},
+    'state': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-state'},
+}
+
+
+class ParseRateTests(SimpleTestCase):
+    def test_capacity_and_refill_rate(self):
+        self.assertEqual(parse_rate('10/min'), (10, 10 / 60))
+        self.assertEqual(parse_rate('5/s'), (5, 5))
+        self.assertEqual(parse_rate('24/day'), (24, 24 / 86400))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConsumeTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['state']
+        self.cache.clear()
+
+    def take(self, now):
+        # 3 tokens, one more every second
+        return consume_token(self.cache, 'bucket', 3, 1.0, now)
+
+    def test_full_bucket_allows_a_burst_of_capacity(self):
+        self.assertEqual([self.take(100.0)[0] for _ in range(3)], [True, True, True])
+        self.assertEqual(self.take(100.0), (False, 1.0))
+
+    def test_tokens_refill_over_time(self):
+        for _ in range(3):
+            self.take(100.0)
+        allowed, wait = self.take(100.5)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 0.5)
+        self.assertEqual(self.take(101.0), (True, 0))
+        self.assertFalse(self.take(101.0)[0])
+
+    def test_refill_is_capped_at_capacity(self):
+        for _ in range(3):
+            self.take(100.0)
+        self.assertEqual([self.take(1000.0)[0] for _ in range(4)], [True, True, True, False])
+
+    def test_bucket_outlives_a_full_refill(self):
+        with mock.patch.object(self.cache, 'set', wraps=self.cache.set) as cache_set:
+            self.take(100.0)
+        self.assertGreaterEqual(cache_set.call_args.args[2], 3)
+
+
+class LocalBlockListTests(SimpleTestCase):
+    def test_blocks_until_next_token(self):
+        blocks = LocalBlockList()
+        blocks.block('k', 105.0, 100.0)
+        self.assertEqual(blocks.wait('k', 101.0), 4.0)
+        self.assertEqual(blocks.wait('k', 105.0), 0)
+        self.assertEqual(blocks.wait('k', 101.0), 0)
+
+    def test_full_list_drops_expired_entries(self):
+        blocks = LocalBlockList(max_entries=2)
+        blocks.block('a', 101.0, 100.0)
+        blocks.block('b', 200.0, 100.0)
+        blocks.block('c', 200.0, 150.0)
+        self.assertEqual(blocks.wait('a', 100.0), 0)
+        self.assertEqual(blocks.wait('b', 150.0), 50.0)
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    LOGIN_THROTTLE={'ENABLED': True, 'CACHE_ALIAS': 'state', 'RATES': {'login_ip': '2/min'}},
+)
+class LoginIPThrottleTests(SimpleTestCase):
+    def setUp(self):
+        caches['state'].clear()
+        local_blocks.clear()
+        self.factory = RequestFactory()
+
+    def allow(self, ip, now):
+        throttle = LoginIPThrottle()
+        with mock.patch('apps.authentication.throttling.time.time', return_value=now):
+            allowed = throttle.allow_request(self.factory.post('/api/auth/login/', REMOTE_ADDR=ip), None)
+        return allowed, throttle.wait()
+
+    def test_blocks_after_capacity_and_refills(self):
+        self.assertTrue(self.allow('10.0.0.1', 100.0)[0])
+        self.assertTrue(self.allow('10.0.0.1', 100.0)[0])
+        allowed, wait = self.allow('10.0.0.1', 100.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30.0)
+        # One token per 30s at 2/min
+        self.assertFalse(self.allow('10.0.0.1', 120.0)[0])
+        self.assertTrue(self.allow('10.0.0.1', 130.0)[0])
+
+    def test_local_block_skips_the_cache(self):
+        for _ in range(3):
+            self.allow('10.0.0.1', 100.0)
+        with mock.patch('apps.authentication.throttling.consume_token') as consume:
+            self.assertFalse(self.allow('10.0.0.1', 110.0)[0])
+        consume.assert_not_called()
+
+    def test_clients_have_separate_buckets(self):
+        for _ in range(3):
+            self.allow('10.0.0.1', 100.0)
+        self.assertTrue(self.allow('10.0.0.2', 100.0)[0])
+
+    @override_settings(LOGIN_THROTTLE={'ENABLED': False, 'CACHE_ALIAS': 'state', 'RATES': {}})
+    def test_disabled_throttle_allows_everything(self):
+        self.assertTrue(all(self.allow('10.0.0.1', 100.0)[0] for _ in range(5)))
@@ -0,0 +1,147 @@
+"""
+Token-bucket throttles for the login endpoint.
+
+Bucket state lives in the shared Django cache so limits hold across worker
+processes. Each process also keeps a small local block list: once a key has
+run out of tokens, further attempts are rejected in-process until the next
+token is due, without touching the cache. Throttles run in DRF's
+``initial()``, i.e. before ``login_view`` calls ``authenticate()`` and pays
+for the password hash.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a 'capacity/period' rate such as '10/min'.
+
+    Returns:
+        Tuple of (capacity, tokens refilled per second)
+    """
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class LocalBlockList:
+    """Per-process map of throttled keys to the time their next token is due"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def wait(self, key, now):
+        until = self._blocked.get(key)
+        if until is None:
+            return 0
+        if until <= now:
+            self._blocked.pop(key, None)
+            return 0
+        return until - now
+
+    def block(self, key, until, now):
+        with self._lock:
+            if len(self._blocked) >= self.max_entries:
+                self._blocked = {k: v for k, v in self._blocked.items() if v > now}
+                if len(self._blocked) >= self.max_entries:
+                    self._blocked.clear()
+            self._blocked[key] = until
+
+    def clear(self):
+        with self._lock:
+            self._blocked.clear()
+
+
+local_blocks = LocalBlockList()
+
+
+def consume_token(cache, key, capacity, refill_rate, now):
+    """
+    Take one token from the bucket stored under ``key``.
+
+    The read-modify-write is not atomic across processes; concurrent
+    requests can occasionally over-admit by a token, which is acceptable
+    for abuse protection.
+
+    Returns:
+        Tuple of (allowed, seconds until the next token)
+    """
+    tokens, updated_at = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+    ttl = int(capacity / refill_rate) + 1
+    if tokens >= 1:
+        cache.set(key, (tokens - 1, now), ttl)
+        return True, 0
+    cache.set(key, (tokens, now), ttl)
+    return False, (1 - tokens) / refill_rate
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class for token-bucket throttles configured in settings.LOGIN_THROTTLE.
+    Subclasses set ``scope`` (a key of LOGIN_THROTTLE['RATES']) and ``get_ident_key``.
+    """
+    scope = None
+
+    def __init__(self):
+        self._wait = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        config = settings.LOGIN_THROTTLE
+        if not config['ENABLED']:
+            return True
+
+        ident = self.get_ident_key(request)
+        if not ident:
+            return True
+        digest = hashlib.sha1(ident.encode()).hexdigest()
+        key = f'throttle:{self.scope}:{digest}'
+        now = time.time()
+
+        # Fast path: already known to be over the limit in this process
+        wait = local_blocks.wait(key, now)
+        if wait:
+            self._wait = wait
+            return False
+
+        capacity, refill_rate = parse_rate(config['RATES'][self.scope])
+        allowed, wait = consume_token(caches[config['CACHE_ALIAS']], key, capacity, refill_rate, now)
+        if not allowed:
+            local_blocks.block(key, now + wait, now)
+            self._wait = wait
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """Limit login attempts per client IP"""
+    scope = 'login_ip'
+
+    def get_ident_key(self, request):
+        # REMOTE_ADDR unless REST_FRAMEWORK['NUM_PROXIES'] says which X-Forwarded-For entry to trust
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """Limit login attempts per target username, regardless of source IP"""
+    scope = 'login_username'
+
+    def get_ident_key(self, request):
+        username = request.data.get('username')
+        if not isinstance(username, str):
+            return None
+        return username.strip().lower()
@@ -16,7 +16,9 @@ urlpatterns = [
     # Group management endpoints
     path('groups/', views.get_groups, name='get_groups'),
     path('groups/create/', views.create_group, name='create_group'),
+    path('groups/permissions/', views.bulk_edit_group_permissions, name='bulk_edit_group_permissions'),
     path('groups/<int:group_id>/', views.get_group_detail, name='get_group_detail'),
     path('groups/<int:group_id>/update/', views.update_group, name='update_group'),
+    path('groups/<int:group_id>/permissions/', views.edit_group_permissions, name='edit_group_permissions'),
     path('groups/<int:group_id>/delete/', views.delete_group, name='delete_group'),
 ]
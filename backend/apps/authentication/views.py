@@ -1,23 +1,56 @@
 # Authentication views for the forewarn-ibf-portal backend
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
+from django.contrib.auth import authenticate, user_logged_in
 from django.contrib.auth.decorators import permission_required
 from django.contrib.auth.models import Group, Permission
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from apps.core.responses import APIResponse
+from apps.core.cache import get_or_compute, namespaced_key
+from apps.core.conditional import (
+    InvalidSyncCursor,
+    decode_cursor,
+    make_etag,
+    next_cursor,
+    not_modified_response,
+    set_validators,
+)
+from apps.core.fieldsets import InvalidFieldset, fieldset_error_response, requested_fields
+from apps.users.sync import group_changes_since, group_watermark
+from apps.users.tenancy import assign_group, scope_groups, tenant_of
+from apps.notifications.outbox import enqueue_welcome_email
+from apps.audit.buffer import record_action
+from apps.jobs.queue import enqueue
+from apps.jobs.views import accepted_response
+from .jobs import DELETE_GROUP
+from .group_permissions import (
+    PermissionEditError,
+    apply_permission_edits,
+    parse_edits,
+    serialize_permissions,
+    set_group_permissions,
+    validate_permission_ids,
+)
+from .matrix import matrix_refreshed_at
+from .models import GroupPermissionMatrix
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
 
 User = get_user_model()
 
+# Fields selectable with ?fields= / ?exclude= on the group endpoints
+GROUP_LIST_FIELDS = ['id', 'name', 'user_count', 'permissions']
+GROUP_DETAIL_FIELDS = ['id', 'name', 'user_count', 'users', 'permissions']
+
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginUsernameThrottle])
 def login_view(request):
     """
     User login endpoint
@@ -34,6 +67,8 @@ def login_view(request):
     user = authenticate(request, username=username, password=password)
     
     if user is not None:
+        # Buffered by apps.users.logins; no synchronous last_login write
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
         refresh = RefreshToken.for_user(user)
         user_data = {
             'access_token': str(refresh.access_token),
@@ -92,12 +127,18 @@ def register_view(request):
                 first_name=first_name,
                 last_name=last_name,
                 username=username,
+                # New accounts join the creating admin's organization
+                organization_id=tenant_of(request.user),
             )
             
 
             if group_ids:
-                groups = Group.objects.filter(id__in=group_ids)
+                groups = scope_groups(Group.objects.filter(id__in=group_ids), request.user)
                 user.groups.set(groups)
+
+            # Delivered asynchronously by the outbox dispatcher
+            enqueue_welcome_email(user)
+            record_action(request, 'user.create', user, changes={'group_ids': group_ids})
                 
             user_data = {
                 'id': str(user.id),
@@ -121,10 +162,7 @@ def logout_view(request):
 
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-@permission_required(['auth.add_group'], raise_exception=True)
-def get_frontend_permissions(request):
+def _build_frontend_permissions():
     # Define which content types to show in frontend
     allowed_content_types = ['user', 'group']
     
@@ -133,14 +171,26 @@ def get_frontend_permissions(request):
         content_type__model__in=allowed_content_types
     ).select_related('content_type').order_by('content_type__model', 'codename')
     
-    permission_data = []
-    for perm in permissions:
-        permission_data.append({
+    return [
+        {
             'id': perm.id,
             'name': perm.name,
             'codename': perm.codename,
             'content_type': perm.content_type.name,
-        })
+        }
+        for perm in permissions
+    ]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@permission_required(['auth.add_group'], raise_exception=True)
+def get_frontend_permissions(request):
+    permission_data = get_or_compute(
+        namespaced_key('permissions', 'frontend'),
+        _build_frontend_permissions,
+        timeout=3600,
+    )
     
     return APIResponse.success(
         data={'permissions': permission_data, 'count': len(permission_data)},
@@ -167,6 +217,11 @@ def create_group(request):
             message='Group name is required'
         )
     
+    try:
+        permission_ids = validate_permission_ids(permission_ids)
+    except PermissionEditError as e:
+        return APIResponse.validation_error(errors=e.errors, message='Invalid permissions')
+    
     # Check if group already exists
     if Group.objects.filter(name=group_name).exists():
         return APIResponse.error(message='Group with this name already exists')
@@ -175,23 +230,17 @@ def create_group(request):
         with transaction.atomic():
             # Create the group
             group = Group.objects.create(name=group_name)
+            assign_group(group, request.user)
             
-            # Add permissions to the group
-            if permission_ids:
-                permissions = Permission.objects.filter(id__in=permission_ids)
-                group.permissions.set(permissions)
+            # Add permissions to the group (a new group has none yet)
+            result = set_group_permissions(group, permission_ids, current=set())
+
+            record_action(request, 'group.create', group, changes={'permission_ids': sorted(permission_ids)})
             
             group_data = {
                 'id': group.id,
                 'name': group.name,
-                'permissions': [
-                    {
-                        'id': perm.id,
-                        'name': perm.name,
-                        'codename': perm.codename
-                    }
-                    for perm in group.permissions.all()
-                ]
+                'permissions': result['permissions'],
             }
             return APIResponse.created(data=group_data, message='Group created successfully')
             
@@ -211,36 +260,44 @@ def update_group(request, group_id):
     Expected payload: {'name': 'new_name', 'permission_ids': [1, 2, 3]}
     """
     try:
-        group = get_object_or_404(Group, id=group_id)
+        group = get_object_or_404(scope_groups(Group.objects.all(), request.user), id=group_id)
         
         group_name = request.data.get('name')
         permission_ids = request.data.get('permission_ids')
+        if permission_ids is not None:
+            try:
+                permission_ids = validate_permission_ids(permission_ids)
+            except PermissionEditError as e:
+                return APIResponse.validation_error(errors=e.errors, message='Invalid permissions')
         
         with transaction.atomic():
+            changes = {}
+
             # Update group name if provided
             if group_name and group_name != group.name:
                 # Check if new name already exists
                 if Group.objects.filter(name=group_name).exclude(id=group_id).exists():
                     return APIResponse.error(message='Group with this name already exists')
+                changes['name'] = {'old': group.name, 'new': group_name}
                 group.name = group_name
                 group.save()
             
-            # Update permissions if provided
+            # Update permissions if provided (only the difference is written)
             if permission_ids is not None:
-                permissions = Permission.objects.filter(id__in=permission_ids)
-                group.permissions.set(permissions)
+                result = set_group_permissions(group, permission_ids)
+                changes['permission_ids'] = sorted(permission_ids)
+                permissions = result['permissions']
+            else:
+                permissions = serialize_permissions(
+                    group.permissions.values_list('id', flat=True)
+                )
+
+            record_action(request, 'group.update', group, changes=changes)
             
             group_data = {
                 'id': group.id,
                 'name': group.name,
-                'permissions': [
-                    {
-                        'id': perm.id,
-                        'name': perm.name,
-                        'codename': perm.codename
-                    }
-                    for perm in group.permissions.all()
-                ]
+                'permissions': permissions,
             }
             return APIResponse.success(data=group_data, message='Group updated successfully')
             
@@ -251,29 +308,100 @@ def update_group(request, group_id):
         )
 
 
+def _permission_edit_response(request, edits):
+    try:
+        group_names = dict(
+            scope_groups(Group.objects.filter(id__in=list(edits)), request.user).values_list('id', 'name')
+        )
+        with transaction.atomic():
+            results = apply_permission_edits(edits, group_names=group_names)
+            for result in results:
+                if result['added'] or result['removed']:
+                    record_action(
+                        request, 'group.update', target_type='group', target_id=result['id'],
+                        changes={'permissions_added': result['added'], 'permissions_removed': result['removed']},
+                    )
+    except PermissionEditError as e:
+        return APIResponse.validation_error(errors=e.errors, message='Invalid permission edit')
+    return results
+
+
+@api_view(['PATCH'])
+@permission_classes([IsAuthenticated])
+@permission_required(['auth.change_group'], raise_exception=True)
+def edit_group_permissions(request, group_id):
+    """
+    Add and remove permissions of one group
+    Expected payload: {'add': [1, 2], 'remove': [3]}
+    """
+    try:
+        edits = parse_edits([{'id': group_id, 'add': request.data.get('add'), 'remove': request.data.get('remove')}])
+    except PermissionEditError as e:
+        return APIResponse.validation_error(errors=e.errors, message='Invalid permission edit')
+
+    results = _permission_edit_response(request, edits)
+    if not isinstance(results, list):
+        return results
+    return APIResponse.success(data=results[0], message='Group permissions updated successfully')
+
+
+@api_view(['PATCH'])
+@permission_classes([IsAuthenticated])
+@permission_required(['auth.change_group'], raise_exception=True)
+def bulk_edit_group_permissions(request):
+    """
+    Add and remove permissions of many groups in one request
+    Expected payload: {'groups': [{'id': 1, 'add': [1, 2], 'remove': [3]}, ...]}
+    """
+    try:
+        edits = parse_edits(request.data.get('groups'))
+    except PermissionEditError as e:
+        return APIResponse.validation_error(errors=e.errors, message='Invalid permission edit')
+
+    results = _permission_edit_response(request, edits)
+    if not isinstance(results, list):
+        return results
+    return APIResponse.success(
+        data={'groups': results, 'count': len(results)},
+        message='Group permissions updated successfully'
+    )
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 @permission_required(['auth.delete_group'], raise_exception=True)
 def delete_group(request, group_id):
     """
-    Delete a group
+    Queue deletion of a group (202)
+    Members are removed in chunks by the run_jobs worker, then the group;
+    progress is at the returned status_url
     """
     try:
-        group = get_object_or_404(Group, id=group_id)
+        group = get_object_or_404(scope_groups(Group.objects.all(), request.user), id=group_id)
+        counts = GroupPermissionMatrix.objects.filter(group_id=group.id).values('permission_count', 'user_count').first()
         
-        # Store group info before deletion
         group_info = {
             'id': group.id,
             'name': group.name,
-            'permission_count': group.permissions.count(),
-            'user_count': group.user_set.count()
+            'permission_count': counts['permission_count'] if counts else group.permissions.count(),
+            'user_count': counts['user_count'] if counts else group.user_set.count()
         }
         
-        group.delete()
+        job = enqueue(
+            DELETE_GROUP,
+            {'group_id': group.id, 'name': group.name},
+            user=request.user,
+            dedupe_key=f'{DELETE_GROUP}:{group.id}',
+        )
+        record_action(
+            request, 'group.delete', target_type='group', target_id=group_info['id'],
+            changes={**group_info, 'job_id': job.pk},
+        )
         
-        return APIResponse.success(
-            data=group_info, 
-            message=f'Group "{group_info["name"]}" deleted successfully'
+        return accepted_response(
+            job,
+            message=f'Deletion of group "{group_info["name"]}" queued',
+            data={'group': group_info},
         )
         
     except Exception as e:
@@ -289,30 +417,69 @@ def delete_group(request, group_id):
 def get_groups(request):
     """
     Get all groups with their permissions
+    Supports If-None-Match / If-Modified-Since, ?since=<cursor> for groups
+    changed or deleted after a cursor from a previous response (recent
+    changes are repeated across syncs; upsert by id), and
+    ?fields= / ?exclude= to select a subset of fields
     """
-    groups = Group.objects.all().prefetch_related('permissions')
+    try:
+        fields = requested_fields(request, GROUP_LIST_FIELDS) or GROUP_LIST_FIELDS
+    except InvalidFieldset as e:
+        return fieldset_error_response(e)
+
+    since_param = request.query_params.get('since')
+    organization_id = tenant_of(request.user)
+    watermark, group_count, stamp_checksum = group_watermark(organization_id)
+    # The matrix lags the change stamps until its next refresh: version on both
+    refreshed_at = matrix_refreshed_at()
+    etag = make_etag(
+        'groups', organization_id, watermark, group_count, stamp_checksum, refreshed_at,
+        request.query_params.urlencode(),
+    )
+    last_modified = max(filter(None, (watermark, refreshed_at)), default=None)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    # One scan of the precomputed matrix instead of aggregating memberships and permissions
+    columns = [field for field in ('name', 'user_count', 'permissions') if field in fields]
+    groups = scope_groups(
+        GroupPermissionMatrix.objects.only('group_id', *columns).order_by('group_id'),
+        request.user,
+        field='organization_id',
+    )
+    deleted = None
+    if since_param:
+        try:
+            since = decode_cursor(since_param)
+        except InvalidSyncCursor:
+            return APIResponse.validation_error(errors={'since': 'Invalid cursor'})
+        changed_ids, deleted = group_changes_since(since, organization_id)
+        groups = groups.filter(group_id__in=changed_ids)
     
     groups_data = []
     for group in groups:
-        groups_data.append({
-            'id': group.id,
-            'name': group.name,
-            'user_count': group.user_set.count(),
-            'permissions': [
-                {
-                    'id': perm.id,
-                    'name': perm.name,
-                    'codename': perm.codename,
-                    'content_type': perm.content_type.model
-                }
-                for perm in group.permissions.all()
-            ]
-        })
+        group_data = {}
+        if 'id' in fields:
+            group_data['id'] = group.group_id
+        if 'name' in fields:
+            group_data['name'] = group.name
+        if 'user_count' in fields:
+            group_data['user_count'] = group.user_count
+        if 'permissions' in fields:
+            group_data['permissions'] = group.permissions
+        groups_data.append(group_data)
     
-    return APIResponse.success(
-        data={'groups': groups_data, 'count': len(groups_data)},
-        message='Groups retrieved successfully'
-    )
+    # Groups stamped after the last refresh were served stale: keep them ahead of the cursor
+    synced_to = min(watermark, refreshed_at) if watermark and refreshed_at else watermark
+    data = {'groups': groups_data, 'cursor': next_cursor(synced_to)}
+    if deleted is None:
+        data['count'] = len(groups_data)
+    else:
+        data['deleted'] = deleted
+
+    response = APIResponse.success(data=data, message='Groups retrieved successfully')
+    return set_validators(response, etag, last_modified)
 
 
 @api_view(['GET'])
@@ -321,15 +488,25 @@ def get_groups(request):
 def get_group_detail(request, group_id):
     """
     Get detailed information about a specific group
+    Supports ?fields= / ?exclude= to select a subset of fields
     """
     try:
-        group = get_object_or_404(Group, id=group_id)
+        fields = requested_fields(request, GROUP_DETAIL_FIELDS) or GROUP_DETAIL_FIELDS
+    except InvalidFieldset as e:
+        return fieldset_error_response(e)
+
+    try:
+        group = get_object_or_404(scope_groups(Group.objects.only('id', 'name'), request.user), id=group_id)
         
-        group_data = {
-            'id': group.id,
-            'name': group.name,
-            'user_count': group.user_set.count(),
-            'users': [
+        group_data = {}
+        if 'id' in fields:
+            group_data['id'] = group.id
+        if 'name' in fields:
+            group_data['name'] = group.name
+        if 'user_count' in fields:
+            group_data['user_count'] = group.user_set.count()
+        if 'users' in fields:
+            group_data['users'] = [
                 {
                     'id': user.id,
                     'username': user.username,
@@ -337,9 +514,10 @@ def get_group_detail(request, group_id):
                     'first_name': user.first_name,
                     'last_name': user.last_name
                 }
-                for user in group.user_set.all()
-            ],
-            'permissions': [
+                for user in group.user_set.only('id', 'username', 'email', 'first_name', 'last_name')
+            ]
+        if 'permissions' in fields:
+            group_data['permissions'] = [
                 {
                     'id': perm.id,
                     'name': perm.name,
@@ -351,9 +529,8 @@ def get_group_detail(request, group_id):
                         'name': perm.content_type.name
                     }
                 }
-                for perm in group.permissions.all()
+                for perm in group.permissions.select_related('content_type')
             ]
-        }
         return APIResponse.success(data=group_data, message='Group details retrieved successfully')
         
     except Exception as e:
@@ -0,0 +1,31 @@
+"""
+Small helpers shared by the ``bench_*`` management commands
+"""
+import statistics
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Return count, mean and p50/p95/p99 of latency samples (seconds) in milliseconds"""
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1000 if samples else 0.0,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+def format_summary(label, summary):
+    return (
+        f'{label:<28} n={summary["count"]:<6} mean={summary["mean_ms"]:8.2f}ms '
+        f'p50={summary["p50_ms"]:8.2f}ms p95={summary["p95_ms"]:8.2f}ms p99={summary["p99_ms"]:8.2f}ms'
+    )
@@ -0,0 +1,374 @@
+"""
+Two-tier cache backend and stampede-safe helpers.
+
+``TieredCache`` keeps a small, bounded in-process L1 in front of a shared L2
+cache alias (Redis in production, LocMem in local development). Reads hit L1
+first; L1 entries live at most ``L1_TIMEOUT`` seconds, which bounds how long
+another process can serve a value after it was changed or deleted.
+
+``get_or_compute`` adds stampede protection on top of any cache alias:
+single-flight per process, a short distributed lock in L2, and probabilistic
+early recomputation so hot keys are refreshed before they expire.
+``namespaced_key`` / ``bump_namespace`` give cheap bulk invalidation by
+versioning every key in a namespace. Versions start from the clock, so an
+evicted version key never comes back as a version that was used before.
+"""
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# L1 stores and stats are per process, shared by the per-thread backend instances
+_local_stores = {}
+_stats = {}
+_registry_lock = threading.Lock()
+
+
+class CacheStats:
+    """Per-process hit/miss counters for one tiered cache"""
+
+    FIELDS = ('l1_hits', 'l2_hits', 'misses', 'sets', 'early_recomputes', 'lock_waits')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, field, amount=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def reset(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def snapshot(self):
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        lookups = data['l1_hits'] + data['l2_hits'] + data['misses']
+        data['hit_ratio'] = (data['l1_hits'] + data['l2_hits']) / lookups if lookups else 0.0
+        return data
+
+
+class LocalTier:
+    """
+    Bounded in-process store holding pickled values.
+
+    Eviction policy 'lru' drops the least recently used entry; 'lfu' drops
+    the least frequently used of a small random sample (the same
+    approximation Redis uses), which keeps eviction O(1).
+    """
+    LFU_SAMPLE = 5
+
+    def __init__(self, max_entries=1000, policy='lru'):
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(f'Unknown L1 eviction policy: {policy}')
+        self.max_entries = max_entries
+        self.policy = policy
+        self._data = OrderedDict()
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return False, None
+            if self.policy == 'lru':
+                self._data.move_to_end(key)
+            else:
+                self._hits[key] = self._hits.get(key, 0) + 1
+        return True, pickle.loads(payload)
+
+    def set(self, key, value, ttl):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.max_entries:
+                self._evict()
+            self._data[key] = (time.monotonic() + ttl, payload)
+            self._data.move_to_end(key)
+            self._hits.setdefault(key, 0)
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._hits.clear()
+
+    def _remove(self, key):
+        self._data.pop(key, None)
+        self._hits.pop(key, None)
+
+    def _evict(self):
+        if self.policy == 'lru':
+            key = next(iter(self._data))
+        else:
+            sample = random.sample(list(self._data), min(self.LFU_SAMPLE, len(self._data)))
+            key = min(sample, key=lambda k: self._hits.get(k, 0))
+        self._remove(key)
+
+
+class TieredCache(BaseCache):
+    """
+    Django cache backend: in-process L1 in front of another cache alias.
+
+    OPTIONS:
+        L2: alias of the shared cache (required)
+        L1_TIMEOUT: max seconds a value is served from L1 (default 5)
+        L1_MAX_ENTRIES: L1 capacity (default 1000)
+        L1_EVICTION: 'lru' or 'lfu' (default 'lru')
+
+    Keys are built by the L2 alias, so KEY_PREFIX and VERSION belong there.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options['L2']
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        name = location or 'tiered'
+        with _registry_lock:
+            if name not in _local_stores:
+                _local_stores[name] = LocalTier(
+                    max_entries=options.get('L1_MAX_ENTRIES', 1000),
+                    policy=options.get('L1_EVICTION', 'lru'),
+                )
+                _stats[name] = CacheStats()
+        self.local = _local_stores[name]
+        self.stats = _stats[name]
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def make_key(self, key, version=None):
+        return self.l2.make_key(key, version=version)
+
+    def _l1_ttl(self, timeout):
+        return self.l1_timeout if timeout is None else min(self.l1_timeout, timeout)
+
+    def get(self, key, default=None, version=None):
+        full_key = self.make_key(key, version)
+        found, value = self.local.get(full_key)
+        if found:
+            self.stats.incr('l1_hits')
+            return value
+        sentinel = object()
+        value = self.l2.get(key, sentinel, version=version)
+        if value is sentinel:
+            self.stats.incr('misses')
+            return default
+        self.stats.incr('l2_hits')
+        self.local.set(full_key, value, self.l1_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        self.l2.set(key, value, timeout, version=version)
+        self.stats.incr('sets')
+        if timeout is not None and timeout <= 0:
+            self.local.delete(self.make_key(key, version))
+        else:
+            self.local.set(self.make_key(key, version), value, self._l1_ttl(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self.local.set(self.make_key(key, version), value, self._l1_ttl(timeout))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self.make_key(key, version))
+        return self.l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        found, _ = self.local.get(self.make_key(key, version))
+        return found or self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self.make_key(key, version))
+        return self.l2.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self.local.delete(self.make_key(key, version))
+        return self.l2.decr(key, delta, version=version)
+
+    def get_many(self, keys, version=None):
+        result = {}
+        missing = []
+        for key in keys:
+            found, value = self.local.get(self.make_key(key, version))
+            if found:
+                result[key] = value
+                self.stats.incr('l1_hits')
+            else:
+                missing.append(key)
+        if missing:
+            fetched = self.l2.get_many(missing, version=version)
+            self.stats.incr('l2_hits', len(fetched))
+            self.stats.incr('misses', len(missing) - len(fetched))
+            for key, value in fetched.items():
+                self.local.set(self.make_key(key, version), value, self.l1_timeout)
+            result.update(fetched)
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key in data:
+            self.local.delete(self.make_key(key, version))
+        return self.l2.set_many(data, timeout, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.local.delete(self.make_key(key, version))
+        self.l2.delete_many(keys, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+
+def cache_stats():
+    """Snapshot of hit/miss counters of every tiered cache in this process"""
+    return {name: stats.snapshot() for name, stats in _stats.items()}
+
+
+# -- Stampede protection ----------------------------------------------------
+
+_flight_locks = {}
+_flight_registry_lock = threading.Lock()
+
+
+def _flight_lock(key):
+    with _flight_registry_lock:
+        lock = _flight_locks.get(key)
+        if lock is None:
+            if len(_flight_locks) > 10000:
+                _flight_locks.clear()
+            lock = _flight_locks[key] = threading.Lock()
+        return lock
+
+
+def _should_recompute_early(envelope, beta):
+    # XFetch: recompute with rising probability as expiry approaches,
+    # scaled by how long the value took to compute
+    if envelope['expires_at'] is None:
+        return False
+    jitter = envelope['delta'] * beta * -math.log(max(random.random(), 1e-12))
+    return time.time() + jitter >= envelope['expires_at']
+
+
+def get_or_compute(key, compute, timeout=300, cache_alias='default', beta=1.0, lock_timeout=30):
+    """
+    Return the cached value for ``key``, computing and storing it on a miss.
+
+    Only one caller per process computes a given key at a time, and a
+    short-lived lock in the cache keeps other processes from recomputing the
+    same key concurrently; they serve the previous value if there is one,
+    or briefly wait for the winner. Hot keys are recomputed early with a
+    probability that grows as expiry approaches (beta > 1 favours earlier).
+    """
+    cache = caches[cache_alias]
+    envelope = cache.get(key)
+    if envelope is not None and not _should_recompute_early(envelope, beta):
+        return envelope['value']
+
+    with _flight_lock(key):
+        # Another thread in this process may have refreshed it meanwhile
+        fresh = cache.get(key)
+        refreshed = fresh is not None and (envelope is None or fresh['expires_at'] != envelope['expires_at'])
+        if refreshed:
+            return fresh['value']
+
+        lock_key = f'{key}:lock'
+        locked = cache.add(lock_key, 1, lock_timeout)
+        if not locked:
+            if envelope is not None:
+                return envelope['value']
+            stats = getattr(cache, 'stats', None)
+            if stats is not None:
+                stats.incr('lock_waits')
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                envelope = cache.get(key)
+                if envelope is not None:
+                    return envelope['value']
+            # Lock holder died or is too slow; compute without it
+
+        try:
+            started = time.monotonic()
+            value = compute()
+            delta = time.monotonic() - started
+            if envelope is not None:
+                stats = getattr(cache, 'stats', None)
+                if stats is not None:
+                    stats.incr('early_recomputes')
+            cache.set(key, {
+                'value': value,
+                'delta': delta,
+                'expires_at': time.time() + timeout if timeout is not None else None,
+            }, timeout)
+            return value
+        finally:
+            # A caller that gave up waiting must not release the holder's lock
+            if locked:
+                cache.delete(lock_key)
+
+
+# -- Key versioning -----------------------------------------------------------
+
+def namespace_version(namespace, cache_alias='default'):
+    cache = caches[cache_alias]
+    version_key = f'ns:{namespace}'
+    version = cache.get(version_key)
+    if version is None:
+        # Not 1: after an eviction that would bring back keys cached under the first version
+        initial = _initial_version()
+        cache.add(version_key, initial, None)
+        version = cache.get(version_key) or initial
+    return version
+
+
+def _initial_version():
+    return time.time_ns() // 1000
+
+
+def namespaced_key(namespace, key, cache_alias='default'):
+    """Key whose namespace version changes on ``bump_namespace``, invalidating all keys in it"""
+    return f'{namespace}:v{namespace_version(namespace, cache_alias)}:{key}'
+
+
+def bump_namespace(namespace, cache_alias='default'):
+    """
+    Invalidate every key in ``namespace``.
+    Other processes notice once their L1 copy of the version expires.
+    """
+    cache = caches[cache_alias]
+    version_key = f'ns:{namespace}'
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(version_key, version, None)
+        return version
@@ -0,0 +1,89 @@
+"""
+Content-Encoding negotiation and codecs for API response compression.
+
+brotli and zstandard are optional; encodings whose module is not installed
+are simply not offered. gzip is always available.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _gzip(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _brotli(data, level):
+    return brotli.compress(data, quality=level, mode=brotli.MODE_TEXT)
+
+
+def _zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# Server preference order: best ratio per CPU second first
+CODECS = [
+    ('zstd', _zstd, zstandard is not None),
+    ('br', _brotli, brotli is not None),
+    ('gzip', _gzip, True),
+]
+AVAILABLE_ENCODINGS = [name for name, _, available in CODECS if available]
+
+
+def parse_accept_encoding(header):
+    """Return a dict of encoding -> q-value from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+    return accepted
+
+
+def negotiate_encoding(header, enabled=None):
+    """
+    Pick the preferred encoding the client accepts.
+
+    Args:
+        header: The request's Accept-Encoding value
+        enabled: Optional iterable limiting which encodings may be used
+
+    Returns:
+        Encoding name, or None to send the response uncompressed
+    """
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = [
+        name for name in AVAILABLE_ENCODINGS
+        if (enabled is None or name in enabled) and accepted.get(name, wildcard) > 0
+    ]
+    if not candidates:
+        return None
+    # Highest client q-value wins; ties go to the server's preference order
+    return max(candidates, key=lambda name: (accepted.get(name, wildcard), -AVAILABLE_ENCODINGS.index(name)))
+
+
+def compress(data, encoding, level):
+    for name, codec, available in CODECS:
+        if name == encoding and available:
+            return codec(data, level)
+    raise ValueError(f'Unsupported encoding: {encoding}')
@@ -0,0 +1,117 @@
+"""
+Primary/replica database routing.
+
+Requests with a safe method (GET, HEAD, OPTIONS) read from the replica
+alias; everything else, and all code outside a request (management
+commands, background threads), uses the primary.
+
+Read-your-writes:
+
+* Within a request, the first write switches the remaining reads to the
+  primary, as does an open transaction on the primary.
+* After a request that wrote (or used an unsafe method) the response pins
+  the client to the primary for DB_REPLICA['PIN_SECONDS']: a cookie for
+  browsers and an ``X-DB-Pin-Until`` header that API clients echo back.
+  Pinning only ever costs a primary read, so the values are not signed.
+"""
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """Per-request routing decision, shared by the router and the middleware"""
+
+    def __init__(self, read_alias):
+        self.read_alias = read_alias
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_alias():
+    """The configured replica alias, or None when no replica is set up"""
+    alias = settings.DB_REPLICA['ALIAS']
+    return alias if alias in settings.DATABASES else None
+
+
+class PrimaryReplicaRouter:
+    """Route reads per the current RoutingState; writes and migrations go to the primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.read_alias == DEFAULT_DB_ALIAS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.read_alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.read_alias = DEFAULT_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, settings.DB_REPLICA['ALIAS']}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.DB_REPLICA['ALIAS']:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Send safe, unpinned requests' reads to the replica and pin clients after writes"""
+
+    def __init__(self, get_response):
+        self.alias = replica_alias()
+        if self.alias is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        config = settings.DB_REPLICA
+        self.pin_seconds = config['PIN_SECONDS']
+        self.cookie_name = config['PIN_COOKIE']
+        self.header_meta = 'HTTP_' + config['PIN_HEADER'].upper().replace('-', '_')
+        self.header_name = config['PIN_HEADER']
+
+    def __call__(self, request):
+        use_replica = request.method in SAFE_METHODS and not self._is_pinned(request)
+        state = RoutingState(self.alias if use_replica else DEFAULT_DB_ALIAS)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote or request.method not in SAFE_METHODS:
+            self._pin(response)
+        return response
+
+    def _is_pinned(self, request):
+        now = time.time()
+        for value in (request.COOKIES.get(self.cookie_name), request.META.get(self.header_meta)):
+            try:
+                if value and float(value) > now:
+                    return True
+            except ValueError:
+                continue
+        return False
+
+    def _pin(self, response):
+        until = str(int(time.time()) + self.pin_seconds)
+        response[self.header_name] = until
+        response.set_cookie(
+            self.cookie_name, until, max_age=self.pin_seconds,
+            httponly=True, samesite='Lax', secure=settings.SESSION_COOKIE_SECURE,
+        )
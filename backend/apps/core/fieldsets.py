@@ -0,0 +1,114 @@
+"""
+Sparse fieldsets (?fields= / ?exclude=) for API responses.
+
+A fieldset prunes both the serialized output and the database work: only the
+columns backing the requested fields are fetched with ``.only()`` and related
+data is prefetched only when a field that needs it is requested.
+"""
+
+
+class InvalidFieldset(ValueError):
+    def __init__(self, unknown):
+        self.unknown = sorted(unknown)
+        super().__init__(f'Unknown fields: {", ".join(self.unknown)}')
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request, available):
+    """
+    Resolve ?fields= / ?exclude= against the available field names.
+
+    Returns:
+        List of selected field names in ``available`` order, or None when
+        neither parameter is given (i.e. return every field)
+
+    Raises:
+        InvalidFieldset: if a parameter names a field that does not exist
+    """
+    fields = request.query_params.get('fields')
+    exclude = request.query_params.get('exclude')
+    if not fields and not exclude:
+        return None
+
+    selected = set(_split(fields)) if fields else set(available)
+    excluded = set(_split(exclude)) if exclude else set()
+    unknown = (selected | excluded) - set(available)
+    if unknown:
+        raise InvalidFieldset(unknown)
+    return [name for name in available if name in selected and name not in excluded]
+
+
+def fieldset_error_response(error):
+    from .responses import APIResponse
+    return APIResponse.validation_error(
+        errors={'fields': f'Unknown fields: {", ".join(error.unknown)}'},
+        message='Invalid field selection'
+    )
+
+
+class SparseFieldsetMixin:
+    """
+    ModelSerializer mixin accepting a ``fields`` argument that limits output
+    to a subset of the declared fields.
+
+    Subclasses describe the database dependencies of their non-column fields:
+        sparse_sources: field name -> model columns it reads
+        sparse_prefetch: field name -> related lookup (or Prefetch) it needs
+    """
+    sparse_sources = {}
+    sparse_prefetch = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def sparse_queryset(cls, queryset, fields):
+        """Restrict ``queryset`` to the columns and relations needed for ``fields`` (None: all fields)"""
+        if fields is None:
+            fields = cls.Meta.fields
+        opts = cls.Meta.model._meta
+        model_fields = {field.name for field in opts.concrete_fields}
+        columns = {opts.pk.name}
+        prefetches = []
+        for name in fields:
+            if name in cls.sparse_prefetch:
+                prefetches.append(cls.sparse_prefetch[name])
+            elif name in cls.sparse_sources:
+                columns.update(cls.sparse_sources[name])
+            elif name in model_fields:
+                columns.add(name)
+        queryset = queryset.only(*columns)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
+
+
+class SparseFieldsetViewMixin:
+    """
+    Generic API view mixin: resolves ?fields= / ?exclude= against the
+    serializer's fields once per request and applies the result to both
+    ``get_queryset()`` and ``get_serializer()``.
+    """
+    fieldset = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.fieldset = requested_fields(request, self.get_serializer_class().Meta.fields)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, InvalidFieldset):
+            return fieldset_error_response(exc)
+        return super().handle_exception(exc)
+
+    def get_queryset(self):
+        return self.get_serializer_class().sparse_queryset(super().get_queryset(), self.fieldset)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.fieldset)
+        return super().get_serializer(*args, **kwargs)
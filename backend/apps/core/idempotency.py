@@ -0,0 +1,124 @@
+"""
+Idempotency-Key support for POST, PUT and PATCH under /api/.
+
+The first response to a key is stored in the shared cache for
+IDEMPOTENCY['TTL'] seconds and replayed on retries: same status, headers
+and body bytes, plus ``Idempotent-Replayed: true``. The view does not
+run again, so a retried register or password change does not hash again
+or fail a uniqueness check. Keys are scoped to the caller's Authorization
+header, method and path. Reusing a key with a different body is rejected
+with 422.
+
+Concurrent duplicates are coalesced: the first request takes a lock with
+``cache.add``, and the others wait up to WAIT_SECONDS for its stored
+response. If it is still running after that they get 409 and Retry-After.
+Only 2xx responses and the deterministic client errors 400, 404 and 422
+are stored. Others (401, 403, 408, 409, 429, 5xx) depend on credentials,
+timing or load, and bodies over MAX_BODY_BYTES are too big to keep; those
+requests can be retried for real.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+
+METHODS = frozenset({'POST', 'PUT', 'PATCH'})
+REPLAYED_HEADER = 'Idempotent-Replayed'
+# Client errors a retry of the same request would get again
+STORED_ERROR_STATUSES = frozenset({400, 404, 422})
+
+
+class IdempotencyMiddleware:
+    """Store and replay responses for requests carrying an Idempotency-Key header"""
+
+    def __init__(self, get_response):
+        config = settings.IDEMPOTENCY
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = 'HTTP_' + config['HEADER'].upper().replace('-', '_')
+        self.prefix = config['PATH_PREFIX']
+        self.cache = caches[config['CACHE_ALIAS']]
+        self.ttl = config['TTL']
+        self.lock_timeout = config['LOCK_TIMEOUT']
+        self.wait_seconds = config['WAIT_SECONDS']
+        self.max_body_bytes = config['MAX_BODY_BYTES']
+
+    def __call__(self, request):
+        key = request.META.get(self.header)
+        if key is None or request.method not in METHODS or not request.path.startswith(self.prefix):
+            return self.get_response(request)
+        if not key or len(key) > 255 or not key.isprintable():
+            return _error('Idempotency-Key must be 1-255 printable characters', 400)
+
+        scope = hashlib.sha256(
+            '\n'.join((request.META.get('HTTP_AUTHORIZATION', ''), request.method, request.path, key)).encode()
+        ).hexdigest()
+        record_key = f'idempotency:{scope}'
+        lock_key = f'idempotency-lock:{scope}'
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+
+        record = self.cache.get(record_key)
+        if record is None and self.cache.add(lock_key, fingerprint, self.lock_timeout):
+            try:
+                # The previous holder may have stored its response between our get() and add()
+                record = self.cache.get(record_key)
+                if record is None:
+                    response = self.get_response(request)
+                    self._store(record_key, fingerprint, response)
+                    return response
+            finally:
+                self.cache.delete(lock_key)
+        elif record is None:
+            record = self._wait_for(record_key, lock_key)
+            if record is None:
+                response = _error('A request with this Idempotency-Key is still being processed', 409)
+                response['Retry-After'] = '1'
+                return response
+
+        if record['fingerprint'] != fingerprint:
+            return _error('Idempotency-Key was already used with a different request body', 422)
+        return _replay(record)
+
+    def _wait_for(self, record_key, lock_key):
+        deadline = time.monotonic() + self.wait_seconds
+        delay = 0.05
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            record = self.cache.get(record_key)
+            if record is not None:
+                return record
+            if self.cache.get(lock_key) is None:
+                # The first request finished without storing (not storable or oversized): let the client retry
+                return None
+        return None
+
+    def _store(self, record_key, fingerprint, response):
+        if response.streaming or not _storable(response.status_code) or len(response.content) > self.max_body_bytes:
+            return
+        self.cache.set(record_key, {
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'headers': list(response.items()),
+            'content': response.content,
+        }, self.ttl)
+
+
+def _storable(status_code):
+    return 200 <= status_code < 300 or status_code in STORED_ERROR_STATUSES
+
+
+def _replay(record):
+    response = HttpResponse(record['content'], status=record['status'])
+    for name, value in record['headers']:
+        response[name] = value
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _error(message, status):
+    return JsonResponse({'success': False, 'message': message}, status=status)
@@ -0,0 +1,230 @@
+"""
+EXPLAIN the SQL of every API endpoint against a seeded dataset.
+
+Seeds users and groups, then requests every named URL under --prefix
+(default /api/) with each HTTP method its view accepts. It uses a
+superuser, an empty JSON body and cold caches. Every statement the
+request runs is captured and EXPLAINed (see apps.core.query_audit). All
+of it happens inside a transaction that is rolled back at the end, and
+each request also runs in its own rolled-back savepoint.
+
+    python manage.py audit_query_plans
+    python manage.py audit_query_plans --users 50000 --json plans.json --fail-on index_candidate
+
+Run it against PostgreSQL for ANALYZE timings, buffers and estimate
+checks; other databases only report full-table scans.
+"""
+import json
+import logging
+import uuid
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core.query_audit import QueryCapture, Thresholds, analyze_postgres_plan, analyze_sqlite_plan, explain
+
+User = get_user_model()
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Endpoints that never touch the database or cannot be requested synchronously
+SKIP_NAMES = {'dashboard:events', 'schema', 'swagger-ui', 'healthz', 'metrics'}
+
+
+class Rollback(Exception):
+    pass
+
+
+def iter_routes(patterns, prefix='', namespace=None):
+    """Yield (route, qualified url name, converters, callback) for every named URL pattern"""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            inner = namespace
+            if pattern.namespace:
+                inner = f'{namespace}:{pattern.namespace}' if namespace else pattern.namespace
+            yield from iter_routes(pattern.url_patterns, route, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield route, name, getattr(pattern.pattern, 'converters', {}), pattern.callback
+
+
+def allowed_methods(callback):
+    view = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    if view is None:
+        return ['GET']
+    return [method for method in METHODS if hasattr(view, method.lower())]
+
+
+class Command(BaseCommand):
+    help = 'Run every API endpoint on seeded data and EXPLAIN (ANALYZE, BUFFERS) the SQL it emits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000, help='Users to seed')
+        parser.add_argument('--groups', type=int, default=50, help='Groups to seed')
+        parser.add_argument('--prefix', default='/api/', help='Only audit URLs under this path')
+        parser.add_argument('--methods', default=','.join(METHODS), help='Comma separated HTTP methods to exercise')
+        parser.add_argument('--top', type=int, default=3, help='Slowest statements listed per endpoint')
+        parser.add_argument('--seq-scan-rows', type=int, default=1000)
+        parser.add_argument('--estimate-factor', type=float, default=10.0)
+        parser.add_argument('--json', default=None, help='Write the full report here ("-" for stdout)')
+        parser.add_argument('--fail-on', default='',
+                            help='Comma separated finding kinds that make the command fail, e.g. index_candidate')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        self.connection = connections[options['database']]
+        self.thresholds = Thresholds(seq_scan_rows=options['seq_scan_rows'], estimate_factor=options['estimate_factor'])
+        methods = {method.strip().upper() for method in options['methods'].split(',') if method.strip()}
+
+        setup_test_environment()
+        try:
+            with transaction.atomic(using=self.connection.alias):
+                report = self.audit(options, methods)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            teardown_test_environment()
+
+        self.print_report(report, options['top'])
+        if options['json']:
+            payload = json.dumps(report, indent=2, default=str)
+            if options['json'] == '-':
+                self.stdout.write(payload)
+            else:
+                with open(options['json'], 'w') as handle:
+                    handle.write(payload)
+
+        fail_on = {kind.strip() for kind in options['fail_on'].split(',') if kind.strip()}
+        failing = [kind for kind in fail_on if report['summary']['findings'].get(kind)]
+        if failing:
+            raise CommandError(f'Query plan findings: {", ".join(sorted(failing))}')
+
+    def audit(self, options, methods):
+        admin, user_id, group_id = self.seed(options['users'], options['groups'])
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        ids = {'user_id': user_id, 'group_id': group_id, 'pk': user_id}
+
+        endpoints = []
+        for route, name, converters, callback in iter_routes(get_resolver().url_patterns):
+            if name in SKIP_NAMES:
+                continue
+            kwargs = {key: ids.get(key, user_id) for key in converters}
+            try:
+                path = reverse(name, kwargs=kwargs)
+            except Exception:
+                continue
+            if not path.startswith(options['prefix']):
+                continue
+            for method in allowed_methods(callback):
+                if method in methods:
+                    endpoints.append(self.run_endpoint(client, method, path, name))
+
+        totals = Counter(finding['kind'] for endpoint in endpoints for statement in endpoint['statements']
+                         for finding in statement['findings'])
+        candidates = defaultdict(set)
+        for endpoint in endpoints:
+            for statement in endpoint['statements']:
+                for finding in statement['findings']:
+                    if finding['kind'] == 'index_candidate':
+                        candidates[(finding['relation'], tuple(finding['columns']))].add(endpoint['endpoint'])
+        return {
+            'database': self.connection.vendor,
+            'seed': {'users': options['users'], 'groups': options['groups']},
+            'summary': {
+                'endpoints': len(endpoints),
+                'statements': sum(len(endpoint['statements']) for endpoint in endpoints),
+                'findings': dict(totals),
+                'index_candidates': [
+                    {'relation': relation, 'columns': list(columns), 'endpoints': sorted(names)}
+                    for (relation, columns), names in sorted(candidates.items())
+                ],
+            },
+            'endpoints': endpoints,
+        }
+
+    def seed(self, user_count, group_count):
+        prefix = f'audit_{uuid.uuid4().hex[:8]}'
+        template = User(username=prefix)
+        template.set_password(uuid.uuid4().hex)
+        users = User.objects.bulk_create([
+            User(
+                username=f'{prefix}_{i}', email=f'{prefix}_{i}@example.com',
+                first_name=f'First{i}', last_name=f'Last{i}', password=template.password,
+                is_active=i % 10 != 0,
+            )
+            for i in range(user_count)
+        ], batch_size=2000)
+        groups = Group.objects.bulk_create([Group(name=f'{prefix}_group_{i}') for i in range(group_count)])
+        permissions = list(Permission.objects.values_list('pk', flat=True)[:20])
+        Group.permissions.through.objects.bulk_create([
+            Group.permissions.through(group_id=group.pk, permission_id=permission)
+            for group in groups for permission in permissions[:5]
+        ])
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=user.pk, group_id=groups[i % len(groups)].pk)
+            for i, user in enumerate(users)
+        ], batch_size=2000)
+        admin = User.objects.create_superuser(f'{prefix}_admin', f'{prefix}_admin@example.com', uuid.uuid4().hex)
+        if self.connection.vendor == 'postgresql':
+            with self.connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.stdout.write(f'Seeded {user_count} users and {group_count} groups ({self.connection.vendor})')
+        return admin, users[len(users) // 2].pk, groups[0].pk
+
+    def run_endpoint(self, client, method, path, name):
+        for alias in ('default', 'shared', 'state'):
+            caches[alias].clear()
+        capture = QueryCapture()
+        with transaction.atomic(using=self.connection.alias):
+            with self.connection.execute_wrapper(capture):
+                response = client.generic(method, path, '{}' if method != 'GET' else '', content_type='application/json')
+            statements = []
+            for query in capture.queries:
+                plan = explain(self.connection, query)
+                if self.connection.vendor == 'postgresql':
+                    analysis = analyze_postgres_plan(plan, self.thresholds)
+                else:
+                    analysis = analyze_sqlite_plan(plan, self.thresholds)
+                statements.append({'sql': query.sql, 'wall_ms': round(query.seconds * 1000, 3), **analysis})
+            transaction.set_rollback(True, using=self.connection.alias)
+        return {
+            'endpoint': f'{method} {path}', 'name': name, 'status': response.status_code,
+            'statements': statements,
+        }
+
+    def print_report(self, report, top):
+        for endpoint in report['endpoints']:
+            findings = Counter(finding['kind'] for statement in endpoint['statements'] for finding in statement['findings'])
+            flag = ' '.join(f'{kind}={count}' for kind, count in sorted(findings.items()))
+            self.stdout.write(
+                f'{endpoint["endpoint"]:<52} {endpoint["status"]} queries={len(endpoint["statements"]):<3} {flag}'
+            )
+            slowest = sorted(endpoint['statements'], key=lambda s: s['execution_ms'] or s['wall_ms'], reverse=True)
+            for statement in slowest[:top]:
+                if not statement['findings']:
+                    continue
+                took = statement['execution_ms'] if statement['execution_ms'] is not None else statement['wall_ms']
+                self.stdout.write(f'    {took:8.2f}ms  {statement["sql"][:110]}')
+                for finding in statement['findings']:
+                    details = {key: value for key, value in finding.items() if key != 'kind' and value is not None}
+                    self.stdout.write(f'              {finding["kind"]}: {details}')
+
+        summary = report['summary']
+        self.stdout.write(
+            f'\n{summary["endpoints"]} endpoint calls, {summary["statements"]} statements, findings: {summary["findings"] or "none"}'
+        )
+        for candidate in summary['index_candidates']:
+            self.stdout.write(
+                f'  index candidate {candidate["relation"]}({", ".join(candidate["columns"])}) '
+                f'used by {", ".join(candidate["endpoints"])}'
+            )
@@ -0,0 +1,111 @@
+"""
+Measure the per-request overhead of MetricsMiddleware.
+
+Times a no-op view with and without the middleware around it (including
+the query-counting execute wrapper for ``--queries`` simulated queries)
+and fails if the mean overhead exceeds the budget:
+
+    python manage.py bench_metrics
+    python manage.py bench_metrics --multiprocess --queries 10 --budget-us 50
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from apps.core import metrics
+from apps.core.benchmark import percentile
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-request cost of the Prometheus metrics middleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50000)
+        parser.add_argument('--queries', type=int, default=5,
+                            help='Simulated DB queries per request (exercises the execute wrapper)')
+        parser.add_argument('--path', default='/api/auth/logout/',
+                            help='URL whose name labels the samples')
+        parser.add_argument('--budget-us', type=float, default=50.0,
+                            help='Fail when the mean overhead per request exceeds this')
+        parser.add_argument('--multiprocess', action='store_true',
+                            help='Run with PROMETHEUS_MULTIPROC_DIR set (gunicorn mode)')
+
+    def handle(self, *args, **options):
+        if metrics.prometheus_client is None:
+            raise CommandError('prometheus_client is not installed')
+
+        if options['multiprocess'] and 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+            return self._rerun_multiprocess()
+
+        mode = 'multiprocess' if 'PROMETHEUS_MULTIPROC_DIR' in os.environ else 'single process'
+        request = RequestFactory().get(options['path'])
+        request.resolver_match = resolve(options['path'])
+        response = HttpResponse(b'{}', content_type='application/json')
+        query_count = options['queries']
+
+        def noop_execute(sql, params, many, context):
+            return None
+
+        def view_with_queries(request):
+            for _ in range(query_count):
+                metrics.count_queries(noop_execute, 'SELECT 1', (), False, None)
+            return response
+
+        def bare_view(request):
+            for _ in range(query_count):
+                noop_execute('SELECT 1', (), False, None)
+            return response
+
+        middleware = metrics.MetricsMiddleware(view_with_queries)
+
+        n = options['requests']
+        # Interleave to spread frequency scaling / GC noise evenly over both
+        baseline, instrumented = [], []
+        for _ in range(2):
+            baseline += self._time(bare_view, request, n // 2)
+            instrumented += self._time(middleware, request, n // 2)
+
+        base_mean = statistics.fmean(baseline)
+        inst_mean = statistics.fmean(instrumented)
+        overhead = inst_mean - base_mean
+        self.stdout.write(f'Metrics middleware overhead ({mode}, {query_count} queries/request, n={n})')
+        for label, samples in (('baseline', baseline), ('with metrics', instrumented)):
+            self.stdout.write(
+                f'  {label:<14} mean={statistics.fmean(samples):7.2f}us '
+                f'p50={percentile(samples, 50):7.2f}us p99={percentile(samples, 99):7.2f}us'
+            )
+        self.stdout.write(
+            f'  overhead       mean={overhead:7.2f}us '
+            f'p50={percentile(instrumented, 50) - percentile(baseline, 50):7.2f}us '
+            f'(budget {options["budget_us"]:.0f}us)'
+        )
+
+        if overhead > options['budget_us']:
+            raise CommandError(f'Mean overhead {overhead:.2f}us exceeds the {options["budget_us"]:.0f}us budget')
+
+    @staticmethod
+    def _time(handler, request, n):
+        clock = time.perf_counter
+        samples = []
+        for _ in range(n):
+            started = clock()
+            handler(request)
+            samples.append((clock() - started) * 1e6)
+        return samples
+
+    def _rerun_multiprocess(self):
+        # prometheus_client picks its value storage at import time
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+            argv = [arg for arg in sys.argv if arg != '--multiprocess']
+            result = subprocess.run([sys.executable, *argv], env=env)
+        if result.returncode:
+            raise CommandError('Multiprocess benchmark failed')
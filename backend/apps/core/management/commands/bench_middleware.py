@@ -0,0 +1,137 @@
+"""
+Measure what the slim API middleware chain saves per request.
+
+Two measurements, each comparing the full chain (every path runs
+BROWSER_MIDDLEWARE, i.e. STATELESS_PATH_PREFIXES = ()) with the configured
+slim one:
+
+    chain        BrowserOnlyMiddleware alone around a stub view, fed
+                 RequestFactory requests for --path: the middleware cost
+                 without client or view noise
+    end to end   the whole request through the test client (default:
+                 POST /api/auth/logout/ with a bearer token), with
+                 MIDDLEWARE = [] as the baseline
+
+    python manage.py bench_middleware
+    python manage.py bench_middleware --requests 20000 --path /api/users/profile/ --method get
+"""
+import logging
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.http import JsonResponse
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import resolve
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core.benchmark import format_summary, percentile, summarize
+from apps.core.middleware import BrowserOnlyMiddleware
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request overhead of the full vs. slim middleware chain on an API endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='End-to-end requests per set-up')
+        parser.add_argument('--chain-requests', type=int, default=50000, help='Chain-only calls per set-up')
+        parser.add_argument('--rounds', type=int, default=4, help='Interleaved rounds the requests are split into')
+        parser.add_argument('--path', default='/api/auth/logout/')
+        parser.add_argument('--method', default='post', choices=['get', 'post'])
+
+    def handle(self, *args, **options):
+        # Payload size logging would flood the console; it is muted in every set-up alike
+        logging.getLogger('apps.core.payload').setLevel(logging.WARNING)
+        self.stdout.write(f'{options["method"].upper()} {options["path"]}')
+        self.bench_chain(options)
+        self.bench_end_to_end(options)
+
+    def bench_chain(self, options):
+        view = resolve(options['path']).func
+        factory = getattr(RequestFactory(), options['method'])
+        response = JsonResponse({})
+
+        def stub(request):
+            return response
+
+        with override_settings(STATELESS_PATH_PREFIXES=()):
+            full = BrowserOnlyMiddleware(stub)
+        slim = BrowserOnlyMiddleware(stub)
+
+        def call(middleware, n):
+            clock = time.perf_counter
+            timings = []
+            for _ in range(n):
+                request = factory(options['path'])
+                started = clock()
+                if middleware.process_view(request, view, (), {}) is None:
+                    middleware(request)
+                timings.append((clock() - started) * 1e6)
+            return timings
+
+        samples = {'full': [], 'slim': []}
+        per_round = max(1, options['chain_requests'] // options['rounds'])
+        for _ in range(options['rounds']):
+            samples['full'] += call(full, per_round)
+            samples['slim'] += call(slim, per_round)
+
+        self.stdout.write('  chain only (BrowserOnlyMiddleware around a stub view)')
+        for name, values in samples.items():
+            self.stdout.write(
+                f'    {name:<6} mean={statistics.fmean(values):7.2f}us '
+                f'p50={percentile(values, 50):7.2f}us p99={percentile(values, 99):7.2f}us'
+            )
+        saved = statistics.fmean(samples['full']) - statistics.fmean(samples['slim'])
+        self.stdout.write(f'    slim chain saves {saved:.1f}us per request')
+
+    def bench_end_to_end(self, options):
+        setups = {
+            'none': {'MIDDLEWARE': []},
+            'full': {'STATELESS_PATH_PREFIXES': ()},
+            'slim': {},
+        }
+        samples = {name: [] for name in setups}
+        per_round = max(1, options['requests'] // options['rounds'])
+
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(f'bench_middleware_{time.time_ns()}', password=None)
+                token = f'Bearer {RefreshToken.for_user(user).access_token}'
+                # Interleave set-ups to spread frequency scaling and GC noise evenly
+                for _ in range(options['rounds']):
+                    for name, overrides in setups.items():
+                        with override_settings(**overrides):
+                            samples[name] += self._time(Client(HTTP_AUTHORIZATION=token), options, per_round)
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        summaries = {name: summarize(values) for name, values in samples.items()}
+        self.stdout.write('  end to end (test client, whole MIDDLEWARE)')
+        for name, summary in summaries.items():
+            self.stdout.write('    ' + format_summary(name, summary))
+        for name in ('full', 'slim'):
+            overhead = (summaries[name]['mean_ms'] - summaries['none']['mean_ms']) * 1000
+            self.stdout.write(f'    middleware overhead ({name}): mean={overhead:7.1f}us')
+
+    @staticmethod
+    def _time(client, options, n):
+        request = getattr(client, options['method'])
+        path = options['path']
+        clock = time.perf_counter
+        # Warm up: the handler builds its middleware chain on the first request
+        response = request(path)
+        if response.status_code >= 400:
+            raise CommandError(f'{path} returned {response.status_code}')
+        timings = []
+        for _ in range(n):
+            started = clock()
+            request(path)
+            timings.append(clock() - started)
+        return timings
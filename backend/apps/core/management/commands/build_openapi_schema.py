@@ -0,0 +1,39 @@
+"""
+Generate the OpenAPI schema artifact served at /api/schema/.
+
+Run at image build time (see Dockerfile) or after deploying API changes:
+
+    python manage.py build_openapi_schema
+    python manage.py build_openapi_schema --output /srv/openapi
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.openapi import build_artifact, generate_schema, write_artifact
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema once and store it as a hashed, precompressed artifact'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help='Directory to write to (defaults to OPENAPI_SCHEMA["DIR"])')
+
+    def handle(self, *args, **options):
+        if not settings.ENABLE_API_DOCS:
+            raise CommandError('API docs are disabled for this deployment role (ENABLE_API_DOCS=False)')
+
+        started = time.perf_counter()
+        content = generate_schema()
+        generated_ms = (time.perf_counter() - started) * 1000
+
+        artifact = build_artifact(content)
+        manifest = write_artifact(artifact, options['output'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {manifest['file']} ({generated_ms:.0f} ms to generate)"
+        ))
+        for encoding, data in artifact.variants.items():
+            self.stdout.write(f'  {encoding:<9} {len(data):>8} bytes')
@@ -0,0 +1,78 @@
+"""
+Merge collapsed-stack request profiles into one flamegraph input.
+
+    python manage.py profile_aggregate --view users:list --hours 24 -o users-list.folded
+    flamegraph.pl users-list.folded > users-list.svg      # or load it in speedscope
+
+Also prints the functions with the most samples, on-CPU at the leaf
+("self") and anywhere on the stack ("total").
+"""
+import fnmatch
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.profiling import FOLDED_SUFFIX
+
+
+class Command(BaseCommand):
+    help = 'Aggregate sampled request profiles (collapsed stacks) and list the hottest functions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None, help='Profile directory (defaults to PROFILING["DIR"])')
+        parser.add_argument('--view', default='*',
+                            help='URL name glob, e.g. "users:*" (file names use _ for ":")')
+        parser.add_argument('--hours', type=float, default=None, help='Only profiles from the last N hours')
+        parser.add_argument('--match', default=None, help='Only stacks containing this substring')
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('-o', '--output', default=None, help='Write the merged collapsed stacks here')
+
+    def handle(self, *args, **options):
+        directory = Path(options['dir'] or settings.PROFILING['DIR'])
+        if not directory.is_dir():
+            raise CommandError(f'No profiles in {directory}')
+
+        view_glob = options['view'].replace(':', '_')
+        cutoff = time.time() - options['hours'] * 3600 if options['hours'] else None
+        stacks = Counter()
+        files = 0
+        for path in directory.glob(f'*/*{FOLDED_SUFFIX}'):
+            view = path.name.rsplit('-', 3)[0]
+            if not fnmatch.fnmatch(view, view_glob):
+                continue
+            if cutoff and path.stat().st_mtime < cutoff:
+                continue
+            files += 1
+            for line in path.read_text().splitlines():
+                stack, _, count = line.rpartition(' ')
+                if stack and (not options['match'] or options['match'] in stack):
+                    stacks[stack] += int(count)
+
+        if not stacks:
+            raise CommandError('No matching samples')
+
+        if options['output']:
+            Path(options['output']).write_text(
+                ''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
+            )
+
+        total = sum(stacks.values())
+        self_samples, total_samples = Counter(), Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            self_samples[frames[-1]] += count
+            for frame in set(frames):
+                total_samples[frame] += count
+
+        self.stdout.write(f'{total} samples from {files} profiles')
+        self.stdout.write('\nSelf (leaf) samples')
+        for frame, count in self_samples.most_common(options['top']):
+            self.stdout.write(f'  {count / total:6.1%} {count:>7}  {frame}')
+        self.stdout.write('\nTotal (inclusive) samples')
+        for frame, count in total_samples.most_common(options['top']):
+            self.stdout.write(f'  {count / total:6.1%} {count:>7}  {frame}')
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {len(stacks)} stacks to {options['output']}"))
@@ -0,0 +1,188 @@
+"""
+Profile a cold start of the Django process.
+
+Boots the project in a fresh interpreter under ``python -X importtime``,
+times every ``AppConfig.ready()``, the URLconf import and the WSGI
+application, then reports the most expensive imports:
+
+    python manage.py profile_startup
+    python manage.py profile_startup --role api --target-ms 800
+    python manage.py profile_startup --json > startup.json
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in the child interpreter; prints one JSON line on stdout
+PROBE = r'''
+import json, time
+started = time.perf_counter()
+import django
+from django.apps import config as app_config_module
+
+ready_ms = {}
+create = app_config_module.AppConfig.create.__func__
+
+def timed_create(cls, entry):
+    app_config = create(cls, entry)
+    ready = app_config.ready
+
+    def timed_ready():
+        t = time.perf_counter()
+        ready()
+        ready_ms[app_config.label] = (time.perf_counter() - t) * 1000
+
+    app_config.ready = timed_ready
+    return app_config
+
+app_config_module.AppConfig.create = classmethod(timed_create)
+
+django.setup(set_prefix=False)
+setup_done = time.perf_counter()
+
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+wsgi_done = time.perf_counter()
+
+print(json.dumps({
+    'setup_ms': (setup_done - started) * 1000,
+    'urlconf_ms': (urls_done - setup_done) * 1000,
+    'wsgi_ms': (wsgi_done - urls_done) * 1000,
+    'ready_ms': ready_ms,
+}))
+'''
+
+
+def parse_importtime(lines):
+    """
+    Parse ``-X importtime`` output into ``(module, self_us, cumulative_us)``
+    """
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header line
+        modules.append((parts[2].strip(), self_us, cumulative_us))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Measure cold-start time, per-app ready() cost and the heaviest imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--role', default=None,
+                            help='DEPLOYMENT_ROLE to profile (defaults to the current one)')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Number of modules/packages to list')
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Cold starts to run; the fastest is reported')
+        parser.add_argument('--target-ms', type=float, default=None,
+                            help='Fail when the fastest cold start exceeds this budget')
+        parser.add_argument('--json', action='store_true', help='Emit a JSON report')
+
+    def handle(self, *args, **options):
+        role = options['role'] or settings.DEPLOYMENT_ROLE
+        env = dict(os.environ, DEPLOYMENT_ROLE=role)
+        env.pop('ENABLE_ADMIN', None)
+        env.pop('ENABLE_API_DOCS', None)
+        env.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+
+        best = None
+        for _ in range(max(options['runs'], 1)):
+            run = self._cold_start(env)
+            if best is None or run['total_ms'] < best['total_ms']:
+                best = run
+
+        report = self._report(best, role, options['top'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report)
+
+        target = options['target_ms']
+        if target is not None and report['total_ms'] > target:
+            raise CommandError(
+                f"Cold start took {report['total_ms']:.0f} ms, over the {target:.0f} ms budget"
+            )
+
+    def _cold_start(self, env):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        total_ms = (time.perf_counter() - started) * 1000
+        if proc.returncode != 0:
+            raise CommandError(f'Startup probe failed:\n{proc.stderr[-4000:]}')
+
+        timings = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings['total_ms'] = total_ms
+        timings['imports'] = parse_importtime(proc.stderr.splitlines())
+        return timings
+
+    def _report(self, run, role, top):
+        imports = run['imports']
+        packages = defaultdict(int)
+        for module, self_us, _ in imports:
+            packages[module.split('.', 1)[0]] += self_us
+
+        heaviest = sorted(imports, key=lambda m: m[2], reverse=True)[:top]
+        return {
+            'role': role,
+            'total_ms': round(run['total_ms'], 1),
+            'setup_ms': round(run['setup_ms'], 1),
+            'urlconf_ms': round(run['urlconf_ms'], 1),
+            'wsgi_ms': round(run['wsgi_ms'], 1),
+            'import_ms': round(sum(m[1] for m in imports) / 1000, 1),
+            'modules_imported': len(imports),
+            'ready_ms': {
+                label: round(ms, 2)
+                for label, ms in sorted(run['ready_ms'].items(), key=lambda i: i[1], reverse=True)
+            },
+            'top_modules': [
+                {'module': module, 'self_ms': round(s / 1000, 2), 'cumulative_ms': round(c / 1000, 2)}
+                for module, s, c in heaviest
+            ],
+            'top_packages': [
+                {'package': name, 'self_ms': round(us / 1000, 2)}
+                for name, us in sorted(packages.items(), key=lambda i: i[1], reverse=True)[:top]
+            ],
+        }
+
+    def _print(self, report):
+        w = self.stdout.write
+        w(f"Cold start ({report['role']}): {report['total_ms']:.0f} ms total, "
+          f"{report['import_ms']:.0f} ms in {report['modules_imported']} imports")
+        w(f"  django.setup  {report['setup_ms']:8.1f} ms")
+        w(f"  URLconf       {report['urlconf_ms']:8.1f} ms")
+        w(f"  WSGI app      {report['wsgi_ms']:8.1f} ms")
+
+        w('\nAppConfig.ready()')
+        for label, ms in report['ready_ms'].items():
+            w(f'  {label:<24} {ms:8.2f} ms')
+
+        w('\nHeaviest imports (cumulative)')
+        for row in report['top_modules']:
+            w(f"  {row['module']:<48} {row['cumulative_ms']:8.2f} ms")
+
+        w('\nPackages by own import time')
+        for row in report['top_packages']:
+            w(f"  {row['package']:<24} {row['self_ms']:8.2f} ms")
@@ -0,0 +1,185 @@
+"""
+Prometheus metrics.
+
+Recorded per request by MetricsMiddleware:
+
+    http_request_duration_seconds{view, method, status}   histogram
+    http_requests_in_progress                               gauge
+    db_queries_per_request{view}                            histogram
+    db_query_duration_seconds_total{view}                   counter
+    cache_operations_total{cache, result}                   counter
+    worker_processes                                        gauge
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py): each
+worker then writes its samples to mmap'd files in that directory and
+/metrics aggregates all of them. Without it, metrics are per process,
+which is what runserver needs.
+
+prometheus_client is optional; without it the middleware removes itself
+and /metrics answers 404.
+"""
+import ipaddress
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:
+    prometheus_client = None
+
+# Latency buckets in seconds; API responses live between a few ms and ~1s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+CACHE_RESULTS = {'l1_hits': 'l1_hit', 'l2_hits': 'l2_hit', 'misses': 'miss', 'sets': 'set'}
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        'http_request_duration_seconds', 'Request latency by URL name',
+        ['view', 'method', 'status'], buckets=LATENCY_BUCKETS,
+    )
+    REQUESTS_IN_PROGRESS = Gauge(
+        'http_requests_in_progress', 'Requests being handled', multiprocess_mode='livesum',
+    )
+    DB_QUERIES = Histogram(
+        'db_queries_per_request', 'Database queries per request by URL name',
+        ['view'], buckets=QUERY_COUNT_BUCKETS,
+    )
+    DB_TIME = Counter(
+        'db_query_duration_seconds', 'Time spent in database queries by URL name', ['view'],
+    )
+    CACHE_OPERATIONS = Counter(
+        'cache_operations', 'Tiered cache lookups and writes', ['cache', 'result'],
+    )
+    WORKERS = Gauge('worker_processes', 'Live worker processes', multiprocess_mode='livesum')
+
+
+class QueryTally:
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_tally = ContextVar('metrics_query_tally', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request's tally"""
+    tally = _tally.get()
+    if tally is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        tally.count += 1
+        tally.seconds += time.perf_counter() - started
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """connection_created handler: wrap every connection once (reconnects keep the wrapper)"""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, query counts and concurrency for every request.
+
+    The hot path is a handful of perf_counter calls and observations on
+    pre-resolved label children; see ``manage.py bench_metrics`` for the
+    measured overhead.
+    """
+
+    def __init__(self, get_response):
+        if prometheus_client is None or not settings.METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cache_flush_interval = settings.METRICS['CACHE_FLUSH_INTERVAL']
+        self._latency = {}
+        self._queries = {}
+        self._cache_seen = {}
+        self._cache_flushed_at = 0.0
+        connection_created.connect(install_query_counter, dispatch_uid='metrics.install_query_counter')
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(None, connection)
+        WORKERS.set(1)
+
+    def __call__(self, request):
+        tally = QueryTally()
+        token = _tally.set(tally)
+        REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec()
+            _tally.reset(token)
+
+        match = request.resolver_match
+        view = match.view_name if match else '<unmatched>'
+        key = (view, request.method, response.status_code)
+        latency = self._latency.get(key)
+        if latency is None:
+            latency = self._latency[key] = REQUEST_LATENCY.labels(view, request.method, str(response.status_code))
+        latency.observe(elapsed)
+
+        queries = self._queries.get(view)
+        if queries is None:
+            queries = self._queries[view] = (DB_QUERIES.labels(view), DB_TIME.labels(view))
+        queries[0].observe(tally.count)
+        if tally.seconds:
+            queries[1].inc(tally.seconds)
+
+        if started - self._cache_flushed_at >= self.cache_flush_interval:
+            self._flush_cache_stats(started)
+        return response
+
+    def _flush_cache_stats(self, now):
+        # CacheStats are cheap per-process counters; publish their growth in batches
+        from .cache import cache_stats
+
+        self._cache_flushed_at = now
+        for name, snapshot in cache_stats().items():
+            seen = self._cache_seen.setdefault(name, {})
+            for field, result in CACHE_RESULTS.items():
+                delta = snapshot[field] - seen.get(field, 0)
+                if delta > 0:
+                    CACHE_OPERATIONS.labels(name, result).inc(delta)
+                    seen[field] = snapshot[field]
+
+
+def _client_allowed(request):
+    config = settings.METRICS
+    token = config['TOKEN']
+    if token and request.META.get('HTTP_AUTHORIZATION') == f'Bearer {token}':
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in config['ALLOWED_NETWORKS'])
+
+
+def metrics_view(request):
+    """Prometheus exposition for scrapers on the internal network (or holding METRICS_TOKEN)"""
+    if prometheus_client is None or not settings.METRICS['ENABLED'] or not _client_allowed(request):
+        raise Http404
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import CollectorRegistry, multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -0,0 +1,155 @@
+"""
+Middleware shared by the API apps
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+
+from .compression import compress, negotiate_encoding
+
+logger = logging.getLogger('apps.core.payload')
+
+COMPRESSIBLE_TYPES = re.compile(r'^(application/(json|.*\+json|javascript|xml)|text/)')
+
+
+class APICompressionMiddleware:
+    """
+    Compress API responses above a size threshold with the best encoding the
+    client accepts (zstd, br or gzip) and log raw and sent payload sizes per
+    endpoint.
+
+    Levels are deliberately moderate (settings.API_COMPRESSION): JSON
+    compresses well at low levels, and higher levels cost far more CPU for
+    only a few percent fewer bytes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.API_COMPRESSION
+        self.enabled = config['ENABLED']
+        self.prefix = config['PATH_PREFIX']
+        self.min_size = config['MIN_SIZE']
+        self.encodings = config['ENCODINGS']
+        self.levels = config['LEVELS']
+        self.log_sizes = config['LOG_SIZES']
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not request.path.startswith(self.prefix) or response.streaming:
+            return response
+
+        raw_size = len(response.content)
+        encoding = None
+        if self.enabled and self._should_compress(response, raw_size):
+            encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+            # Vary even when not compressing, so caches do not serve identity to zstd clients
+            patch_vary_headers(response, ('Accept-Encoding',))
+            if encoding:
+                compressed = compress(response.content, encoding, self.levels[encoding])
+                if len(compressed) < raw_size:
+                    response.content = compressed
+                    response['Content-Encoding'] = encoding
+                    response['Content-Length'] = str(len(compressed))
+                    self._weaken_etag(response)
+                else:
+                    encoding = None
+
+        if self.log_sizes:
+            match = request.resolver_match
+            logger.info(
+                'api_payload view=%s method=%s status=%s raw=%d sent=%d encoding=%s',
+                match.view_name if match else request.path,
+                request.method,
+                response.status_code,
+                raw_size,
+                len(response.content),
+                encoding or response.get('Content-Encoding', 'identity'),
+            )
+        return response
+
+    def _should_compress(self, response, raw_size):
+        return (
+            raw_size >= self.min_size
+            and not response.has_header('Content-Encoding')
+            and COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))
+        )
+
+    @staticmethod
+    def _weaken_etag(response):
+        # The compressed body is no longer byte-identical to what the strong ETag described
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+
+class BrowserOnlyMiddleware:
+    """
+    Run settings.BROWSER_MIDDLEWARE (sessions, CSRF, auth, messages) for
+    every path except settings.STATELESS_PATH_PREFIXES.
+
+    The JWT API is stateless: DRF authenticates each view from the bearer
+    token and exempts API views from CSRF, so sessions, CSRF checks, the
+    lazy request.user and messages are pure overhead there. The admin keeps
+    the full chain. The wrapped middleware is built the way Django's handler
+    builds MIDDLEWARE, including its process_view / process_exception /
+    process_template_response hooks (CSRF is checked in process_view).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefixes = tuple(settings.STATELESS_PATH_PREFIXES)
+        self.view_hooks = []
+        self.template_response_hooks = []
+        self.exception_hooks = []
+
+        handler = get_response
+        for path in reversed(settings.BROWSER_MIDDLEWARE):
+            try:
+                instance = import_string(path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(instance, 'process_view'):
+                self.view_hooks.insert(0, instance.process_view)
+            if hasattr(instance, 'process_template_response'):
+                self.template_response_hooks.append(instance.process_template_response)
+            if hasattr(instance, 'process_exception'):
+                self.exception_hooks.append(instance.process_exception)
+            handler = convert_exception_to_response(instance)
+        self.browser_chain = handler
+
+    def is_stateless(self, request):
+        return bool(self.prefixes) and request.path_info.startswith(self.prefixes)
+
+    def __call__(self, request):
+        if self.is_stateless(request):
+            return self.get_response(request)
+        return self.browser_chain(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_stateless(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        if not self.is_stateless(request):
+            for hook in self.template_response_hooks:
+                response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.is_stateless(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
@@ -0,0 +1,141 @@
+"""
+Prebuilt OpenAPI schema artifact.
+
+``python manage.py build_openapi_schema`` introspects the API once and writes
+a content-hashed JSON file plus precompressed variants:
+
+    openapi/schema.<hash>.json
+    openapi/schema.<hash>.json.{zst,br,gz}
+    openapi/manifest.json           -> {"hash": ..., "file": ..., ...}
+
+The schema view serves those bytes with an ETag derived from the hash, so
+docs traffic costs a file read per process instead of a full introspection
+per request.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .compression import AVAILABLE_ENCODINGS, compress
+
+MANIFEST_NAME = 'manifest.json'
+
+# Build-time compression: spend CPU once for the smallest files
+ARTIFACT_LEVELS = {'zstd': 19, 'br': 11, 'gzip': 9}
+SUFFIXES = {'zstd': '.zst', 'br': '.br', 'gzip': '.gz'}
+
+
+class SchemaArtifact:
+    """A schema rendering and its precompressed variants, keyed by encoding"""
+
+    def __init__(self, digest, variants):
+        self.digest = digest
+        self.etag = f'"{digest}"'
+        self.variants = variants
+
+    @property
+    def encodings(self):
+        return [name for name in self.variants if name != 'identity']
+
+
+def generate_schema():
+    """Introspect the API and return the schema as compact JSON bytes"""
+    from drf_spectacular.generators import SchemaGenerator
+    from rest_framework.renderers import JSONRenderer
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return JSONRenderer().render(schema)
+
+
+def build_artifact(content):
+    """Compress ``content`` with every available codec"""
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    variants = {'identity': content}
+    for encoding in AVAILABLE_ENCODINGS:
+        variants[encoding] = compress(content, encoding, ARTIFACT_LEVELS[encoding])
+    return SchemaArtifact(digest, variants)
+
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as handle:
+        handle.write(data)
+    os.replace(tmp, path)
+
+
+def write_artifact(artifact, directory=None):
+    """
+    Write the artifact files, then switch the manifest to them.
+
+    The manifest is replaced last, so readers never see a manifest pointing
+    at files that are not fully written. Files of previous builds are removed.
+    """
+    directory = Path(directory or settings.OPENAPI_SCHEMA['DIR'])
+    directory.mkdir(parents=True, exist_ok=True)
+
+    base = f'schema.{artifact.digest}.json'
+    for encoding, data in artifact.variants.items():
+        _atomic_write(directory / (base + SUFFIXES.get(encoding, '')), data)
+
+    manifest = {
+        'hash': artifact.digest,
+        'file': base,
+        'encodings': artifact.encodings,
+        'size': len(artifact.variants['identity']),
+        'generated_at': timezone.now().isoformat(),
+    }
+    _atomic_write(directory / MANIFEST_NAME, json.dumps(manifest, indent=2).encode())
+
+    for stale in directory.glob('schema.*.json*'):
+        if not stale.name.startswith(base):
+            stale.unlink(missing_ok=True)
+    return manifest
+
+
+def read_artifact(directory=None):
+    """Load the artifact named by the manifest, or None when none was built"""
+    directory = Path(directory or settings.OPENAPI_SCHEMA['DIR'])
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_bytes())
+        variants = {'identity': (directory / manifest['file']).read_bytes()}
+        for encoding in manifest['encodings']:
+            if encoding in SUFFIXES and encoding in AVAILABLE_ENCODINGS:
+                variants[encoding] = (directory / (manifest['file'] + SUFFIXES[encoding])).read_bytes()
+    except (OSError, ValueError, KeyError):
+        return None
+    return SchemaArtifact(manifest['hash'], variants)
+
+
+_artifact = None
+_artifact_lock = threading.Lock()
+
+
+def get_artifact():
+    """
+    Return the schema artifact for this process.
+
+    With OPENAPI_SCHEMA['USE_ARTIFACT'] the prebuilt files are read once; when
+    none exist the first request builds and writes them. Without it (the
+    development default) the schema is generated once per process, so
+    runserver's autoreload always serves the current code.
+    """
+    global _artifact
+    if _artifact is not None:
+        return _artifact
+
+    with _artifact_lock:
+        if _artifact is None:
+            config = settings.OPENAPI_SCHEMA
+            artifact = read_artifact() if config['USE_ARTIFACT'] else None
+            if artifact is None:
+                artifact = build_artifact(generate_schema())
+                if config['USE_ARTIFACT']:
+                    write_artifact(artifact)
+            _artifact = artifact
+    return _artifact
@@ -0,0 +1,57 @@
+"""
+Paginator for admin changelists over large tables.
+
+On PostgreSQL an unfiltered changelist takes its count from the planner's
+table statistics (``pg_class.reltuples``) instead of ``COUNT(*)``. A
+filtered one counts exactly up to ADMIN_PERFORMANCE['EXACT_COUNT_LIMIT']
+rows and beyond that uses the planner's row estimate for the filtered
+query. Other databases count exactly.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def table_row_estimate(model, connection):
+    """Planner estimate of the table's row count, or None if it has never been analyzed"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def query_row_estimate(queryset, connection):
+    """Planner estimate of the rows ``queryset`` returns"""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count is exact for small results and estimated for large ones"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+
+        limit = settings.ADMIN_PERFORMANCE['EXACT_COUNT_LIMIT']
+        if not queryset.query.where:
+            estimate = table_row_estimate(queryset.model, connection)
+            if estimate is not None and estimate > limit:
+                return estimate
+
+        queryset = queryset.order_by()
+        exact = queryset[:limit + 1].count()
+        if exact <= limit:
+            return exact
+        return max(query_row_estimate(queryset, connection), exact)
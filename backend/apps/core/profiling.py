@@ -0,0 +1,217 @@
+"""
+Opt-in statistical profiler for production requests.
+
+One daemon thread per process wakes every PROFILING['INTERVAL'] seconds
+while at least one request is being profiled, reads the stacks of the
+profiled request threads from ``sys._current_frames()`` and counts them.
+When the request finishes its samples are written as collapsed stacks
+("frame;frame;frame count" per line), the input format of flamegraph.pl,
+speedscope and inferno:
+
+    <PROFILING['DIR']>/<YYYYMMDD>/<view>-<HHMMSS>-<pid>-<id>.folded
+
+A request is profiled when it carries ``X-Profile: 1`` with a staff
+user's JWT, or by random selection at PROFILING['SAMPLE_RATE']. Overhead
+is bounded by the sampling interval, MAX_CONCURRENT profiled requests
+per process and MAX_DEPTH frames per stack; retention by MAX_FILES and
+RETENTION_HOURS. ``manage.py profile_aggregate`` merges the files.
+"""
+import logging
+import os
+import random
+import re
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+FOLDED_SUFFIX = '.folded'
+_UNSAFE_NAME = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class StackSampler:
+    """Samples the stacks of registered threads on a timer thread"""
+
+    def __init__(self, interval, max_depth):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._labels = {}
+        self._prefixes = sorted(
+            {str(Path(settings.BASE_DIR)) + os.sep}
+            | {path + os.sep for path in sysconfig.get_paths().values()},
+            key=len, reverse=True,
+        )
+
+    @property
+    def active(self):
+        return len(self._sessions)
+
+    def start(self, ident):
+        """Begin sampling thread ``ident``; returns the Counter its stacks go into"""
+        self._ensure_thread()
+        samples = Counter()
+        with self._lock:
+            self._sessions[ident] = samples
+        self._wakeup.set()
+        return samples
+
+    def stop(self, ident):
+        with self._lock:
+            return self._sessions.pop(ident, Counter())
+
+    def _ensure_thread(self):
+        # Threads do not survive fork: start one per (gunicorn worker) process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                sessions = list(self._sessions.items())
+                if not sessions:
+                    self._wakeup.clear()
+                    continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for ident, samples in sessions:
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[self._collapse(frame)] += 1
+            del frames
+
+    def _collapse(self, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        if frame is not None:
+            stack.append('[truncated]')
+        return ';'.join(reversed(stack))
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            for prefix in self._prefixes:
+                if filename.startswith(prefix):
+                    filename = filename[len(prefix):]
+                    break
+            label = self._labels[code] = f'{filename}:{code.co_qualname}'.replace(';', ':')
+        return label
+
+
+def write_profile(directory, view_name, samples):
+    """Write collapsed stacks for one request; returns the file path"""
+    now = time.gmtime()
+    day_dir = Path(directory) / time.strftime('%Y%m%d', now)
+    day_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{_UNSAFE_NAME.sub('_', view_name)}-{time.strftime('%H%M%S', now)}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    path = day_dir / (name + FOLDED_SUFFIX)
+    path.write_text(''.join(f'{stack} {count}\n' for stack, count in samples.most_common()))
+    return path
+
+
+def prune_profiles(directory, max_files, retention_hours):
+    """Delete profiles older than the retention window, then the oldest beyond max_files"""
+    cutoff = time.time() - retention_hours * 3600
+    files = []
+    for path in Path(directory).glob(f'*/*{FOLDED_SUFFIX}'):
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        if mtime < cutoff:
+            path.unlink(missing_ok=True)
+        else:
+            files.append((mtime, path))
+    files.sort()
+    for _, path in files[:max(0, len(files) - max_files)]:
+        path.unlink(missing_ok=True)
+    for day_dir in Path(directory).iterdir():
+        if day_dir.is_dir() and not any(day_dir.iterdir()):
+            day_dir.rmdir()
+
+
+class SamplingProfilerMiddleware:
+    """Profile requests asking for it (staff + X-Profile header) or a random fraction of all requests"""
+
+    def __init__(self, get_response):
+        config = settings.PROFILING
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config['SAMPLE_RATE']
+        self.max_concurrent = config['MAX_CONCURRENT']
+        self.directory = config['DIR']
+        self.max_files = config['MAX_FILES']
+        self.retention_hours = config['RETENTION_HOURS']
+        self.header = 'HTTP_' + config['HEADER'].upper().replace('-', '_')
+        self.sampler = StackSampler(config['INTERVAL'], config['MAX_DEPTH'])
+        self._pruned_at = 0.0
+
+    def __call__(self, request):
+        requested = request.META.get(self.header) == '1' and self._is_staff(request)
+        if not requested and (not self.sample_rate or random.random() >= self.sample_rate):
+            return self.get_response(request)
+        if self.sampler.active >= self.max_concurrent:
+            return self.get_response(request)
+
+        ident = threading.get_ident()
+        self.sampler.start(ident)
+        try:
+            response = self.get_response(request)
+        finally:
+            samples = self.sampler.stop(ident)
+
+        if samples:
+            match = request.resolver_match
+            try:
+                path = write_profile(self.directory, match.view_name if match else 'unmatched', samples)
+            except OSError:
+                logger.exception('Could not write request profile')
+            else:
+                if requested:
+                    response['X-Profile-File'] = path.name
+                self._maybe_prune()
+        return response
+
+    @staticmethod
+    def _is_staff(request):
+        # Runs before DRF, so authenticate the bearer token here (only when the header is present)
+        from apps.users.authentication import CachedJWTAuthentication
+        from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+        try:
+            result = CachedJWTAuthentication().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return False
+        return bool(result and result[0].is_staff)
+
+    def _maybe_prune(self):
+        now = time.monotonic()
+        if now - self._pruned_at < 60:
+            return
+        self._pruned_at = now
+        try:
+            prune_profiles(self.directory, self.max_files, self.retention_hours)
+        except OSError:
+            logger.exception('Could not prune request profiles')
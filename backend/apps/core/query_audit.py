@@ -0,0 +1,133 @@
+"""
+Helpers for ``manage.py audit_query_plans``: capture the SQL a request runs
+and turn EXPLAIN output into findings.
+
+On PostgreSQL each captured statement is run again under
+``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` inside a savepoint that is
+rolled back, so writes leave no trace. The plan tree is checked for:
+
+    seq_scan          a Seq Scan reading at least ``seq_scan_rows`` rows
+    index_candidate   a seq scan that filters away most of what it reads;
+                      the filtered columns are the likely missing index
+    estimate_error    a node whose actual rows differ from the planner's
+                      estimate by at least ``estimate_factor``x
+
+Other databases get ``EXPLAIN QUERY PLAN`` and report full-table scans only.
+"""
+import json
+import re
+import time
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+FILTER_COLUMN = re.compile(r'\(?"?(\w+)"?\)?(?:::\w+)?\)?\s*(?:=|~~\*?|<>|>=?|<=?|IS|ANY)')
+
+
+@dataclass
+class CapturedQuery:
+    sql: str
+    params: object
+    seconds: float
+
+
+@dataclass
+class QueryCapture:
+    """Execute wrapper recording every explainable statement with its wall time"""
+    queries: list = field(default_factory=list)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not many and sql.lstrip().upper().startswith(EXPLAINABLE):
+                self.queries.append(CapturedQuery(sql, params, time.perf_counter() - started))
+
+
+@dataclass
+class Thresholds:
+    seq_scan_rows: int = 1000
+    estimate_factor: float = 10.0
+    estimate_min_rows: int = 100
+    filter_ratio: float = 0.9
+
+
+def explain(connection, query):
+    """Run EXPLAIN for a captured query (rolled back); returns the plan (PostgreSQL JSON or SQLite rows)"""
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query.sql}', query.params)
+                plan = cursor.fetchone()[0]
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {query.sql}', query.params)
+                plan = cursor.fetchall()
+        transaction.set_rollback(True, using=connection.alias)
+    return plan
+
+
+def _walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _walk(child)
+
+
+def filter_columns(condition):
+    return sorted({match.group(1) for match in FILTER_COLUMN.finditer(condition or '')} - {'text', 'AND', 'OR'})
+
+
+def analyze_postgres_plan(plan, thresholds):
+    """Findings and timings from one EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) result"""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    top = plan[0]
+    root = top['Plan']
+    findings = []
+    for node in _walk(root):
+        loops = node.get('Actual Loops', 1) or 1
+        actual = node.get('Actual Rows', 0)
+        estimated = node.get('Plan Rows', 0)
+        relation = node.get('Relation Name')
+
+        if node['Node Type'] == 'Seq Scan':
+            removed = node.get('Rows Removed by Filter', 0)
+            scanned = (actual + removed) * loops
+            if scanned >= thresholds.seq_scan_rows:
+                findings.append({
+                    'kind': 'seq_scan', 'relation': relation, 'rows_scanned': scanned,
+                    'filter': node.get('Filter'),
+                })
+                if removed and removed / (actual + removed) >= thresholds.filter_ratio:
+                    findings.append({
+                        'kind': 'index_candidate', 'relation': relation,
+                        'columns': filter_columns(node.get('Filter')), 'filter': node.get('Filter'),
+                        'rows_removed': removed * loops,
+                    })
+
+        larger, smaller = max(actual, estimated), max(min(actual, estimated), 1)
+        if larger >= thresholds.estimate_min_rows and larger / smaller >= thresholds.estimate_factor:
+            findings.append({
+                'kind': 'estimate_error', 'node': node['Node Type'], 'relation': relation,
+                'estimated_rows': estimated, 'actual_rows': actual, 'factor': round(larger / smaller, 1),
+            })
+
+    return {
+        'execution_ms': top.get('Execution Time'),
+        'planning_ms': top.get('Planning Time'),
+        'shared_hit': root.get('Shared Hit Blocks', 0),
+        'shared_read': root.get('Shared Read Blocks', 0),
+        'findings': findings,
+    }
+
+
+def analyze_sqlite_plan(rows, thresholds):
+    """Full-table scans from EXPLAIN QUERY PLAN rows (id, parent, notused, detail)"""
+    findings = []
+    for row in rows:
+        detail = row[-1]
+        match = re.match(r'SCAN (?:TABLE )?"?(\w+)"?', detail)
+        if match and 'USING' not in detail:
+            findings.append({'kind': 'seq_scan', 'relation': match.group(1), 'rows_scanned': None, 'filter': None})
+    return {'execution_ms': None, 'planning_ms': None, 'shared_hit': None, 'shared_read': None, 'findings': findings}
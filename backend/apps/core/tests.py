@@ -0,0 +1,367 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.core import cache as core_cache
+from apps.core.cache import LocalTier, get_or_compute
+from apps.core.db_routing import PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from apps.core.idempotency import IdempotencyMiddleware
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'apps.core.cache.TieredCache',
+        'LOCATION': 'test-tiered',
+        'OPTIONS': {'L2': 'shared', 'L1_TIMEOUT': 60},
+    },
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-shared'},
+    'state': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-state'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.shared = caches['shared']
+        self.cache.clear()
+        self.cache.stats.reset()
+
+    def test_set_serves_later_reads_from_l1(self):
+        self.cache.set('k', 'v')
+        self.assertEqual(self.cache.get('k'), 'v')
+        self.assertEqual(self.cache.stats.l1_hits, 1)
+        self.assertEqual(self.cache.stats.l2_hits, 0)
+
+    def test_l2_hit_fills_l1(self):
+        self.shared.set('k', 'v')
+        self.assertEqual(self.cache.get('k'), 'v')
+        self.assertEqual(self.cache.get('k'), 'v')
+        self.assertEqual((self.cache.stats.l2_hits, self.cache.stats.l1_hits), (1, 1))
+
+    def test_miss_returns_default(self):
+        self.assertEqual(self.cache.get('missing', 'fallback'), 'fallback')
+        self.assertEqual(self.cache.stats.misses, 1)
+
+    def test_delete_invalidates_both_tiers(self):
+        self.cache.set('k', 'v')
+        self.cache.delete('k')
+        self.assertIsNone(self.cache.get('k'))
+        self.assertIsNone(self.shared.get('k'))
+
+    def test_incr_drops_the_l1_copy(self):
+        self.cache.set('n', 1)
+        self.assertEqual(self.cache.incr('n'), 2)
+        self.assertEqual(self.cache.get('n'), 2)
+
+    def test_set_many_and_delete_many_invalidate_l1(self):
+        self.cache.set('a', 1)
+        self.cache.set_many({'a': 2})
+        self.assertEqual(self.cache.get('a'), 2)
+        self.cache.delete_many(['a'])
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_non_positive_timeout_removes_l1_copy(self):
+        self.cache.set('k', 'v')
+        self.cache.set('k', 'v2', 0)
+        self.assertIsNone(self.cache.get('k'))
+
+    def test_l1_lifetime_is_capped_by_the_entry_timeout(self):
+        with mock.patch('apps.core.cache.time.monotonic', return_value=1000.0):
+            self.cache.set('k', 'v', 2)
+        # Another process overwrote the value in L2
+        self.shared.set('k', 'v2')
+        with mock.patch('apps.core.cache.time.monotonic', return_value=1001.0):
+            self.assertEqual(self.cache.get('k'), 'v')
+        with mock.patch('apps.core.cache.time.monotonic', return_value=1003.0):
+            self.assertEqual(self.cache.get('k'), 'v2')
+
+    def test_l1_returns_copies(self):
+        self.cache.set('k', {'a': 1})
+        self.cache.get('k')['a'] = 2
+        self.assertEqual(self.cache.get('k'), {'a': 1})
+
+
+class LocalTierTests(SimpleTestCase):
+    def test_lru_evicts_least_recently_used(self):
+        tier = LocalTier(max_entries=2, policy='lru')
+        tier.set('a', 1, 60)
+        tier.set('b', 2, 60)
+        tier.get('a')
+        tier.set('c', 3, 60)
+        self.assertEqual(tier.get('b'), (False, None))
+        self.assertEqual(tier.get('a'), (True, 1))
+
+    def test_lfu_evicts_least_frequently_used(self):
+        tier = LocalTier(max_entries=2, policy='lfu')
+        tier.set('a', 1, 60)
+        tier.set('b', 2, 60)
+        tier.get('a')
+        tier.set('c', 3, 60)
+        self.assertEqual(tier.get('b'), (False, None))
+        self.assertEqual(tier.get('a'), (True, 1))
+
+    def test_unknown_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            LocalTier(policy='fifo')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+        self.cache.stats.reset()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_computes_once_then_serves_cached_value(self):
+        self.assertEqual(get_or_compute('k', self.compute), 1)
+        self.assertEqual(get_or_compute('k', self.compute), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_releases_its_own_lock(self):
+        get_or_compute('k', self.compute)
+        self.assertIsNone(self.cache.get('k:lock'))
+
+    def test_serves_previous_value_while_another_process_holds_the_lock(self):
+        get_or_compute('k', self.compute, timeout=60)
+        self.cache.add('k:lock', 1, 30)
+        with mock.patch('apps.core.cache._should_recompute_early', return_value=True):
+            self.assertEqual(get_or_compute('k', self.compute), 1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.get('k:lock'), 1)
+
+    def test_waiter_does_not_release_the_holders_lock(self):
+        self.cache.add('k:lock', 1, 30)
+        self.assertEqual(get_or_compute('k', self.compute, lock_timeout=0.1), 1)
+        self.assertEqual(self.cache.stats.lock_waits, 1)
+        self.assertEqual(self.cache.get('k:lock'), 1)
+
+    def test_waiter_returns_value_stored_by_the_lock_holder(self):
+        self.cache.add('k:lock', 1, 30)
+
+        def holder_finishes(seconds):
+            self.cache.set('k', {'value': 'theirs', 'delta': 0, 'expires_at': None})
+
+        with mock.patch('apps.core.cache.time.sleep', side_effect=holder_finishes):
+            self.assertEqual(get_or_compute('k', self.compute), 'theirs')
+        self.assertEqual(self.calls, 0)
+
+    def test_early_recompute_refreshes_value(self):
+        get_or_compute('k', self.compute, timeout=60)
+        with mock.patch('apps.core.cache._should_recompute_early', return_value=True):
+            self.assertEqual(get_or_compute('k', self.compute, timeout=60), 2)
+        self.assertEqual(self.cache.stats.early_recomputes, 1)
+
+
+class XFetchTests(SimpleTestCase):
+    def envelope(self, expires_in, delta=1.0):
+        return {'value': 'v', 'delta': delta, 'expires_at': 1000.0 + expires_in}
+
+    def should_recompute(self, envelope, draw, beta=1.0):
+        with mock.patch('apps.core.cache.time.time', return_value=1000.0), \
+                mock.patch('apps.core.cache.random.random', return_value=draw):
+            return core_cache._should_recompute_early(envelope, beta)
+
+    def test_never_for_entries_without_expiry(self):
+        self.assertFalse(self.should_recompute({'value': 'v', 'delta': 1.0, 'expires_at': None}, 1e-9))
+
+    def test_far_from_expiry_is_not_recomputed(self):
+        # -log(0.5) * 1s ~= 0.7s of jitter against 60s left
+        self.assertFalse(self.should_recompute(self.envelope(60), 0.5))
+
+    def test_close_to_expiry_is_recomputed(self):
+        self.assertTrue(self.should_recompute(self.envelope(0.5), 0.5))
+
+    def test_slow_computations_start_earlier(self):
+        self.assertFalse(self.should_recompute(self.envelope(5, delta=1.0), 0.5))
+        self.assertTrue(self.should_recompute(self.envelope(5, delta=10.0), 0.5))
+
+    def test_beta_scales_the_window(self):
+        self.assertFalse(self.should_recompute(self.envelope(5), 0.5, beta=1.0))
+        self.assertTrue(self.should_recompute(self.envelope(5), 0.5, beta=10.0))
+
+
+TEST_IDEMPOTENCY = {
+    'ENABLED': True,
+    'HEADER': 'Idempotency-Key',
+    'PATH_PREFIX': '/api/',
+    'CACHE_ALIAS': 'state',
+    'TTL': 60,
+    'LOCK_TIMEOUT': 30,
+    'WAIT_SECONDS': 0.1,
+    'MAX_BODY_BYTES': 1024,
+}
+
+
+@override_settings(CACHES=TEST_CACHES, IDEMPOTENCY=TEST_IDEMPOTENCY)
+class IdempotencyMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        caches['state'].clear()
+        self.factory = RequestFactory()
+        self.calls = 0
+        self.status = 201
+        self.middleware = IdempotencyMiddleware(self.view)
+
+    def view(self, request):
+        self.calls += 1
+        return JsonResponse({'call': self.calls}, status=self.status)
+
+    def post(self, body='{"a": 1}', key='key-1', path='/api/users/', **extra):
+        if key is not None:
+            extra['HTTP_IDEMPOTENCY_KEY'] = key
+        request = self.factory.post(path, body, content_type='application/json', **extra)
+        return self.middleware(request)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post()
+        second = self.post()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertFalse(first.has_header('Idempotent-Replayed'))
+
+    def test_different_body_with_same_key_is_rejected(self):
+        self.post()
+        response = self.post(body='{"a": 2}')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    def test_keys_are_scoped_to_credentials_and_path(self):
+        self.post(HTTP_AUTHORIZATION='Bearer one')
+        self.post(HTTP_AUTHORIZATION='Bearer two')
+        self.post(path='/api/groups/', HTTP_AUTHORIZATION='Bearer one')
+        self.assertEqual(self.calls, 3)
+
+    def test_concurrent_duplicate_gets_409_while_first_is_running(self):
+        duplicates = []
+
+        def view(request):
+            # The retry arrives while this request still holds the lock
+            duplicates.append(middleware(self.factory.post(
+                '/api/users/', '{"a": 1}', content_type='application/json', HTTP_IDEMPOTENCY_KEY='key-1',
+            )))
+            return JsonResponse({}, status=201)
+
+        middleware = IdempotencyMiddleware(view)
+        self.assertEqual(middleware(self.factory.post(
+            '/api/users/', '{"a": 1}', content_type='application/json', HTTP_IDEMPOTENCY_KEY='key-1',
+        )).status_code, 201)
+        self.assertEqual(duplicates[0].status_code, 409)
+        self.assertEqual(duplicates[0]['Retry-After'], '1')
+
+    def test_stored_client_errors_are_replayed(self):
+        self.status = 400
+        self.post()
+        self.assertEqual(self.post().status_code, 400)
+        self.assertEqual(self.calls, 1)
+
+    def test_transient_failures_are_not_stored(self):
+        for status in (401, 403, 409, 429, 500, 503):
+            with self.subTest(status=status):
+                self.status = status
+                self.calls = 0
+                self.post(key=f'key-{status}')
+                self.post(key=f'key-{status}')
+                self.assertEqual(self.calls, 2)
+
+    def test_oversized_bodies_are_not_stored(self):
+        self.post(key='big')
+        with self.settings(IDEMPOTENCY={**TEST_IDEMPOTENCY, 'MAX_BODY_BYTES': 5}):
+            self.middleware = IdempotencyMiddleware(self.view)
+        self.post(key='small-limit')
+        self.post(key='small-limit')
+        self.assertEqual(self.calls, 3)
+
+    def test_requests_without_key_safe_methods_and_other_paths_pass_through(self):
+        self.post(key=None)
+        self.post(key=None)
+        self.post(path='/admin/login/')
+        self.post(path='/admin/login/')
+        self.middleware(self.factory.get('/api/users/', HTTP_IDEMPOTENCY_KEY='key-1'))
+        self.middleware(self.factory.get('/api/users/', HTTP_IDEMPOTENCY_KEY='key-1'))
+        self.assertEqual(self.calls, 6)
+
+    def test_invalid_key_is_rejected(self):
+        self.assertEqual(self.post(key='x' * 256).status_code, 400)
+        self.assertEqual(self.post(key='bad\nkey').status_code, 400)
+        self.assertEqual(self.calls, 0)
+
+    @override_settings(IDEMPOTENCY={**TEST_IDEMPOTENCY, 'ENABLED': False})
+    def test_disabled_middleware_is_not_used(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            IdempotencyMiddleware(self.view)
+
+
+@mock.patch('apps.core.db_routing.replica_alias', return_value='replica')
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        self.reads = []
+
+    def run_request(self, request, write=False):
+        def view(request):
+            self.reads.append(self.router.db_for_read(None))
+            if write:
+                self.router.db_for_write(None)
+                self.reads.append(self.router.db_for_read(None))
+            return HttpResponse()
+
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_safe_request_reads_from_replica_without_pinning(self, _):
+        response = self.run_request(self.factory.get('/api/users/'))
+        self.assertEqual(self.reads, ['replica'])
+        self.assertFalse(response.has_header('X-DB-Pin-Until'))
+        self.assertNotIn('db_pin', response.cookies)
+
+    def test_write_switches_remaining_reads_to_primary_and_pins(self, _):
+        with mock.patch('apps.core.db_routing.time.time', return_value=1000.0):
+            response = self.run_request(self.factory.get('/api/users/'), write=True)
+        until = str(1000 + settings.DB_REPLICA['PIN_SECONDS'])
+        self.assertEqual(self.reads, ['replica', 'default'])
+        self.assertEqual(response['X-DB-Pin-Until'], until)
+        self.assertEqual(response.cookies['db_pin'].value, until)
+
+    def test_unsafe_method_reads_primary_and_pins(self, _):
+        response = self.run_request(self.factory.post('/api/users/'))
+        self.assertEqual(self.reads, ['default'])
+        self.assertTrue(response.has_header('X-DB-Pin-Until'))
+
+    def test_pinned_client_reads_primary(self, _):
+        until = '2000'
+        with mock.patch('apps.core.db_routing.time.time', return_value=1000.0):
+            request = self.factory.get('/api/users/')
+            request.COOKIES['db_pin'] = until
+            self.run_request(request)
+            self.run_request(self.factory.get('/api/users/', HTTP_X_DB_PIN_UNTIL=until))
+        self.assertEqual(self.reads, ['default', 'default'])
+
+    def test_expired_or_malformed_pin_is_ignored(self, _):
+        with mock.patch('apps.core.db_routing.time.time', return_value=1000.0):
+            self.run_request(self.factory.get('/api/users/', HTTP_X_DB_PIN_UNTIL='999'))
+            self.run_request(self.factory.get('/api/users/', HTTP_X_DB_PIN_UNTIL='soon'))
+        self.assertEqual(self.reads, ['replica', 'replica'])
+
+    def test_code_outside_requests_uses_primary(self, _):
+        self.assertEqual(self.router.db_for_read(None), 'default')
+        self.assertEqual(self.router.db_for_write(None), 'default')
+
+    def test_replica_never_migrates(self, _):
+        self.assertIs(self.router.allow_migrate('replica', 'users'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'users'))
+
+    def test_middleware_is_unused_without_replica(self, replica_alias):
+        replica_alias.return_value = None
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(lambda request: HttpResponse())
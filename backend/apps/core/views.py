@@ -0,0 +1,64 @@
+"""
+Plain Django views shared across the project
+"""
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_safe
+
+from .compression import negotiate_encoding
+from .openapi import get_artifact
+
+
+def healthz(request):
+    """
+    Liveness probe for container healthchecks.
+    Answers without touching the database or the DRF stack.
+    """
+    return JsonResponse({'status': 'ok'})
+
+
+@require_safe
+def openapi_schema(request):
+    """
+    Serve the prebuilt OpenAPI schema (see apps.core.openapi).
+
+    Precompressed variants are picked by Accept-Encoding; the ETag is weak
+    because each encoding is a different byte sequence of the same schema.
+    """
+    artifact = get_artifact()
+    etag = 'W/' + artifact.etag
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), artifact.encodings)
+        response = HttpResponse(
+            artifact.variants[encoding or 'identity'],
+            content_type='application/vnd.oai.openapi+json',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """
+    Return a view that imports ``dotted_path`` (a class-based view) and
+    builds it with ``as_view(**initkwargs)`` on its first request, keeping
+    rarely used components out of worker startup.
+    """
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    # DRF views are CSRF-exempt; the middleware only sees this wrapper
+    wrapper.csrf_exempt = True
+    wrapper.__name__ = dotted_path.rsplit('.', 1)[-1]
+    return wrapper
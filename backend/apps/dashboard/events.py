@@ -0,0 +1,48 @@
+"""
+Change events pushed to dashboard event streams.
+
+On PostgreSQL an event is a ``NOTIFY`` on DASHBOARD_EVENTS['CHANNEL'],
+issued in the writer's transaction: it is delivered only if that commits,
+and identical payloads from one transaction collapse into one. Every ASGI
+process holds a single LISTEN connection (``stream.change_feed``) and
+fans events out to its open streams. Other databases deliver the event to
+this process's feed after commit, which is enough for local development.
+
+Payloads stay well under the 8000 byte NOTIFY limit by chunking id lists.
+"""
+import json
+
+from django.conf import settings
+from django.db import connections, transaction
+
+ID_CHUNK = 500
+
+
+def publish(event, using='default'):
+    payload = json.dumps(event, separators=(',', ':'))
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [settings.DASHBOARD_EVENTS['CHANNEL'], payload])
+        return
+
+    from .stream import change_feed
+    transaction.on_commit(lambda: change_feed.deliver_threadsafe(payload), using=using)
+
+
+def stats_changed(delta, organization_id=None, using='default'):
+    """
+    Publish additive changes to the dashboard_stats totals, e.g. {'total_users': 1},
+    for users of ``organization_id`` (None: platform accounts)
+    """
+    delta = {key: value for key, value in delta.items() if value}
+    if delta:
+        publish({'type': 'stats', 'organization': organization_id, 'delta': delta}, using)
+
+
+def permissions_changed(user_ids=(), group_ids=(), using='default'):
+    """Tell the affected users' streams their effective permissions changed"""
+    for key, ids in (('users', user_ids), ('groups', group_ids)):
+        ids = sorted(set(ids))
+        for start in range(0, len(ids), ID_CHUNK):
+            publish({'type': 'permissions', key: ids[start:start + ID_CHUNK]}, using)
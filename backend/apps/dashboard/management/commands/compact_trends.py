@@ -0,0 +1,25 @@
+"""
+Compact dashboard trend rollups; schedule daily:
+
+    python manage.py compact_trends
+    python manage.py compact_trends --backfill-signups   # rebuild signups from users.date_joined
+"""
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.rollups import backfill_signups, compact_trends
+
+
+class Command(BaseCommand):
+    help = 'Fold hourly trend buckets past retention into daily buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--backfill-signups', action='store_true',
+                            help='Recompute the signups series from users.date_joined first')
+
+    def handle(self, *args, **options):
+        if options['backfill_signups']:
+            backfill_signups(using=options['database'])
+            self.stdout.write('Rebuilt the signups series')
+        folded = compact_trends(using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f'Compacted {folded} hourly buckets'))
@@ -0,0 +1,64 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyTrend",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("metric", models.CharField(max_length=32)),
+                ("bucket", models.DateTimeField()),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "trend_daily",
+            },
+        ),
+        migrations.CreateModel(
+            name="HourlyTrend",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("metric", models.CharField(max_length=32)),
+                ("bucket", models.DateTimeField()),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "trend_hourly",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailytrend",
+            constraint=models.UniqueConstraint(
+                fields=("metric", "bucket"), name="trend_daily_metric_bucket_uniq"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="hourlytrend",
+            constraint=models.UniqueConstraint(
+                fields=("metric", "bucket"), name="trend_hourly_metric_bucket_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class TrendBucket(models.Model):
+    """Event count for one metric in one UTC time bucket"""
+    metric = models.CharField(max_length=32)
+    bucket = models.DateTimeField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class HourlyTrend(TrendBucket):
+    """Recent per-hour counts, written as events happen and folded into DailyTrend by compaction"""
+
+    class Meta:
+        db_table = 'trend_hourly'
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'bucket'], name='trend_hourly_metric_bucket_uniq'),
+        ]
+
+
+class DailyTrend(TrendBucket):
+    """Per-day counts for hours older than DASHBOARD_TRENDS['HOURLY_RETENTION_DAYS']"""
+
+    class Meta:
+        db_table = 'trend_daily'
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'bucket'], name='trend_daily_metric_bucket_uniq'),
+        ]
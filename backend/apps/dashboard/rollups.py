@@ -0,0 +1,138 @@
+"""
+Time-bucketed rollups behind the dashboard trend charts.
+
+User lifecycle events (signups, activations, deactivations) add to an
+hourly bucket when their transaction commits, one upsert each:
+
+    INSERT INTO trend_hourly (metric, bucket, count) VALUES (...)
+    ON CONFLICT (metric, bucket) DO UPDATE SET count = trend_hourly.count + EXCLUDED.count
+
+``compact_trends`` (run periodically via ``manage.py compact_trends``)
+moves whole UTC days of hourly buckets older than
+DASHBOARD_TRENDS['HOURLY_RETENTION_DAYS'] into trend_daily. It claims the
+rows with ``DELETE ... RETURNING``, so overlapping runs cannot fold the
+same hour twice. Daily series read trend_daily plus whatever hourly buckets
+have not been compacted yet; charts never aggregate the users table.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import DailyTrend, HourlyTrend
+
+METRICS = ('signups', 'activations', 'deactivations')
+INTERVALS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+
+
+def floor_bucket(moment, interval):
+    """Start of the UTC bucket containing ``moment``"""
+    moment = moment.astimezone(dt_timezone.utc)
+    if interval == 'day':
+        return datetime.combine(moment.date(), time.min, tzinfo=dt_timezone.utc)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def add_counts(model, rows, using='default'):
+    """Add [(metric, bucket, count), ...] to ``model``'s buckets with one upsert"""
+    if not rows:
+        return
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['(%s, %s, %s)'] * len(rows))
+    params = []
+    for metric, bucket, count in rows:
+        params += [metric, connection.ops.adapt_datetimefield_value(bucket), count]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (metric, bucket, count) VALUES {placeholders} '
+            f'ON CONFLICT (metric, bucket) DO UPDATE SET count = {table}.count + EXCLUDED.count',
+            params,
+        )
+
+
+def record_event(metric, moment=None, using='default'):
+    """Count one ``metric`` event in its hourly bucket once the current transaction commits"""
+    bucket = floor_bucket(moment or timezone.now(), 'hour')
+    transaction.on_commit(lambda: add_counts(HourlyTrend, [(metric, bucket, 1)], using), using=using)
+
+
+def compaction_cutoff(now=None):
+    retention = timedelta(days=settings.DASHBOARD_TRENDS['HOURLY_RETENTION_DAYS'])
+    return floor_bucket((now or timezone.now()) - retention, 'day')
+
+
+def compact_trends(now=None, using='default'):
+    """Fold hourly buckets before the retention cutoff into daily ones; returns the hourly rows folded"""
+    connection = connections[using]
+    table = connection.ops.quote_name(HourlyTrend._meta.db_table)
+    cutoff = compaction_cutoff(now)
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE bucket < %s RETURNING metric, bucket, count',
+                [connection.ops.adapt_datetimefield_value(cutoff)],
+            )
+            claimed = cursor.fetchall()
+        daily = defaultdict(int)
+        for metric, bucket, count in claimed:
+            if isinstance(bucket, str):
+                bucket = datetime.fromisoformat(bucket)
+            if timezone.is_naive(bucket):
+                bucket = timezone.make_aware(bucket, dt_timezone.utc)
+            daily[metric, floor_bucket(bucket, 'day')] += count
+        add_counts(DailyTrend, [(metric, day, count) for (metric, day), count in sorted(daily.items())], using)
+    return len(claimed)
+
+
+def backfill_signups(using='default'):
+    """Rebuild the signups series from users.date_joined (activations have no history to rebuild from)"""
+    User = get_user_model()
+    hours = (
+        User.objects.using(using)
+        .annotate(hour=TruncHour('date_joined', tzinfo=dt_timezone.utc))
+        .values('hour')
+        .annotate(total=Count('id'))
+        .order_by('hour')
+    )
+    with transaction.atomic(using=using):
+        HourlyTrend.objects.using(using).filter(metric='signups').delete()
+        DailyTrend.objects.using(using).filter(metric='signups').delete()
+        add_counts(HourlyTrend, [('signups', row['hour'], row['total']) for row in hours], using)
+        compact_trends(using=using)
+
+
+def read_series(metrics, interval, start, end, using=None):
+    """
+    Dense, zero-filled columns for ``metrics`` over [start, end):
+    (bucket starts, {metric: [count per bucket]}).
+    """
+    step = INTERVALS[interval]
+    start = floor_bucket(start, interval)
+    buckets = []
+    moment = start
+    while moment < end:
+        buckets.append(moment)
+        moment += step
+    index = {bucket: position for position, bucket in enumerate(buckets)}
+    columns = {metric: [0] * len(buckets) for metric in metrics}
+
+    sources = [HourlyTrend]
+    if interval == 'day':
+        sources.insert(0, DailyTrend)
+    for model in sources:
+        rows = (
+            model.objects.using(using)
+            .filter(metric__in=metrics, bucket__gte=start, bucket__lt=end)
+            .values_list('metric', 'bucket', 'count')
+        )
+        for metric, bucket, count in rows:
+            position = index.get(floor_bucket(bucket, interval))
+            if position is not None:
+                columns[metric][position] += count
+    return buckets, columns
@@ -0,0 +1,97 @@
+"""
+Feed user lifecycle events into the trend rollups and the dashboard event streams.
+
+``User.from_db`` remembers the ``is_active`` and ``is_deleted`` values a row
+was loaded with, so a save only counts as an activation, deactivation or
+soft delete when it flips them. Soft-deleted users are not in the totals.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from .events import permissions_changed, stats_changed
+from .rollups import record_event
+
+User = get_user_model()
+
+
+def _counted(is_active, is_deleted):
+    """What one user row adds to the dashboard_stats totals"""
+    if is_deleted:
+        return {'total_users': 0, 'active_users': 0}
+    return {'total_users': 1, 'active_users': int(is_active)}
+
+
+def user_saved(sender, instance, created, using, **kwargs):
+    if created:
+        record_event('signups', instance.date_joined, using=using)
+        stats_changed(_counted(instance.is_active, instance.is_deleted), instance.organization_id, using)
+    else:
+        previous = getattr(instance, '_loaded_is_active', None)
+        if previous is None:
+            return
+        was_deleted = getattr(instance, '_loaded_is_deleted', None)
+        if was_deleted is None:
+            was_deleted = instance.is_deleted
+        if previous != instance.is_active:
+            record_event('activations' if instance.is_active else 'deactivations', using=using)
+        before, after = _counted(previous, was_deleted), _counted(instance.is_active, instance.is_deleted)
+        stats_changed({key: after[key] - before[key] for key in after}, instance.organization_id, using)
+    instance._loaded_is_active = instance.is_active
+    instance._loaded_is_deleted = instance.is_deleted
+
+
+def user_deleted(sender, instance, using, **kwargs):
+    counted = _counted(instance.is_active, instance.is_deleted)
+    stats_changed({key: -value for key, value in counted.items()}, instance.organization_id, using)
+
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        permissions_changed(user_ids=[instance.pk], using=using)
+    elif action == 'pre_clear':
+        permissions_changed(user_ids=instance.user_set.values_list('pk', flat=True), using=using)
+    else:
+        permissions_changed(user_ids=pk_set, using=using)
+
+
+def user_permissions_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        permissions_changed(user_ids=[instance.pk], using=using)
+    elif action == 'pre_clear':
+        permissions_changed(user_ids=instance.user_set.values_list('pk', flat=True), using=using)
+    else:
+        permissions_changed(user_ids=pk_set, using=using)
+
+
+def group_permissions_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        permissions_changed(group_ids=[instance.pk], using=using)
+    elif action == 'pre_clear':
+        permissions_changed(group_ids=instance.group_set.values_list('pk', flat=True), using=using)
+    else:
+        permissions_changed(group_ids=pk_set, using=using)
+
+
+def group_deleting(sender, instance, using, **kwargs):
+    # Memberships are gone by the time the event is read, so name the members now
+    permissions_changed(user_ids=instance.user_set.values_list('pk', flat=True), using=using)
+
+
+def connect_signals():
+    post_save.connect(user_saved, sender=User, dispatch_uid='dashboard.user_saved')
+    post_delete.connect(user_deleted, sender=User, dispatch_uid='dashboard.user_deleted')
+    m2m_changed.connect(user_groups_changed, sender=User.groups.through, dispatch_uid='dashboard.user_groups_changed')
+    m2m_changed.connect(
+        user_permissions_changed, sender=User.user_permissions.through, dispatch_uid='dashboard.user_permissions_changed'
+    )
+    m2m_changed.connect(
+        group_permissions_changed, sender=Group.permissions.through, dispatch_uid='dashboard.group_permissions_changed'
+    )
+    pre_delete.connect(group_deleting, sender=Group, dispatch_uid='dashboard.group_deleting')
@@ -0,0 +1,225 @@
+"""
+Server-Sent Events for the dashboard, served by the ASGI application.
+
+Each process has one ``ChangeFeed``. On PostgreSQL it LISTENs on one
+dedicated connection, registered with the event loop's selector, so no
+thread or poll is spent per client. Incoming events are coalesced for
+DASHBOARD_EVENTS['COALESCE_SECONDS'] and then pushed to the streams that
+care:
+
+    event: stats          {"total_users": 10, "active_users": 9}    sent on connect
+    event: stats_delta    {"total_users": 1, "active_users": 1}    changes in the user's organization
+    event: permissions    {}                                         only to affected users
+    event: reset          {}                                         events may have been lost; refetch
+
+An idle stream costs one coroutine and one small queue, with a comment
+line every HEARTBEAT seconds to keep proxies from closing it.
+"""
+import asyncio
+import json
+import logging
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+class Subscription:
+    __slots__ = ('user_id', 'organization_id', 'queue')
+
+    def __init__(self, user_id, organization_id, size):
+        self.user_id = user_id
+        # None for platform accounts, which see every organization's changes
+        self.organization_id = organization_id
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow client: replace the backlog with one reset instead of buffering without bound
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(format_event('reset', {}))
+
+
+def _connected_members(group_ids, user_ids):
+    from django.contrib.auth import get_user_model
+
+    membership = get_user_model().groups.through.objects
+    return set(
+        membership.filter(group_id__in=group_ids, user_id__in=user_ids)
+        .values_list('user_id', flat=True)
+    )
+
+
+class ChangeFeed:
+    """Per-process fan-out of change events to open event streams"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._count = 0
+        self._loop = None
+        self._listener = None
+        # Organization id (None: platform accounts) -> pending stats delta
+        self._stats = defaultdict(Counter)
+        self._users = set()
+        self._groups = set()
+        self._flush_scheduled = False
+
+    @property
+    def full(self):
+        return self._count >= settings.DASHBOARD_EVENTS['MAX_CONNECTIONS']
+
+    def subscribe(self, user_id, organization_id=None):
+        self._start()
+        subscription = Subscription(user_id, organization_id, settings.DASHBOARD_EVENTS['QUEUE_SIZE'])
+        self._subscribers[user_id].add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        streams = self._subscribers.get(subscription.user_id)
+        if streams and subscription in streams:
+            streams.discard(subscription)
+            self._count -= 1
+            if not streams:
+                del self._subscribers[subscription.user_id]
+
+    def deliver(self, payload):
+        """Accept one published event (called on the event loop)"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning('Ignoring malformed dashboard event %r', payload[:200])
+            return
+        if event.get('type') == 'stats':
+            self._stats[event.get('organization')].update(event.get('delta', {}))
+        elif event.get('type') == 'permissions':
+            self._users.update(event.get('users', ()))
+            self._groups.update(event.get('groups', ()))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_later(settings.DASHBOARD_EVENTS['COALESCE_SECONDS'], self._schedule_flush)
+
+    def deliver_threadsafe(self, payload):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.deliver, payload)
+
+    def broadcast(self, message):
+        for streams in self._subscribers.values():
+            for subscription in streams:
+                subscription.offer(message)
+
+    def _broadcast_stats(self, stats):
+        """Send each stream the delta of its organization; platform accounts get the sum"""
+        totals = Counter()
+        for delta in stats.values():
+            totals.update(delta)
+        messages = {}
+        for organization_id, delta in stats.items():
+            messages[organization_id] = {key: value for key, value in delta.items() if value}
+        messages[None] = {key: value for key, value in totals.items() if value}
+        messages = {key: format_event('stats_delta', delta) for key, delta in messages.items() if delta}
+        for streams in self._subscribers.values():
+            for subscription in streams:
+                message = messages.get(subscription.organization_id)
+                if message is not None:
+                    subscription.offer(message)
+
+    def _schedule_flush(self):
+        self._loop.create_task(self._flush())
+
+    async def _flush(self):
+        self._flush_scheduled = False
+        stats, users, groups = self._stats, self._users, self._groups
+        self._stats, self._users, self._groups = defaultdict(Counter), set(), set()
+
+        if stats:
+            self._broadcast_stats(stats)
+        connected = set(self._subscribers)
+        users &= connected
+        if groups and connected - users:
+            try:
+                users |= await sync_to_async(_connected_members)(groups, connected - users)
+            except Exception:
+                logger.exception('Could not resolve group members for dashboard event')
+        message = format_event('permissions', {})
+        for user_id in users:
+            for subscription in self._subscribers.get(user_id, ()):
+                subscription.offer(message)
+
+    def _start(self):
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.get_running_loop()
+            self._listener = None
+        if self._listener is None and connections['default'].vendor == 'postgresql':
+            self._listener = self._loop.create_task(self._listen())
+
+    async def _listen(self):
+        delay = 1
+        reconnecting = False
+        while True:
+            connection = None
+            try:
+                connection = await self._loop.run_in_executor(None, self._connect)
+                if reconnecting:
+                    self.broadcast(format_event('reset', {}))
+                delay = 1
+                readable = asyncio.Event()
+                self._loop.add_reader(connection.fileno(), readable.set)
+                try:
+                    while True:
+                        await readable.wait()
+                        readable.clear()
+                        connection.poll()
+                        while connection.notifies:
+                            self.deliver(connection.notifies.pop(0).payload)
+                finally:
+                    self._loop.remove_reader(connection.fileno())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Dashboard change feed lost its connection; retrying in %ss', delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                if connection is not None:
+                    connection.close()
+            reconnecting = True
+
+    @staticmethod
+    def _connect():
+        wrapper = connections.create_connection('default')
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {wrapper.ops.quote_name(settings.DASHBOARD_EVENTS["CHANNEL"])}')
+        return connection
+
+
+change_feed = ChangeFeed()
+
+
+async def event_stream(user_id, organization_id, snapshot):
+    """Async body of one stream: the stats snapshot, then events and heartbeats until disconnect"""
+    config = settings.DASHBOARD_EVENTS
+    subscription = change_feed.subscribe(user_id, organization_id)
+    try:
+        yield f'retry: {config["RETRY_MS"]}\n' + format_event('stats', snapshot)
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), config['HEARTBEAT'])
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield message
+    finally:
+        change_feed.unsubscribe(subscription)
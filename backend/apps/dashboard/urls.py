@@ -10,4 +10,6 @@ urlpatterns = [
     # Dashboard endpoints
     path('stats/', views.dashboard_stats, name='stats'),
     path('overview/', views.dashboard_overview, name='overview'),
+    path('trends/', views.dashboard_trends, name='trends'),
+    path('events/', views.dashboard_events, name='events'),
 ]
@@ -1,9 +1,34 @@
 # Dashboard views for the forewarn-ibf-portal backend
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import permission_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from apps.core.responses import APIResponse
+from apps.audit.query import recent_events
+from apps.users.tenancy import scope_users, tenant_of
+from .rollups import INTERVALS, METRICS, floor_bucket, read_series
+from .stream import change_feed, event_stream
+
+DEFAULT_SPAN = {'hour': timedelta(hours=48), 'day': timedelta(days=30)}
+
+
+def user_totals(user):
+    """User counts shown to ``user`` on the dashboard; kept current on event streams by stats_delta events"""
+    return scope_users(get_user_model().objects.filter(is_deleted=False), user).aggregate(
+        total_users=Count('id'),
+        active_users=Count('id', filter=Q(is_active=True)),
+    )
 
 
 @api_view(['GET'])
@@ -12,11 +37,16 @@ def dashboard_stats(request):
     """
     Get dashboard statistics
     """
-    # Placeholder for dashboard statistics
+    recent_activities = []
+    if request.user.has_perm('audit.view_auditevent'):
+        recent_activities = [
+            event.as_dict() for event in recent_events(organization_id=tenant_of(request.user))
+        ]
+
     stats = {
-        'total_users': 0,
+        **user_totals(request.user),
         'active_alerts': 0,
-        'recent_activities': [],
+        'recent_activities': recent_activities,
         'system_status': 'operational'
     }
     
@@ -49,3 +79,111 @@ def dashboard_overview(request):
         data=overview, 
         message='Dashboard overview retrieved successfully'
     )
+
+
+def _parse_moment(value):
+    """ISO datetime or date (midnight UTC); None if unparseable"""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        return None
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@permission_required(['users.view_user'], raise_exception=True)
+def dashboard_trends(request):
+    """
+    User signup/activation/deactivation counts per hour or day, from the rollup tables
+    Query params: metric (comma separated), interval (hour|day), from, to (exclusive)
+    Returns columns: buckets (UTC epoch seconds) and one count array per metric
+    """
+    params = request.query_params
+    metrics = [name for name in params.get('metric', 'signups').split(',') if name]
+    unknown = [name for name in metrics if name not in METRICS]
+    if not metrics or unknown:
+        return APIResponse.validation_error(errors={'metric': f'Choose from: {", ".join(METRICS)}'})
+    interval = params.get('interval', 'day')
+    if interval not in INTERVALS:
+        return APIResponse.validation_error(errors={'interval': f'Choose from: {", ".join(INTERVALS)}'})
+
+    bounds = {name: _parse_moment(params[name]) if params.get(name) else None for name in ('from', 'to')}
+    errors = {name: 'Invalid date or datetime' for name in bounds if params.get(name) and bounds[name] is None}
+    if errors:
+        return APIResponse.validation_error(errors=errors)
+    start, end = bounds['from'], bounds['to']
+    step = INTERVALS[interval]
+    end = end or floor_bucket(timezone.now(), interval) + step
+    start = start or end - DEFAULT_SPAN[interval]
+    if start >= end:
+        return APIResponse.validation_error(errors={'from': 'Must be before to'})
+
+    config = settings.DASHBOARD_TRENDS
+    if (end - floor_bucket(start, interval)) / step > config['MAX_POINTS']:
+        return APIResponse.validation_error(
+            errors={'from': f'At most {config["MAX_POINTS"]} {interval} buckets per request'}
+        )
+    if interval == 'hour' and start < timezone.now() - timedelta(days=config['HOURLY_RETENTION_DAYS']):
+        return APIResponse.validation_error(
+            errors={'from': f'Hourly buckets are kept for {config["HOURLY_RETENTION_DAYS"]} days; use interval=day'}
+        )
+
+    buckets, columns = read_series(metrics, interval, start, end)
+    return APIResponse.success(
+        data={
+            'interval': interval,
+            'buckets': [int(bucket.timestamp()) for bucket in buckets],
+            'series': columns,
+        },
+        message='Dashboard trends retrieved successfully'
+    )
+
+
+def _stream_user(request):
+    """Authenticate a stream request; EventSource cannot send headers, so ?token= is accepted too"""
+    from apps.users.authentication import CachedJWTAuthentication
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+    authentication = CachedJWTAuthentication()
+    try:
+        token = request.GET.get('token')
+        if token:
+            return authentication.get_user(authentication.get_validated_token(token))
+        result = authentication.authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+
+async def dashboard_events(request):
+    """
+    Server-Sent Events stream of stat deltas and permission-change notices
+    (ASGI only: served by config.asgi, see apps.dashboard.stream)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Method not allowed'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'success': False, 'message': 'Event streams are served by the ASGI application'}, status=501)
+
+    user = await sync_to_async(_stream_user)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({'success': False, 'message': 'Authentication required'}, status=401)
+    if change_feed.full:
+        response = JsonResponse({'success': False, 'message': 'Too many open event streams'}, status=503)
+        response['Retry-After'] = '30'
+        return response
+
+    snapshot = await sync_to_async(user_totals)(user)
+    response = StreamingHttpResponse(
+        event_stream(user.pk, tenant_of(user), snapshot), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
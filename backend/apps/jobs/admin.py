@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin interface for background jobs"""
+    list_display = ('id', 'kind', 'status', 'progress_done', 'progress_total', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    ordering = ('-id',)
+    list_select_related = ('created_by',)
+    readonly_fields = ('state', 'result', 'last_error', 'locked_by', 'lease_expires_at', 'created_at', 'started_at', 'finished_at')
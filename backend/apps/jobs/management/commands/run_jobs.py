@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs.worker import JobWorker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (group deletes and other long admin operations) chunk by chunk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kinds', help='Comma separated job kinds to run (default: all)')
+        parser.add_argument('--max-jobs', type=int, help='Exit after running this many jobs')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when drained')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep between polls with --loop')
+
+    def handle(self, *args, **options):
+        kinds = [kind.strip() for kind in options['kinds'].split(',')] if options['kinds'] else None
+        worker = JobWorker(kinds=kinds)
+
+        while True:
+            succeeded, failed = worker.drain(max_jobs=options['max_jobs'])
+            if succeeded or failed:
+                self.stdout.write(f'Jobs succeeded {succeeded}, failed or retrying {failed}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class Job(models.Model):
+    """
+    Background job run in chunks by the ``run_jobs`` worker.
+
+    Workers claim due rows with SELECT ... FOR UPDATE SKIP LOCKED and hold a
+    lease while they run the job's handler one chunk (one transaction) at a
+    time. ``state`` carries the handler's position between chunks, so a job
+    whose worker died is resumed by another once the lease expires.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    state = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    # Set while the job is queued or running; a second enqueue with the same key returns the active job
+    dedupe_key = models.CharField(max_length=128, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=128, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['-id']
+        indexes = [
+            # Workers only ever scan queued rows and running rows whose lease may have expired
+            models.Index(fields=['run_at'], name='jobs_queued_idx', condition=Q(status='queued')),
+            models.Index(fields=['lease_expires_at'], name='jobs_running_idx', condition=Q(status='running')),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'], name='jobs_active_dedupe_key', condition=Q(status__in=ACTIVE_STATUSES)
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({self.status})'
+
+    def as_dict(self):
+        """Return the JSON representation used by the job status API"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': {'done': self.progress_done, 'total': self.progress_total},
+            'result': self.result,
+            'error': self.last_error or None,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
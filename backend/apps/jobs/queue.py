@@ -0,0 +1,63 @@
+"""
+Job handler registry and enqueueing.
+
+A handler runs one chunk of a job and returns True once the job is
+finished. It is called repeatedly, each time in its own transaction with
+the job row locked, and keeps its position in ``job.state``. Progress goes
+in ``job.progress_done`` / ``job.progress_total`` and the final outcome in
+``job.result``. A chunk that raises is rolled back and retried (with the
+state of the last committed chunk) until JOBS['MAX_ATTEMPTS'] is reached.
+
+    @register('auth.delete_group')
+    def delete_group(job):
+        ...
+        return done
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ACTIVE_STATUSES, Job
+
+_handlers = {}
+
+
+def register(kind):
+    """Decorator registering the chunk handler for jobs of ``kind``"""
+    def decorator(handler):
+        _handlers[kind] = handler
+        return handler
+    return decorator
+
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+
+def enqueue(kind, payload=None, user=None, dedupe_key=None, run_at=None):
+    """
+    Queue a job and return it.
+
+    With ``dedupe_key``, a queued or running job with the same key is
+    returned instead of queueing a second one. ``run_at`` delays the job.
+    """
+    if kind not in _handlers:
+        raise ValueError(f'No handler registered for job kind {kind!r}')
+    created_by = user if user is not None and user.is_authenticated else None
+    if dedupe_key is not None:
+        existing = Job.objects.filter(dedupe_key=dedupe_key, status__in=ACTIVE_STATUSES).first()
+        if existing is not None:
+            return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                kind=kind,
+                payload=payload or {},
+                created_by=created_by,
+                dedupe_key=dedupe_key,
+                run_at=run_at or timezone.now(),
+            )
+    except IntegrityError:
+        if dedupe_key is None:
+            raise
+        # Lost a race with a concurrent enqueue of the same key
+        return Job.objects.get(dedupe_key=dedupe_key, status__in=ACTIVE_STATUSES)
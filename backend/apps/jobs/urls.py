@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+# Background job status URLs
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('<int:job_id>/', views.job_status, name='status'),
+]
@@ -0,0 +1,32 @@
+# Background job views for the forewarn-ibf-portal backend
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from apps.core.responses import APIResponse
+from .models import Job
+
+
+def accepted_response(job, message, data=None):
+    """202 for a queued job, pointing the client at its status URL"""
+    status_url = reverse('jobs:status', kwargs={'job_id': job.pk})
+    response = APIResponse.success(
+        data={**(data or {}), 'job': job.as_dict(), 'status_url': status_url},
+        message=message,
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+    response['Location'] = status_url
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_status(request, job_id):
+    """
+    Status and progress of a background job
+    Visible to the user who started it and to holders of jobs.view_job
+    """
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None or (job.created_by_id != request.user.pk and not request.user.has_perm('jobs.view_job')):
+        return APIResponse.not_found(message='Job not found')
+    return APIResponse.success(data={'job': job.as_dict()}, message='Job status retrieved successfully')
@@ -0,0 +1,136 @@
+"""
+Worker loop for the job queue (see ``manage.py run_jobs``)
+"""
+import logging
+import os
+import socket
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+from .queue import get_handler
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """
+    Claim due jobs and run them chunk by chunk.
+
+    A job is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+    of workers can share the table. While running, the worker renews its
+    lease after every chunk. A running job whose lease has expired belongs
+    to a dead worker and is claimed again like a queued one.
+    """
+
+    def __init__(self, kinds=None, lease_seconds=None, max_attempts=None, retry_delay_seconds=None):
+        job_settings = settings.JOBS
+        self.kinds = list(kinds) if kinds else None
+        self.lease = timedelta(seconds=lease_seconds or job_settings['LEASE_SECONDS'])
+        self.max_attempts = max_attempts or job_settings['MAX_ATTEMPTS']
+        self.retry_delay = timedelta(seconds=retry_delay_seconds or job_settings['RETRY_DELAY_SECONDS'])
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def _due(self, now):
+        jobs = Job.objects.select_for_update(skip_locked=True)
+        if self.kinds:
+            jobs = jobs.filter(kind__in=self.kinds)
+        # Abandoned jobs first, then queued ones in order
+        expired = jobs.filter(status=Job.STATUS_RUNNING, lease_expires_at__lt=now).order_by('lease_expires_at').first()
+        return expired or jobs.filter(status=Job.STATUS_QUEUED, run_at__lte=now).order_by('run_at', 'id').first()
+
+    def claim(self):
+        """Take the next due job, or return None"""
+        with transaction.atomic():
+            now = timezone.now()
+            job = self._due(now)
+            if job is None:
+                return None
+            job.status = Job.STATUS_RUNNING
+            job.locked_by = self.worker_id
+            job.lease_expires_at = now + self.lease
+            job.started_at = job.started_at or now
+            job.save(update_fields=['status', 'locked_by', 'lease_expires_at', 'started_at'])
+        return job
+
+    def run_chunk(self, job_id, handler):
+        """Run one chunk with the job row locked; returns the job, or None if the lease was lost"""
+        with transaction.atomic():
+            job = Job.objects.select_for_update().filter(
+                pk=job_id, status=Job.STATUS_RUNNING, locked_by=self.worker_id
+            ).first()
+            if job is None:
+                return None
+            done = handler(job)
+            now = timezone.now()
+            if done:
+                job.status = Job.STATUS_SUCCEEDED
+                job.finished_at = now
+                job.lease_expires_at = None
+                job.last_error = ''
+            else:
+                job.lease_expires_at = now + self.lease
+            job.save()
+        return job
+
+    def fail(self, job_id, error, final=False):
+        """Record a failed chunk: retry later, or give up after max_attempts (at once when ``final``)"""
+        with transaction.atomic():
+            job = Job.objects.select_for_update().filter(pk=job_id, locked_by=self.worker_id).first()
+            if job is None:
+                return None
+            now = timezone.now()
+            job.attempts += 1
+            job.last_error = error[-4000:]
+            job.locked_by = ''
+            job.lease_expires_at = None
+            if final or job.attempts >= self.max_attempts:
+                job.status = Job.STATUS_FAILED
+                job.finished_at = now
+                logger.error('Job %s (%s) failed after %s attempts', job.pk, job.kind, job.attempts)
+            else:
+                job.status = Job.STATUS_QUEUED
+                job.run_at = now + self.retry_delay * job.attempts
+                logger.warning('Job %s (%s) chunk failed, retrying: %s', job.pk, job.kind, error.splitlines()[-1])
+            job.save()
+        return job
+
+    def run(self, job):
+        """Run a claimed job to completion, failure or loss of its lease"""
+        handler = get_handler(job.kind)
+        if handler is None:
+            return self.fail(job.pk, f'No handler registered for job kind {job.kind!r}', final=True)
+        while True:
+            try:
+                current = self.run_chunk(job.pk, handler)
+            except Exception:
+                return self.fail(job.pk, traceback.format_exc())
+            if current is None:
+                logger.warning('Job %s lease lost to another worker', job.pk)
+                return None
+            if current.status == Job.STATUS_SUCCEEDED:
+                return current
+
+    def drain(self, max_jobs=None):
+        """
+        Run due jobs until none are left (or ``max_jobs`` have run).
+
+        Returns:
+            Tuple of (succeeded, failed) counts
+        """
+        succeeded = failed = 0
+        while max_jobs is None or succeeded + failed < max_jobs:
+            job = self.claim()
+            if job is None:
+                break
+            finished = self.run(job)
+            if finished is not None and finished.status == Job.STATUS_SUCCEEDED:
+                succeeded += 1
+            else:
+                failed += 1
+        return succeeded, failed
@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import EmailOutbox
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """Admin interface for the email outbox"""
+    list_display = ('id', 'kind', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('subject',)
+    ordering = ('-id',)
+    readonly_fields = ('created_at', 'claimed_at', 'sent_at', 'last_error')
@@ -0,0 +1,135 @@
+"""
+Batching dispatcher that drains the email outbox
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+from .transports import get_transport
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """
+    Claim due outbox rows, hand them to the transport in provider-sized
+    batches and record the outcome with exponential backoff on failure.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED in a short
+    transaction that stamps ``claimed_at`` and pushes ``next_attempt_at``
+    out by CLAIM_SECONDS, so several dispatcher processes can drain the
+    same outbox without double sending. Sending happens outside any
+    transaction and the outcome is recorded in a second one. Rows of a
+    dispatcher that died mid-send are retried once the claim lapses.
+    """
+
+    def __init__(self, transport=None, batch_size=None, max_attempts=None,
+                 backoff_seconds=None, backoff_max_seconds=None):
+        outbox_settings = settings.EMAIL_OUTBOX
+        self.transport = transport or get_transport()
+        self.batch_size = batch_size or outbox_settings['BATCH_SIZE']
+        self.max_attempts = max_attempts or outbox_settings['MAX_ATTEMPTS']
+        self.backoff_seconds = backoff_seconds or outbox_settings['BACKOFF_SECONDS']
+        self.backoff_max_seconds = backoff_max_seconds or outbox_settings['BACKOFF_MAX_SECONDS']
+        self.claim_lease = timedelta(seconds=outbox_settings['CLAIM_SECONDS'])
+
+    def retry_delay(self, attempts):
+        """Exponential backoff with full jitter, capped at backoff_max_seconds"""
+        ceiling = min(self.backoff_max_seconds, self.backoff_seconds * 2 ** (attempts - 1))
+        return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+    def dispatch_once(self):
+        """
+        Send one batch of due messages.
+
+        Returns:
+            Tuple of (sent, failed) counts for this batch
+        """
+        messages = self.claim()
+        if not messages:
+            return 0, 0
+
+        failures = {}
+        step = self.transport.max_batch_size
+        for start in range(0, len(messages), step):
+            batch = messages[start:start + step]
+            try:
+                failures.update(self.transport.send_batch(batch))
+            except Exception as e:
+                logger.exception('Email transport failed on a batch of %s', len(batch))
+                failures.update({message.id: f'transport error: {e}' for message in batch})
+
+        sent_ids = self.record(messages, failures)
+        if failures:
+            logger.warning('Email outbox batch: %s sent, %s failed', len(sent_ids), len(failures))
+        return len(sent_ids), len(failures)
+
+    def claim(self):
+        """Lock and lease up to batch_size due messages, committing before anything is sent"""
+        with transaction.atomic():
+            now = timezone.now()
+            messages = list(
+                EmailOutbox.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')[:self.batch_size]
+            )
+            if messages:
+                EmailOutbox.objects.filter(id__in=[message.id for message in messages]).update(
+                    claimed_at=now,
+                    next_attempt_at=now + self.claim_lease,
+                )
+        return messages
+
+    def record(self, messages, failures):
+        """Mark sent messages and schedule retries for failed ones; returns the sent ids"""
+        with transaction.atomic():
+            now = timezone.now()
+            sent_ids = [message.id for message in messages if message.id not in failures]
+            if sent_ids:
+                EmailOutbox.objects.filter(id__in=sent_ids).update(
+                    status=EmailOutbox.STATUS_SENT,
+                    sent_at=now,
+                    last_error='',
+                    claimed_at=None,
+                )
+
+            retried = []
+            for message in messages:
+                if message.id not in failures:
+                    continue
+                message.attempts += 1
+                message.last_error = failures[message.id][:2000]
+                if message.attempts >= self.max_attempts:
+                    message.status = EmailOutbox.STATUS_FAILED
+                    logger.error('Email %s permanently failed after %s attempts: %s',
+                                 message.id, message.attempts, message.last_error)
+                else:
+                    message.next_attempt_at = now + self.retry_delay(message.attempts)
+                message.claimed_at = None
+                retried.append(message)
+            if retried:
+                EmailOutbox.objects.bulk_update(
+                    retried, ['attempts', 'last_error', 'status', 'next_attempt_at', 'claimed_at']
+                )
+        return sent_ids
+
+    def drain(self):
+        """
+        Dispatch batches until no due messages remain.
+
+        Returns:
+            Tuple of total (sent, failed) counts
+        """
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = self.dispatch_once()
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < self.batch_size:
+                return total_sent, total_failed
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.dispatcher import OutboxDispatcher
+from apps.notifications.transports import get_transport
+
+
+class Command(BaseCommand):
+    help = 'Drain the email outbox, sending pending messages in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transport', choices=['smtp', 'sqs'], help='Override EMAIL_OUTBOX_TRANSPORT')
+        parser.add_argument('--batch-size', type=int, help='Messages claimed per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when drained')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep between polls with --loop')
+
+    def handle(self, *args, **options):
+        dispatcher = OutboxDispatcher(
+            transport=get_transport(options['transport']),
+            batch_size=options['batch_size'],
+        )
+
+        while True:
+            sent, failed = dispatcher.drain()
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,61 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox for outgoing email.
+
+    Rows are written in the same transaction as the change that triggers the
+    email and drained asynchronously by the outbox dispatcher, so request
+    latency never depends on mail delivery.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, blank=True)
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Set while a dispatcher is sending the row; next_attempt_at is pushed out by the claim lease meanwhile
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['id']
+        indexes = [
+            # Only pending rows are ever scanned by the dispatcher
+            models.Index(
+                fields=['next_attempt_at'],
+                name='email_outbox_due_idx',
+                condition=Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind or "email"} to {", ".join(self.recipients)} ({self.status})'
+
+    def as_payload(self):
+        """Return the JSON-serializable message consumed by transports and the send_email Lambda"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'to': self.recipients,
+            'subject': self.subject,
+            'body': self.body,
+            'html_body': self.html_body,
+        }
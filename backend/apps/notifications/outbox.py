@@ -0,0 +1,71 @@
+"""
+Helpers for writing emails to the transactional outbox
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .models import EmailOutbox
+
+
+def enqueue_email(recipients, subject, body, html_body='', kind=''):
+    """
+    Queue an email for asynchronous delivery.
+
+    Must be called inside the transaction that performs the triggering change
+    so the message is committed (or rolled back) together with it.
+
+    Args:
+        recipients: Email address or list of addresses
+        subject: Message subject
+        body: Plain text body
+        html_body: Optional HTML alternative
+        kind: Short label used for filtering and metrics (e.g. 'welcome')
+
+    Returns:
+        The created EmailOutbox row, or None when there are no recipients
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    recipients = [address for address in recipients if address]
+    if not recipients:
+        return None
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError('enqueue_email() must be called inside transaction.atomic()')
+
+    return EmailOutbox.objects.create(
+        kind=kind,
+        recipients=recipients,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+    )
+
+
+def enqueue_welcome_email(user):
+    """Queue the welcome email for a newly registered user"""
+    portal = settings.SPECTACULAR_SETTINGS['TITLE']
+    return enqueue_email(
+        user.email,
+        subject='Welcome to the FOREWARN IBF Portal',
+        body=(
+            f'Hello {user.get_full_name_or_username()},\n\n'
+            f'An account has been created for you on the {portal}.\n'
+            f'Your username is: {user.username}\n\n'
+            'Please sign in and change your password.\n'
+        ),
+        kind='welcome',
+    )
+
+
+def enqueue_password_changed_email(user):
+    """Queue the notification sent after an admin changes a user's password"""
+    return enqueue_email(
+        user.email,
+        subject='Your FOREWARN IBF Portal password was changed',
+        body=(
+            f'Hello {user.get_full_name_or_username()},\n\n'
+            'Your password was changed by an administrator.\n'
+            'If you did not expect this, please contact your administrator.\n'
+        ),
+        kind='password_changed',
+    )
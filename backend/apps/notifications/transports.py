@@ -0,0 +1,114 @@
+"""
+Email transports used by the outbox dispatcher.
+
+Each transport sends a batch of outbox messages per provider call and
+reports which messages failed, so the dispatcher can retry them individually.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+
+class BaseTransport:
+    """Base class for outbox transports"""
+    # Maximum number of messages handed to a single provider call
+    max_batch_size = 50
+
+    def send_batch(self, messages):
+        """
+        Send a batch of EmailOutbox rows.
+
+        Returns:
+            Dict mapping failed message id to an error string
+        """
+        raise NotImplementedError
+
+
+class SMTPTransport(BaseTransport):
+    """Send messages through Django's configured EMAIL_BACKEND over one connection per batch"""
+
+    def __init__(self, max_batch_size=None):
+        self.max_batch_size = max_batch_size or settings.EMAIL_OUTBOX['PROVIDER_BATCH_SIZE']
+
+    def send_batch(self, messages):
+        failures = {}
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            return {message.id: f'connection failed: {e}' for message in messages}
+
+        try:
+            for message in messages:
+                email = EmailMultiAlternatives(
+                    subject=message.subject,
+                    body=message.body,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=message.recipients,
+                    connection=connection,
+                )
+                if message.html_body:
+                    email.attach_alternative(message.html_body, 'text/html')
+                try:
+                    email.send()
+                except Exception as e:
+                    failures[message.id] = str(e)
+        finally:
+            connection.close()
+        return failures
+
+
+class SQSTransport(BaseTransport):
+    """Publish messages to the SQS queue consumed by the send_email Lambda"""
+    # SendMessageBatch accepts at most 10 entries
+    max_batch_size = 10
+
+    def __init__(self, queue_url=None, endpoint_url=None, region_name=None):
+        try:
+            import boto3
+        except ImportError:
+            raise ImproperlyConfigured('boto3 is required for the SQS email outbox transport')
+
+        outbox_settings = settings.EMAIL_OUTBOX
+        self.queue_url = queue_url or outbox_settings['SQS_QUEUE_URL']
+        if not self.queue_url:
+            raise ImproperlyConfigured('EMAIL_OUTBOX_SQS_QUEUE_URL must be set for the SQS transport')
+        self.client = boto3.client(
+            'sqs',
+            endpoint_url=endpoint_url or outbox_settings['SQS_ENDPOINT_URL'] or None,
+            region_name=region_name or outbox_settings['AWS_REGION'],
+        )
+
+    def send_batch(self, messages):
+        failures = {}
+        for start in range(0, len(messages), self.max_batch_size):
+            chunk = messages[start:start + self.max_batch_size]
+            entries = [
+                {'Id': str(message.id), 'MessageBody': json.dumps(message.as_payload())}
+                for message in chunk
+            ]
+            try:
+                result = self.client.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            except Exception as e:
+                failures.update({message.id: str(e) for message in chunk})
+                continue
+            for failed in result.get('Failed', []):
+                failures[int(failed['Id'])] = failed.get('Message') or failed.get('Code', 'unknown error')
+        return failures
+
+
+TRANSPORTS = {
+    'smtp': SMTPTransport,
+    'sqs': SQSTransport,
+}
+
+
+def get_transport(name=None):
+    """Instantiate the transport configured in EMAIL_OUTBOX['TRANSPORT']"""
+    name = name or settings.EMAIL_OUTBOX['TRANSPORT']
+    try:
+        return TRANSPORTS[name]()
+    except KeyError:
+        raise ImproperlyConfigured(f'Unknown email outbox transport: {name}')
@@ -1,8 +1,13 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.auth.models import Permission
-from .models import User
+from django.contrib.auth.models import Group, Permission
+from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef
+from apps.core.cache import get_or_compute
+from apps.core.pagination import EstimatedCountPaginator
+from .models import Organization, User
 
 # Register ContentType for admin dashboard
 @admin.register(ContentType)
@@ -37,6 +42,37 @@ class PermissionAdmin(admin.ModelAdmin):
         return False  # Don't allow deleting permissions
 
 
+class GroupMembershipFilter(admin.SimpleListFilter):
+    """
+    Group filter for large user tables: choices come from a short-lived cache,
+    and the lookup is an EXISTS on the membership table, so the changelist
+    needs no join and no DISTINCT over users.
+    """
+    title = 'groups'
+    parameter_name = 'group'
+
+    def lookups(self, request, model_admin):
+        return get_or_compute(
+            'admin:user-group-choices',
+            lambda: list(Group.objects.order_by('name').values_list('id', 'name')),
+            timeout=60,
+        )
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        memberships = User.groups.through.objects.filter(user_id=OuterRef('pk'), group_id=self.value())
+        return queryset.filter(Exists(memberships))
+
+
+@admin.register(Organization)
+class OrganizationAdmin(admin.ModelAdmin):
+    """Admin interface for tenant organizations"""
+    list_display = ('name', 'slug', 'created_at')
+    search_fields = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
+
+
 # Register custom User model for admin dashboard
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -46,10 +82,13 @@ class UserAdmin(BaseUserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'is_active', 'is_password_changed', 'is_deleted', 'date_joined')
     
     # Fields to filter by
-    list_filter = ('is_staff', 'is_superuser', 'is_active', 'is_password_changed', 'is_deleted', 'date_joined', 'groups')
+    list_filter = ('is_staff', 'is_superuser', 'is_active', 'is_password_changed', 'is_deleted', 'date_joined', 'organization', 'groups')
     
-    # Fields to search
+    # Fields to search (trigram-indexed on PostgreSQL, see apps.users.indexes)
     search_fields = ('username', 'first_name', 'last_name', 'email')
+
+    # No relations in list_display, so there is nothing for list_select_related to join
+    list_select_related = False
     
     # Ordering
     ordering = ('username',)
@@ -57,14 +96,29 @@ class UserAdmin(BaseUserAdmin):
     # Add your custom fields to the fieldsets
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Custom Fields', {
-            'fields': ('is_password_changed', 'is_deleted'),
+            'fields': ('organization', 'is_password_changed', 'is_deleted'),
         }),
     )
     
     # Add custom fields to the add form
     add_fieldsets = BaseUserAdmin.add_fieldsets + (
         ('Custom Fields', {
-            'fields': ('is_password_changed', 'is_deleted'),
+            'fields': ('organization', 'is_password_changed', 'is_deleted'),
         }),
     )
 
+    # Performance mode (ADMIN_PERFORMANCE['ENABLED']) for large user tables:
+    # estimated counts, no unfiltered COUNT(*), EXISTS-based group filter
+    @property
+    def show_full_result_count(self):
+        return not settings.ADMIN_PERFORMANCE['ENABLED']
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator_class = EstimatedCountPaginator if settings.ADMIN_PERFORMANCE['ENABLED'] else Paginator
+        return paginator_class(queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_list_filter(self, request):
+        if not settings.ADMIN_PERFORMANCE['ENABLED']:
+            return self.list_filter
+        return tuple(GroupMembershipFilter if name == 'groups' else name for name in self.list_filter)
+
@@ -1,7 +1,22 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
     verbose_name = 'Users'
+
+    def ready(self):
+        from django.conf import settings
+        if 'drf_spectacular' in settings.INSTALLED_APPS:
+            from . import schema  # registers the OpenAPI extension for CachedJWTAuthentication
+        from django.contrib.auth.signals import user_logged_in
+        from .indexes import install_search_indexes
+        from .logins import record_login
+        from .signals import connect_signals
+        connect_signals()
+        post_migrate.connect(install_search_indexes, sender=self)
+        # Buffer last_login instead of Django's synchronous per-login UPDATE
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+        user_logged_in.connect(record_login, dispatch_uid='users.record_login')
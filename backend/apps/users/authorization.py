@@ -0,0 +1,74 @@
+"""
+Per-request authorization context for the user management endpoints.
+
+Permission classes, views and serializers used to each re-derive the same
+facts about the target user (is it a superuser? may the caller edit it?).
+``authorization_for(request)`` returns one context per request that loads
+the target user once and evaluates every object-level decision once; the
+permission classes fill it and views and serializers read the same result.
+"""
+from django.shortcuts import get_object_or_404
+
+from .tenancy import TenantScopedMixin
+
+
+class UserAuthorization:
+    """Memoized target lookups and object-permission decisions for one request"""
+
+    def __init__(self, request):
+        self.user = request.user
+        self._targets = {}
+        self._decisions = {}
+
+    def get_target(self, queryset, pk):
+        """Return the object with ``pk`` from ``queryset`` (404 if missing), loaded once per request"""
+        key = (queryset.model, str(pk))
+        if key not in self._targets:
+            self._targets[key] = get_object_or_404(queryset, pk=pk)
+        return self._targets[key]
+
+    def _decide(self, name, obj, check):
+        key = (name, type(obj), obj.pk)
+        if key not in self._decisions:
+            self._decisions[key] = bool(check())
+        return self._decisions[key]
+
+    def can_modify(self, obj):
+        """Superuser accounts cannot be changed, (de)activated or deleted through the API"""
+        return self._decide('modify', obj, lambda: not obj.is_superuser)
+
+    def can_edit(self, obj):
+        """The account owner, or a holder of users.change_user"""
+        return self._decide(
+            'edit', obj, lambda: obj.pk == self.user.pk or self.user.has_perm('users.change_user')
+        )
+
+
+def authorization_for(request):
+    """Return the request's UserAuthorization, creating it on first use"""
+    authorization = getattr(request, '_user_authorization', None)
+    if authorization is None:
+        authorization = request._user_authorization = UserAuthorization(request)
+    return authorization
+
+
+def can_modify(context, obj):
+    """Shared superuser decision for serializers; direct check when used without a request"""
+    request = context.get('request')
+    if request is None:
+        return not obj.is_superuser
+    return authorization_for(request).can_modify(obj)
+
+
+class TargetUserMixin(TenantScopedMixin):
+    """
+    Resolve the ``<user_id>`` URL argument through the request's
+    authorization context and run the view's object permissions on it.
+    Users of another organization are not found (404).
+    """
+    lookup_url_kwarg = 'user_id'
+
+    def get_object(self):
+        obj = authorization_for(self.request).get_target(self.get_queryset(), self.kwargs[self.lookup_url_kwarg])
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,28 @@
+"""
+Trigram indexes for the admin user search.
+
+Admin search runs ``icontains`` on each search field, which PostgreSQL
+compiles to ``UPPER(col::text) LIKE UPPER('%term%')``. A btree cannot
+serve a leading wildcard, so each column gets a GIN trigram index on that
+exact expression. The planner then ORs bitmap index scans instead of
+scanning every row. The indexes are created by a post_migrate handler,
+since migrations are not committed and pg_trgm is PostgreSQL-only.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connections
+
+SEARCH_COLUMNS = ('username', 'first_name', 'last_name', 'email')
+
+
+def install_search_indexes(sender=None, using='default', **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    table = get_user_model()._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in SEARCH_COLUMNS:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+                f'ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+            )
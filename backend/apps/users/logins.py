@@ -0,0 +1,145 @@
+"""
+Write-behind recording of successful logins.
+
+``user_logged_in`` (sent by ``login_view`` and by Django's session login)
+only updates an in-process map of user id -> (latest login, logins since
+the last flush). A daemon thread writes the whole map every
+LOGIN_TRACKING['FLUSH_INTERVAL'] seconds with one statement:
+
+    UPDATE users AS u
+       SET last_login = GREATEST(u.last_login, v.last_login),
+           login_count = u.login_count + v.logins
+      FROM (VALUES (%s, %s, %s), ...) AS v(id, last_login, logins)
+     WHERE u.id = v.id
+
+so a burst of logins at shift start costs one UPDATE per interval instead
+of one contended row write per request. Rows are listed in id order so
+concurrent flushes from several workers lock them in the same order.
+
+``last_login`` and ``login_count`` in the database lag by at most the
+flush interval; ``pending_login`` lets serializers overlay what this
+process has not written yet.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class LoginBuffer:
+    """Per-process accumulator of logins, flushed as one batched UPDATE"""
+
+    def __init__(self, flush_interval=None, max_users=None):
+        config = settings.LOGIN_TRACKING
+        self.flush_interval = flush_interval or config['FLUSH_INTERVAL']
+        self.max_users = max_users or config['MAX_PENDING_USERS']
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.dropped = 0
+
+    def add(self, user_id, moment):
+        with self._lock:
+            entry = self._pending.get(user_id)
+            if entry is None:
+                if len(self._pending) >= self.max_users:
+                    self.dropped += 1
+                    return
+                self._pending[user_id] = (moment, 1)
+            else:
+                self._pending[user_id] = (max(entry[0], moment), entry[1] + 1)
+        self._ensure_thread()
+
+    def pending(self, user_id):
+        """(latest unflushed login, unflushed login count) for a user, or None"""
+        return self._pending.get(user_id)
+
+    def flush(self):
+        """Write all pending logins; returns the number of users updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        rows = sorted((user_id, moment, logins) for user_id, (moment, logins) in pending.items())
+        try:
+            write_logins(rows)
+        except Exception:
+            logger.exception('Failed to flush %s login updates; re-queueing', len(rows))
+            with self._lock:
+                for user_id, moment, logins in rows:
+                    entry = self._pending.get(user_id)
+                    if entry is None:
+                        self._pending[user_id] = (moment, logins)
+                    else:
+                        self._pending[user_id] = (max(entry[0], moment), entry[1] + logins)
+            return 0
+        return len(rows)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='login-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+
+def write_logins(rows):
+    """Apply [(user_id, last_login, logins), ...] sorted by user id"""
+    User = get_user_model()
+    table = User._meta.db_table
+
+    if connection.vendor == 'postgresql':
+        placeholders = ', '.join(['(%s, %s::timestamptz, %s)'] * len(rows))
+        params = [value for row in rows for value in row]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS u '
+                f'SET last_login = GREATEST(u.last_login, v.last_login), '
+                f'login_count = u.login_count + v.logins '
+                f'FROM (VALUES {placeholders}) AS v(id, last_login, logins) '
+                f'WHERE u.id = v.id',
+                params,
+            )
+        return
+
+    # Other backends (SQLite in development): one UPDATE per user in a single transaction
+    with transaction.atomic():
+        for user_id, moment, logins in rows:
+            User.objects.filter(pk=user_id).update(
+                last_login=Greatest(Coalesce(F('last_login'), moment), moment),
+                login_count=F('login_count') + logins,
+            )
+
+
+login_buffer = LoginBuffer()
+atexit.register(login_buffer.flush)
+
+
+def pending_login(user_id):
+    return login_buffer.pending(user_id)
+
+
+def record_login(sender, request, user, **kwargs):
+    """user_logged_in receiver replacing django.contrib.auth.models.update_last_login"""
+    moment = timezone.now()
+    user.last_login = moment
+    login_buffer.add(user.pk, moment)
@@ -0,0 +1,138 @@
+"""
+Benchmark the admin user changelist on a large table.
+
+Creates --users throwaway users (100k by default), renders the changelist
+with ADMIN_PERFORMANCE off and on, and reports latency and query counts
+for typical pages, then deletes the users again. Rows are created and
+deleted in bulk, bypassing model signals, so the run leaves no tombstones,
+trend counts, audit or dashboard events or group change stamps behind:
+
+    python manage.py bench_admin_changelist
+    python manage.py bench_admin_changelist --users 20000 --repeat 5
+
+Run it against PostgreSQL: the estimated counts and trigram indexes it
+measures are PostgreSQL features, and other databases count exactly.
+"""
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+
+from apps.authentication.matrix import schedule_refresh
+from apps.core.benchmark import format_summary, summarize
+
+User = get_user_model()
+
+CHANGELIST_URL = '/admin/users/user/'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark admin user changelist render time with and without ADMIN_PERFORMANCE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help='Users to create for the run')
+        parser.add_argument('--repeat', type=int, default=10, help='Renders per scenario and mode')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if 'django.contrib.admin' not in settings.INSTALLED_APPS:
+            raise CommandError('The admin is not installed (ENABLE_ADMIN / DEPLOYMENT_ROLE)')
+
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        setup_test_environment()
+        prefix = f'bench_{uuid.uuid4().hex[:8]}'
+        (group,) = Group.objects.bulk_create([Group(name=prefix)])
+        client = None
+        try:
+            admin_user = self.create_users(prefix, group, options['users'], options['batch_size'])
+            client = Client()
+            client.force_login(admin_user)
+
+            scenarios = [
+                ('first page', {}),
+                ('deep page', {'p': options['users'] // 100 // 2}),
+                ('search', {'q': f'{prefix}_4242'}),
+                ('filter active', {'is_active__exact': '1'}),
+            ]
+            for enabled in (False, True):
+                mode = 'performance' if enabled else 'standard'
+                group_params = {'group': group.pk} if enabled else {'groups__id__exact': group.pk}
+                with override_settings(ADMIN_PERFORMANCE={**settings.ADMIN_PERFORMANCE, 'ENABLED': enabled}):
+                    for label, params in scenarios + [('filter group', group_params)]:
+                        latencies, queries = self.run_scenario(client, params, options['repeat'])
+                        self.stdout.write(
+                            format_summary(f'{mode}: {label}', summarize(latencies)) + f' queries={queries}'
+                        )
+        finally:
+            if client is not None:
+                client.logout()
+            self.cleanup(prefix, group)
+            teardown_test_environment()
+
+    def cleanup(self, prefix, group):
+        """Raw DELETEs in one transaction: a cascading delete() would fire every per-user signal"""
+        users = User.objects.filter(username__startswith=prefix)
+        with transaction.atomic():
+            User.groups.through.objects.filter(group=group)._raw_delete(connection.alias)
+            User.groups.through.objects.filter(user__in=users)._raw_delete(connection.alias)
+            User.user_permissions.through.objects.filter(user__in=users)._raw_delete(connection.alias)
+            users._raw_delete(connection.alias)
+            Group.objects.filter(pk=group.pk)._raw_delete(connection.alias)
+            # In case another write refreshed the matrix while the group existed
+            schedule_refresh()
+
+    def create_users(self, prefix, group, count, batch_size):
+        # Hash once and reuse it; hashing per user would dominate setup time
+        template = User(username=prefix)
+        template.set_password(uuid.uuid4().hex)
+        started = time.perf_counter()
+        for start in range(0, count, batch_size):
+            users = User.objects.bulk_create([
+                User(
+                    username=f'{prefix}_{i}', email=f'{prefix}_{i}@example.com',
+                    first_name=f'First{i}', last_name=f'Last{i}',
+                    password=template.password, is_active=i % 10 != 0,
+                )
+                for i in range(start, min(start + batch_size, count))
+            ])
+            # Every 20th user joins the benchmark group
+            User.groups.through.objects.bulk_create([
+                User.groups.through(user_id=user.pk, group_id=group.pk) for user in users[::20] if user.pk
+            ])
+        (admin_user,) = User.objects.bulk_create([
+            User(
+                username=f'{prefix}_admin', email=f'{prefix}_admin@example.com',
+                password=template.password, is_staff=True, is_superuser=True,
+            )
+        ])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {User._meta.db_table}')
+        if not User.groups.through.objects.filter(group=group).exists():
+            # Backends that do not return primary keys from bulk_create
+            members = User.objects.filter(username__startswith=f'{prefix}_').values_list('pk', flat=True)[::20]
+            User.groups.through.objects.bulk_create([
+                User.groups.through(user_id=user_id, group_id=group.pk) for user_id in members
+            ])
+        self.stdout.write(f'Created {count} users in {time.perf_counter() - started:.1f}s ({connection.vendor})')
+        return admin_user
+
+    def run_scenario(self, client, params, repeat):
+        latencies = []
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(CHANGELIST_URL, params)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f'Changelist returned {response.status_code} for {params}')
+            queries = len(captured)
+        return latencies, queries
@@ -1,12 +1,63 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, Group
 from django.db import models
 
+# Columns written in batches by apps.users.logins, never by User.save()
+WRITE_BEHIND_FIELDS = ('last_login', 'login_count')
+
+
+class Organization(models.Model):
+    """Tenant (agency) owning a set of users and groups; see apps.users.tenancy"""
+    name = models.CharField(max_length=150, unique=True)
+    slug = models.SlugField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'organizations'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class User(AbstractUser):
     is_password_changed = models.BooleanField(default=False)
     is_deleted = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Written in batches by apps.users.logins, together with last_login
+    login_count = models.PositiveIntegerField(default=0)
+    # NULL for platform accounts, which are not tenant-scoped.
+    # Indexed by the composite indexes below, which lead with it.
+    organization = models.ForeignKey(
+        Organization, null=True, blank=True, on_delete=models.PROTECT, related_name='users', db_index=False
+    )
     
     class Meta:
         db_table = 'users'
+        indexes = [
+            # One tenant's live users are a contiguous index range, whatever the size of other tenants
+            models.Index(fields=['organization', 'id'], condition=models.Q(is_deleted=False), name='users_org_live_idx'),
+            # Per-tenant watermark (MAX(updated_at)) and delta sync
+            models.Index(fields=['organization', 'updated_at'], name='users_org_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save receivers tell activations and soft deletes apart from other edits (None when deferred)
+        instance._loaded_is_active = instance.__dict__.get('is_active')
+        instance._loaded_is_deleted = instance.__dict__.get('is_deleted')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # A full save of a possibly stale instance (e.g. a cached request.user)
+        # must not overwrite the columns apps.users.logins writes behind
+        if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in WRITE_BEHIND_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
     
     def soft_delete(self):
         """Soft delete user"""
@@ -16,4 +67,47 @@ class User(AbstractUser):
     
     def get_full_name_or_username(self):
         """Return full name or username as fallback"""
-        return self.get_full_name() or self.username
\ No newline at end of file
+        return self.get_full_name() or self.username
+
+
+class UserTombstone(models.Model):
+    """Record of a hard-deleted user, so delta sync clients can drop it"""
+    user_id = models.BigIntegerField(primary_key=True)
+    deleted_at = models.DateTimeField(db_index=True)
+    # Kept without a constraint: tombstones outlive the user and may outlive the organization
+    organization = models.ForeignKey(
+        Organization, null=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        related_name='+',
+    )
+
+    class Meta:
+        db_table = 'user_tombstones'
+        indexes = [models.Index(fields=['organization', 'deleted_at'], name='user_tombstones_org_idx')]
+
+
+class OrganizationGroup(models.Model):
+    """Organization owning an auth group; groups without a row are platform groups"""
+    group = models.OneToOneField(Group, primary_key=True, on_delete=models.CASCADE, related_name='tenant')
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='groups')
+
+    class Meta:
+        db_table = 'organization_groups'
+
+
+class GroupChangeStamp(models.Model):
+    """
+    Last time each auth group changed (name, permissions or membership).
+    Kept after the group is deleted so delta sync can report the deletion.
+    """
+    group_id = models.IntegerField(primary_key=True)
+    changed_at = models.DateTimeField(db_index=True)
+    is_deleted = models.BooleanField(default=False)
+    # Copied from OrganizationGroup, which is gone once the group is deleted
+    organization = models.ForeignKey(
+        Organization, null=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        related_name='+',
+    )
+
+    class Meta:
+        db_table = 'group_change_stamps'
+        indexes = [models.Index(fields=['organization', 'changed_at'], name='group_stamps_org_idx')]
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .authorization import authorization_for
+
 
 class HasUserViewPermission(permissions.BasePermission):
     """
@@ -41,7 +43,7 @@ class CannotModifySuperuser(permissions.BasePermission):
             return True
         
         # Prevent modification of superuser accounts
-        return not obj.is_superuser
+        return authorization_for(request).can_modify(obj)
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -55,7 +57,4 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return request.user.is_authenticated
         
         # Write permissions only to the owner or admin users
-        return (
-            obj == request.user or 
-            request.user.has_perm('users.change_user')
-        )
+        return authorization_for(request).can_edit(obj)
@@ -0,0 +1,9 @@
+"""
+OpenAPI (drf_spectacular) extensions for apps.users; imported only when the API docs are enabled
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document CachedJWTAuthentication as the same bearer JWT scheme as simplejwt's"""
+    target_class = 'apps.users.authentication.CachedJWTAuthentication'
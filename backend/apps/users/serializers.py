@@ -3,6 +3,11 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db.models import Prefetch, Q
+from apps.core.fieldsets import SparseFieldsetMixin
+from .authorization import can_modify
+from .logins import pending_login
+from .tenancy import scope_groups
 
 User = get_user_model()
 
@@ -24,19 +29,26 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'email', 'username', 'first_name', 'last_name', 
             'full_name', 'is_staff', 'is_active', 'date_joined', 
-            'groups'
+            'organization', 'groups'
         ]
-        read_only_fields = ['id', 'date_joined', 'is_staff', 'is_active']
+        read_only_fields = ['id', 'date_joined', 'is_staff', 'is_active', 'organization']
     
     def get_full_name(self, obj):
         """Return full name or username as fallback"""
         return obj.get_full_name_or_username()
 
 
-class UserListSerializer(serializers.ModelSerializer):
+# Nested group data only needs the id and name columns
+GROUPS_PREFETCH = Prefetch('groups', queryset=Group.objects.only('id', 'name'))
+
+
+class UserListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for listing users (admin view)"""
     groups = GroupSerializer(many=True, read_only=True)
     full_name = serializers.SerializerMethodField()
+
+    sparse_sources = {'full_name': ['first_name', 'last_name', 'username']}
+    sparse_prefetch = {'groups': GROUPS_PREFETCH}
     
     class Meta:
         model = User
@@ -75,9 +87,9 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
 class AdminUserUpdateSerializer(serializers.ModelSerializer):
     """Serializer for admin user updates"""
-    groups = serializers.PrimaryKeyRelatedField(
-        many=True, 
-        queryset=Group.objects.all(), 
+    # Plain ids, resolved together in validate_groups (one query instead of one per id)
+    groups = serializers.ListField(
+        child=serializers.IntegerField(),
         required=False,
         allow_empty=True
     )
@@ -85,25 +97,41 @@ class AdminUserUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['email', 'username', 'first_name', 'last_name', 'groups']
-    
-    def validate_email(self, value):
-        """Validate email uniqueness"""
-        user = self.instance
-        if user and User.objects.filter(email=value).exclude(pk=user.pk).exists():
-            raise serializers.ValidationError("Email already in use.")
-        return value
-    
-    def validate_username(self, value):
-        """Validate username uniqueness"""
-        user = self.instance
-        if user and User.objects.filter(username=value).exclude(pk=user.pk).exists():
-            raise serializers.ValidationError("Username already in use.")
-        return value
+        # Uniqueness is checked in validate() with a single query for both fields
+        extra_kwargs = {'email': {'validators': []}, 'username': {'validators': []}}
+    
+    def validate_groups(self, value):
+        """Resolve group ids in one query; groups of other organizations do not exist for the caller"""
+        queryset = Group.objects.filter(pk__in=value)
+        request = self.context.get('request')
+        if request is not None:
+            queryset = scope_groups(queryset, request.user)
+        groups = {group.pk: group for group in queryset}
+        missing = [pk for pk in value if pk not in groups]
+        if missing:
+            raise serializers.ValidationError(f'Invalid pk "{missing[0]}" - object does not exist.')
+        return [groups[pk] for pk in dict.fromkeys(value)]
     
     def validate(self, attrs):
-        """Check if user is superuser"""
-        if self.instance and self.instance.is_superuser:
+        """Check if user is superuser, then email/username uniqueness"""
+        user = self.instance
+        if user and not can_modify(self.context, user):
             raise serializers.ValidationError("Cannot update superuser.")
+
+        lookups = Q()
+        if 'email' in attrs:
+            lookups |= Q(email=attrs['email'])
+        if 'username' in attrs:
+            lookups |= Q(username=attrs['username'])
+        if user and lookups:
+            errors = {}
+            for email, username in User.objects.filter(lookups).exclude(pk=user.pk).values_list('email', 'username'):
+                if 'email' in attrs and email == attrs['email']:
+                    errors['email'] = ["Email already in use."]
+                if 'username' in attrs and username == attrs['username']:
+                    errors['username'] = ["Username already in use."]
+            if errors:
+                raise serializers.ValidationError(errors)
         return attrs
     
     def update(self, instance, validated_data):
@@ -137,7 +165,7 @@ class ChangePasswordSerializer(serializers.Serializer):
     def validate(self, attrs):
         """Check if target user is superuser"""
         user = self.context.get('user')
-        if user and user.is_superuser:
+        if user and not can_modify(self.context, user):
             raise serializers.ValidationError("Cannot change password for superuser.")
         return attrs
     
@@ -155,28 +183,43 @@ class UserActivationSerializer(serializers.Serializer):
     def validate(self, attrs):
         """Check if user is superuser"""
         user = self.context.get('user')
-        if user and user.is_superuser:
+        if user and not can_modify(self.context, user):
             action = self.context.get('action', 'modify')
             raise serializers.ValidationError(f"Cannot {action} superuser.")
         return attrs
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Detailed user serializer with groups for admin operations"""
     groups = GroupSerializer(many=True, read_only=True)
     full_name = serializers.SerializerMethodField()
+
+    sparse_sources = {'full_name': ['first_name', 'last_name', 'username']}
+    sparse_prefetch = {'groups': GROUPS_PREFETCH}
     
     class Meta:
         model = User
         fields = [
             'id', 'email', 'username', 'first_name', 'last_name',
             'full_name', 'is_staff', 'is_active', 'is_superuser',
-            'date_joined', 'last_login', 'groups'
+            'date_joined', 'last_login', 'login_count', 'organization', 'groups'
         ]
         read_only_fields = [
-            'id', 'date_joined', 'last_login', 'is_superuser'
+            'id', 'date_joined', 'last_login', 'login_count', 'is_superuser', 'organization'
         ]
     
     def get_full_name(self, obj):
         """Return full name or username as fallback"""
         return obj.get_full_name_or_username()
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Overlay logins this process has not flushed yet (see apps.users.logins)
+        pending = pending_login(instance.pk)
+        if pending is not None:
+            moment, logins = pending
+            if 'last_login' in data and (instance.last_login is None or moment > instance.last_login):
+                data['last_login'] = self.fields['last_login'].to_representation(moment)
+            if 'login_count' in data:
+                data['login_count'] = instance.login_count + logins
+        return data
@@ -0,0 +1,128 @@
+"""
+Change tracking for conditional GET and delta sync of the user and group lists.
+
+User rows carry their own ``updated_at``; groups have no timestamp column, so
+every change that alters a group's list entry (name, permissions, member
+count) upserts a GroupChangeStamp. The user list nests group names, so a
+group rename or deletion also touches its members' ``updated_at``.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import invalidate_cached_user
+from .models import GroupChangeStamp, OrganizationGroup, UserTombstone
+
+User = get_user_model()
+
+
+def stamp_groups(group_ids, deleted=False):
+    """
+    Upsert change stamps for the given group ids.
+
+    Stamps record the group's organization for per-tenant deltas. A deletion
+    keeps the one already recorded: the OrganizationGroup row is gone by then.
+    """
+    group_ids = list(group_ids)
+    if not group_ids:
+        return
+    now = timezone.now()
+    organizations = {} if deleted else dict(
+        OrganizationGroup.objects.filter(group_id__in=group_ids).values_list('group_id', 'organization_id')
+    )
+    GroupChangeStamp.objects.bulk_create(
+        [
+            GroupChangeStamp(
+                group_id=group_id, changed_at=now, is_deleted=deleted, organization_id=organizations.get(group_id)
+            )
+            for group_id in group_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['group_id'],
+        update_fields=['changed_at', 'is_deleted'] if deleted else ['changed_at', 'is_deleted', 'organization_id'],
+    )
+
+
+def touch_group_members(group_ids):
+    User.objects.filter(groups__in=group_ids).update(updated_at=timezone.now())
+
+
+def group_saved(sender, instance, created, **kwargs):
+    stamp_groups([instance.pk])
+    if not created:
+        touch_group_members([instance.pk])
+
+
+def group_assigned(sender, instance, **kwargs):
+    # assign_group() runs after the group's own post_save stamp
+    stamp_groups([instance.group_id])
+
+
+def group_deleting(sender, instance, **kwargs):
+    # Membership rows are removed by cascade without m2m_changed
+    touch_group_members([instance.pk])
+
+
+def group_deleted(sender, instance, **kwargs):
+    stamp_groups([instance.pk], deleted=True)
+
+
+def group_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        stamp_groups([instance.pk])
+    elif action == 'pre_clear':
+        stamp_groups(instance.group_set.values_list('pk', flat=True))
+    else:
+        stamp_groups(pk_set)
+
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # group.user_set changed: the group's count and the members' group lists
+        stamp_groups([instance.pk])
+        members = pk_set if action != 'pre_clear' else instance.user_set.values_list('pk', flat=True)
+        User.objects.filter(pk__in=list(members)).update(updated_at=timezone.now())
+        return
+    if action == 'pre_clear':
+        pk_set = instance.groups.values_list('pk', flat=True)
+    stamp_groups(pk_set)
+    User.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+
+
+def user_deleting(sender, instance, **kwargs):
+    stamp_groups(instance.groups.values_list('pk', flat=True))
+
+
+def user_deleted(sender, instance, **kwargs):
+    UserTombstone.objects.update_or_create(
+        user_id=instance.pk, defaults={'deleted_at': timezone.now(), 'organization_id': instance.organization_id}
+    )
+
+
+def user_changed(sender, instance, using, **kwargs):
+    # Drop the cached copy used by CachedJWTAuthentication once the change is visible
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id), using=using)
+
+
+def connect_signals():
+    post_save.connect(group_saved, sender=Group, dispatch_uid='users.group_saved')
+    post_save.connect(group_assigned, sender=OrganizationGroup, dispatch_uid='users.group_assigned')
+    pre_delete.connect(group_deleting, sender=Group, dispatch_uid='users.group_deleting')
+    post_delete.connect(group_deleted, sender=Group, dispatch_uid='users.group_deleted')
+    m2m_changed.connect(
+        group_permissions_changed, sender=Group.permissions.through, dispatch_uid='users.group_permissions_changed'
+    )
+    m2m_changed.connect(user_groups_changed, sender=User.groups.through, dispatch_uid='users.user_groups_changed')
+    pre_delete.connect(user_deleting, sender=User, dispatch_uid='users.user_deleting')
+    post_delete.connect(user_deleted, sender=User, dispatch_uid='users.user_deleted')
+    post_save.connect(user_changed, sender=User, dispatch_uid='users.user_changed_saved')
+    post_delete.connect(user_changed, sender=User, dispatch_uid='users.user_changed_deleted')
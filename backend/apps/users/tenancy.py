@@ -0,0 +1,48 @@
+"""
+Tenant scoping for the user and group endpoints.
+
+A user with an ``organization`` sees and edits only that organization's
+users and groups. Platform accounts (``organization`` is NULL) are not
+scoped. Every user query is filtered on ``organization_id``, which leads
+the composite indexes on ``users``. A tenant's request therefore reads one
+contiguous index range, whose cost depends on that tenant's size only.
+
+``users`` is not declaratively partitioned: PostgreSQL requires a
+partitioned table's unique keys to include the partition key, and the auth
+membership, permission and admin log tables reference ``users.id`` alone.
+"""
+from .models import OrganizationGroup
+
+
+def tenant_of(user):
+    """Organization id that scopes ``user``'s queries, or None for platform accounts"""
+    return getattr(user, 'organization_id', None)
+
+
+def scope_users(queryset, user):
+    organization_id = tenant_of(user)
+    if organization_id is None:
+        return queryset
+    return queryset.filter(organization_id=organization_id)
+
+
+def scope_groups(queryset, user, field='tenant__organization'):
+    """Restrict a queryset of groups (or of rows with an organization column named ``field``)"""
+    organization_id = tenant_of(user)
+    if organization_id is None:
+        return queryset
+    return queryset.filter(**{field: organization_id})
+
+
+def assign_group(group, user):
+    """Give a newly created group to ``user``'s organization (no-op for platform accounts)"""
+    organization_id = tenant_of(user)
+    if organization_id is not None:
+        OrganizationGroup.objects.create(group=group, organization_id=organization_id)
+
+
+class TenantScopedMixin:
+    """Limit a generic view's get_queryset() to the requesting user's organization"""
+
+    def get_queryset(self):
+        return scope_users(super().get_queryset(), self.request.user)
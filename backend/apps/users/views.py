@@ -1,10 +1,20 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import transaction
 from apps.core.responses import APIResponse
+from apps.core.conditional import (
+    InvalidSyncCursor,
+    decode_cursor,
+    make_etag,
+    next_cursor,
+    not_modified_response,
+    set_validators,
+)
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.notifications.outbox import enqueue_password_changed_email
+from apps.audit.buffer import record_action
 from .serializers import (
     UserProfileSerializer, 
     UserListSerializer, 
@@ -14,6 +24,9 @@ from .serializers import (
     UserActivationSerializer,
     UserDetailSerializer
 )
+from .sync import user_changes_since, user_checksum, user_watermark
+from .authorization import TargetUserMixin
+from .tenancy import TenantScopedMixin, tenant_of
 from .permissions import (
     HasUserViewPermission,
     HasUserChangePermission, 
@@ -43,26 +56,55 @@ class UserProfileView(generics.RetrieveAPIView):
         )
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(TenantScopedMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
-    List all users (admin only)
+    List all users of the caller's organization (admin only)
+
+    Supports If-None-Match / If-Modified-Since against the users table
+    watermark, ?since=<cursor> to return only rows changed or deleted
+    after a cursor from a previous response (recent changes are repeated
+    across syncs; upsert by id), and ?fields= / ?exclude= to select a
+    subset of fields (nested groups are only loaded if selected).
     """
     serializer_class = UserListSerializer
     permission_classes = [IsAuthenticated, HasUserViewPermission]
-    
-    def get_queryset(self):
-        return User.objects.filter(is_deleted=False).select_related().prefetch_related('groups')
+    queryset = User.objects.filter(is_deleted=False)
     
     def list(self, request, *args, **kwargs):
+        since_param = request.query_params.get('since')
+        organization_id = tenant_of(request.user)
+        watermark = user_watermark(organization_id)
+        etag = make_etag(
+            'users', organization_id, watermark, *user_checksum(organization_id), request.query_params.urlencode()
+        )
+        not_modified = not_modified_response(request, etag, watermark)
+        if not_modified is not None:
+            return not_modified
+
         queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return APIResponse.success(
-            data={
+        if since_param:
+            try:
+                since = decode_cursor(since_param)
+            except InvalidSyncCursor:
+                return APIResponse.validation_error(errors={'since': 'Invalid cursor'})
+            changed, deleted = user_changes_since(queryset, since, organization_id)
+            serializer = self.get_serializer(changed, many=True)
+            data = {
                 'users': serializer.data,
-                'count': queryset.count()
-            },
-            message='Users retrieved successfully'
-        )
+                'deleted': deleted,
+                'cursor': next_cursor(watermark),
+            }
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            users = serializer.data
+            data = {
+                'users': users,
+                'count': len(users),
+                'cursor': next_cursor(watermark),
+            }
+
+        response = APIResponse.success(data=data, message='Users retrieved successfully')
+        return set_validators(response, etag, watermark)
 
 
 class UserProfileUpdateView(generics.UpdateAPIView):
@@ -93,37 +135,37 @@ class UserProfileUpdateView(generics.UpdateAPIView):
             )
 
 
-class UserDeleteView(generics.DestroyAPIView):
+class UserDeleteView(TargetUserMixin, generics.DestroyAPIView):
     """
     Admin endpoint to delete a user by user_id
+    Superusers are rejected by CannotModifySuperuser in get_object()
     """
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated, HasUserDeletePermission, CannotModifySuperuser]
-    lookup_url_kwarg = 'user_id'
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.is_superuser:
-            return APIResponse.forbidden(message='Cannot delete superuser')
-        
         user_id = instance.id
+        username = instance.username
         instance.delete()
+        record_action(request, 'user.delete', target_type='user', target_id=user_id, changes={'username': username})
         return APIResponse.success(message=f'User {user_id} deleted successfully')
 
 
-class UserActivateView(APIView):
+class UserActivateView(TargetUserMixin, generics.GenericAPIView):
     """
     Admin endpoint to activate a user (set is_active=True)
     """
     permission_classes = [IsAuthenticated, HasUserChangePermission]
+    queryset = User.objects.all()
     
     def post(self, request, user_id):
-        user = get_object_or_404(User, pk=user_id)
+        user = self.get_object()
         
         # Validate with serializer
         serializer = UserActivationSerializer(
             data={}, 
-            context={'user': user, 'action': 'activate'}
+            context={'user': user, 'action': 'activate', 'request': request}
         )
         
         if not serializer.is_valid():
@@ -137,22 +179,24 @@ class UserActivateView(APIView):
         
         user.is_active = True
         user.save()
+        record_action(request, 'user.activate', user)
         return APIResponse.success(message=f'User {user_id} activated successfully')
 
 
-class UserDeactivateView(APIView):
+class UserDeactivateView(TargetUserMixin, generics.GenericAPIView):
     """
     Admin endpoint to deactivate a user (set is_active=False)
     """
     permission_classes = [IsAuthenticated, HasUserChangePermission]
+    queryset = User.objects.all()
     
     def post(self, request, user_id):
-        user = get_object_or_404(User, pk=user_id)
+        user = self.get_object()
         
         # Validate with serializer
         serializer = UserActivationSerializer(
             data={}, 
-            context={'user': user, 'action': 'deactivate'}
+            context={'user': user, 'action': 'deactivate', 'request': request}
         )
         
         if not serializer.is_valid():
@@ -166,17 +210,17 @@ class UserDeactivateView(APIView):
         
         user.is_active = False
         user.save()
+        record_action(request, 'user.deactivate', user)
         return APIResponse.success(message=f'User {user_id} deactivated successfully')
 
 
-class AdminUserUpdateView(generics.UpdateAPIView):
+class AdminUserUpdateView(TargetUserMixin, generics.UpdateAPIView):
     """
     Admin endpoint to update any user's profile fields (email, username, first_name, last_name, groups)
     """
     serializer_class = AdminUserUpdateSerializer
     permission_classes = [IsAuthenticated, HasUserChangePermission, CannotModifySuperuser]
     queryset = User.objects.all()
-    lookup_url_kwarg = 'user_id'
     
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
@@ -185,6 +229,10 @@ class AdminUserUpdateView(generics.UpdateAPIView):
         
         if serializer.is_valid():
             updated_user = serializer.save()
+            changes = dict(serializer.validated_data)
+            if 'groups' in changes:
+                changes['groups'] = [group.id for group in changes['groups']]
+            record_action(request, 'user.update', updated_user, changes=changes)
             # Use UserDetailSerializer for response
             response_serializer = UserDetailSerializer(updated_user)
             return APIResponse.success(
@@ -198,22 +246,26 @@ class AdminUserUpdateView(generics.UpdateAPIView):
             )
 
 
-class ChangePasswordByAdminView(APIView):
+class ChangePasswordByAdminView(TargetUserMixin, generics.GenericAPIView):
     """
     Admin endpoint to change any user's password
     """
     permission_classes = [IsAuthenticated, HasUserChangePermission]
+    queryset = User.objects.all()
     
     def post(self, request, user_id):
-        user = get_object_or_404(User, pk=user_id)
+        user = self.get_object()
         
         serializer = ChangePasswordSerializer(
             data=request.data,
-            context={'user': user}
+            context={'user': user, 'request': request}
         )
         
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                enqueue_password_changed_email(user)
+                record_action(request, 'user.password_change', user)
             return APIResponse.success(message=f'Password changed for user {user_id}')
         else:
             return APIResponse.validation_error(
@@ -222,14 +274,14 @@ class ChangePasswordByAdminView(APIView):
             )
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(TargetUserMixin, SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """
     Get detailed user information (admin only)
+    Supports ?fields= / ?exclude= to select a subset of fields
     """
     serializer_class = UserDetailSerializer
     permission_classes = [IsAuthenticated, HasUserViewPermission]
-    queryset = User.objects.all().prefetch_related('groups')
-    lookup_url_kwarg = 'user_id'
+    queryset = User.objects.all()
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -3,6 +3,15 @@ ASGI config for FOREWARN IBF Portal backend.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The ASGI application serves everything, and is required for
+``api/dashboard/events/`` (Server-Sent Events; see apps.dashboard.stream),
+whose open streams cost a coroutine each instead of a worker thread:
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker config.asgi
+
+A deployment can keep WSGI workers for the rest of the API and route only
+``/api/dashboard/events/`` to ASGI workers.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -3,8 +3,8 @@ Django settings for FOREWARN IBF Portal backend.
 Container-optimized configuration for microservices architecture.
 """
 
-import os
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -18,9 +18,17 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1,0.0.0.0').split(',')
 
+# Deployment role decides which optional components a process loads
+#   all    - everything (local development)
+#   api    - JWT API only, no Django admin or API docs
+#   admin  - API plus the Django admin
+#   worker - management commands such as dispatch_outbox and run_jobs
+DEPLOYMENT_ROLE = config('DEPLOYMENT_ROLE', default='all')
+ENABLE_ADMIN = config('ENABLE_ADMIN', default=DEPLOYMENT_ROLE in ('all', 'admin'), cast=bool)
+ENABLE_API_DOCS = config('ENABLE_API_DOCS', default=DEPLOYMENT_ROLE == 'all', cast=bool)
+
 # Application definition
 DJANGO_APPS = [
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -32,7 +40,6 @@ THIRD_PARTY_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
-    'drf_spectacular',
 ]
 
 LOCAL_APPS = [
@@ -40,21 +47,47 @@ LOCAL_APPS = [
     'apps.users',
     'apps.authentication',
     'apps.dashboard',
+    'apps.notifications',
+    'apps.audit',
+    'apps.jobs',
 ]
 
+if ENABLE_ADMIN:
+    DJANGO_APPS.insert(0, 'django.contrib.admin')
+
+if ENABLE_API_DOCS:
+    THIRD_PARTY_APPS.append('drf_spectacular')
+
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.metrics.MetricsMiddleware',
+    'apps.core.profiling.SamplingProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'apps.core.middleware.APICompressionMiddleware',
+    'apps.core.idempotency.IdempotencyMiddleware',
+    'apps.core.db_routing.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'apps.core.middleware.BrowserOnlyMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# Run by BrowserOnlyMiddleware, in this order, for every path outside
+# STATELESS_PATH_PREFIXES (the admin and other browser routes). The JWT API
+# has no sessions, CSRF cookies or messages, and DRF sets request.user itself.
+BROWSER_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+STATELESS_PATH_PREFIXES = ('/api/', '/healthz/', '/metrics')
+
+# The admin checks look for session, auth and messages middleware in
+# MIDDLEWARE itself; they run for the admin through BROWSER_MIDDLEWARE
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
 
 ROOT_URLCONF = 'config.urls'
 
@@ -92,6 +125,90 @@ DATABASES = {
     }
 }
 
+# Read replica: safe-method requests read from it (apps.core.db_routing).
+# Without DB_REPLICA_HOST everything stays on 'default'.
+DB_REPLICA = {
+    'ALIAS': 'replica',
+    # After a write the client reads from the primary for this long
+    'PIN_SECONDS': config('DB_REPLICA_PIN_SECONDS', default=5, cast=int),
+    'PIN_COOKIE': 'db_pin',
+    'PIN_HEADER': 'X-DB-Pin-Until',
+}
+
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+if DB_REPLICA_HOST:
+    DATABASES[DB_REPLICA['ALIAS']] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['apps.core.db_routing.PrimaryReplicaRouter']
+
+# Cache
+# 'default' is a two-tier cache: a small per-process L1 in front of the shared
+# L2 alias. 'shared' is Redis when REDIS_URL is set, otherwise LocMem (one
+# process only). For tests against a Redis stand-in, point REDIS_URL at it or
+# add 'connection_class': fakeredis.FakeConnection to the 'shared' OPTIONS.
+# 'state' holds coordination state that must not be evicted (idempotency
+# records and locks, login throttle buckets). Point STATE_REDIS_URL at a Redis
+# with maxmemory-policy noeviction; the cache Redis may evict any key.
+REDIS_URL = config('REDIS_URL', default='')
+STATE_REDIS_URL = config('STATE_REDIS_URL', default=REDIS_URL)
+
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+if STATE_REDIS_URL:
+    STATE_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': STATE_REDIS_URL,
+    }
+else:
+    STATE_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'state',
+        # LocMem culls at MAX_ENTRIES; keep it well above what expires on its own
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'apps.core.cache.TieredCache',
+        'LOCATION': 'tiered',
+        'TIMEOUT': config('CACHE_DEFAULT_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_TIMEOUT': config('CACHE_L1_TIMEOUT', default=5, cast=int),
+            'L1_MAX_ENTRIES': config('CACHE_L1_MAX_ENTRIES', default=1000, cast=int),
+            'L1_EVICTION': config('CACHE_L1_EVICTION', default='lru'),
+        },
+    },
+    'shared': {
+        **SHARED_CACHE,
+        'KEY_PREFIX': 'forewarn',
+        # Bump on deploys that change the shape of cached values
+        'VERSION': config('CACHE_VERSION', default=1, cast=int),
+    },
+    'state': {
+        **STATE_CACHE,
+        'KEY_PREFIX': 'forewarn-state',
+    },
+}
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -132,7 +249,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -142,9 +259,60 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Reverse proxies in front of the app; X-Forwarded-For is ignored when 0, so clients
+    # cannot spoof the IP that throttles (e.g. LoginIPThrottle) key on
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
+if ENABLE_API_DOCS:
+    REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = 'drf_spectacular.openapi.AutoSchema'
+
+# API response compression (apps.core.middleware.APICompressionMiddleware)
+API_COMPRESSION = {
+    'ENABLED': config('API_COMPRESSION_ENABLED', default=True, cast=bool),
+    'PATH_PREFIX': '/api/',
+    # Below this many bytes the framing overhead outweighs the savings
+    'MIN_SIZE': config('API_COMPRESSION_MIN_SIZE', default=1024, cast=int),
+    'ENCODINGS': config('API_COMPRESSION_ENCODINGS', default='zstd,br,gzip').split(','),
+    'LEVELS': {
+        'zstd': config('API_COMPRESSION_ZSTD_LEVEL', default=3, cast=int),
+        'br': config('API_COMPRESSION_BROTLI_QUALITY', default=4, cast=int),
+        'gzip': config('API_COMPRESSION_GZIP_LEVEL', default=5, cast=int),
+    },
+    'LOG_SIZES': config('API_COMPRESSION_LOG_SIZES', default=True, cast=bool),
+}
+
+# Prometheus metrics at /metrics (apps.core.metrics); set PROMETHEUS_MULTIPROC_DIR under gunicorn
+METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=True, cast=bool),
+    # Scrapers from these networks, or sending "Authorization: Bearer <METRICS_TOKEN>", may read /metrics
+    'ALLOWED_NETWORKS': config(
+        'METRICS_ALLOWED_NETWORKS', default='127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16'
+    ).split(','),
+    'TOKEN': config('METRICS_TOKEN', default=''),
+    # Tiered cache hit/miss counters are published at most this often (seconds)
+    'CACHE_FLUSH_INTERVAL': 1.0,
+}
+
+# Sampling profiler (apps.core.profiling); off unless PROFILING_ENABLED
+PROFILING = {
+    'ENABLED': config('PROFILING_ENABLED', default=False, cast=bool),
+    # Staff users profile a request by sending this header with value 1
+    'HEADER': 'X-Profile',
+    # Fraction of all requests profiled at random (0 disables random sampling)
+    'SAMPLE_RATE': config('PROFILING_SAMPLE_RATE', default=0.0, cast=float),
+    'INTERVAL': config('PROFILING_INTERVAL', default=0.005, cast=float),
+    'MAX_CONCURRENT': config('PROFILING_MAX_CONCURRENT', default=2, cast=int),
+    'MAX_DEPTH': 128,
+    'DIR': config('PROFILING_DIR', default=str(BASE_DIR / 'profiles')),
+    'MAX_FILES': config('PROFILING_MAX_FILES', default=2000, cast=int),
+    'RETENTION_HOURS': config('PROFILING_RETENTION_HOURS', default=72, cast=int),
+}
+
+# Delta sync: cursors trail now by this much so rows from in-flight transactions are not skipped.
+# Must exceed the longest write transaction; requests are killed after GUNICORN_TIMEOUT (30s).
+SYNC_CURSOR_LAG_SECONDS = config('SYNC_CURSOR_LAG_SECONDS', default=60, cast=int)
+
 # JWT Settings
 from datetime import timedelta
 
@@ -153,15 +321,73 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=config('JWT_REFRESH_TOKEN_EXPIRE_DAYS', default=7, cast=int)),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is recorded by apps.users.logins on user_logged_in
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': config('JWT_ALGORITHM', default='HS256'),
     'SIGNING_KEY': config('JWT_SECRET_KEY', default=SECRET_KEY),
 }
 
+# Login throttling (token buckets, 'capacity/period'; checked before password hashing)
+LOGIN_THROTTLE = {
+    'ENABLED': config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool),
+    # Buckets are read-modify-write, so they bypass the per-process L1, and must not be evicted
+    'CACHE_ALIAS': 'state',
+    'RATES': {
+        'login_ip': config('LOGIN_THROTTLE_IP_RATE', default='30/min'),
+        'login_username': config('LOGIN_THROTTLE_USERNAME_RATE', default='10/min'),
+    },
+}
+
+# Cached request.user resolution in CachedJWTAuthentication. Versions must be
+# shared by all workers for deactivations to apply immediately, hence Redis only by default.
+AUTH_USER_CACHE = {
+    'ENABLED': config('AUTH_USER_CACHE_ENABLED', default=bool(REDIS_URL), cast=bool),
+    'TTL': config('AUTH_USER_CACHE_TTL', default=60, cast=int),
+    'VERSION_CACHE_ALIAS': 'shared',
+}
+
+# Django admin on large tables: estimated counts and cheaper filters (apps.users.admin)
+ADMIN_PERFORMANCE = {
+    'ENABLED': config('ADMIN_PERFORMANCE_MODE', default=True, cast=bool),
+    # Filtered changelists count exactly up to this many rows, then use the planner estimate
+    'EXACT_COUNT_LIMIT': config('ADMIN_EXACT_COUNT_LIMIT', default=10000, cast=int),
+}
+
+# Background jobs run in chunks by `manage.py run_jobs` (apps.jobs)
+JOBS = {
+    # Rows handled per chunk (one transaction each) by chunked jobs such as group deletion
+    'CHUNK_SIZE': config('JOBS_CHUNK_SIZE', default=1000, cast=int),
+    # A running job whose worker has not renewed the lease this long is claimed by another worker
+    'LEASE_SECONDS': config('JOBS_LEASE_SECONDS', default=300, cast=int),
+    'MAX_ATTEMPTS': config('JOBS_MAX_ATTEMPTS', default=3, cast=int),
+    'RETRY_DELAY_SECONDS': config('JOBS_RETRY_DELAY_SECONDS', default=30, cast=int),
+}
+
+# Writes within this window share one refresh of the group permission matrix (PostgreSQL)
+GROUP_MATRIX_REFRESH_DELAY_SECONDS = config('GROUP_MATRIX_REFRESH_DELAY_SECONDS', default=2, cast=int)
+
+# Idempotency-Key replay for POST/PUT/PATCH (apps.core.idempotency)
+IDEMPOTENCY = {
+    'ENABLED': config('IDEMPOTENCY_ENABLED', default=True, cast=bool),
+    'HEADER': 'Idempotency-Key',
+    'PATH_PREFIX': '/api/',
+    # Locks need an atomic add() shared by all workers, so the L1 is bypassed; never evicted
+    'CACHE_ALIAS': 'state',
+    'TTL': config('IDEMPOTENCY_TTL', default=86400, cast=int),
+    # At least the worker timeout, so a lock outlives the request holding it
+    'LOCK_TIMEOUT': config('IDEMPOTENCY_LOCK_TIMEOUT', default=35, cast=int),
+    'WAIT_SECONDS': config('IDEMPOTENCY_WAIT_SECONDS', default=10, cast=float),
+    'MAX_BODY_BYTES': 1024 * 1024,
+}
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000').split(',')
 CORS_ALLOW_CREDENTIALS = config('CORS_ALLOW_CREDENTIALS', default=True, cast=bool)
 
+# Read-your-writes pin for clients that do not send cookies
+CORS_ALLOW_HEADERS = (*default_headers, DB_REPLICA['PIN_HEADER'].lower(), 'idempotency-key')
+CORS_EXPOSE_HEADERS = [DB_REPLICA['PIN_HEADER'], 'Idempotent-Replayed']
+
 # API Documentation
 SPECTACULAR_SETTINGS = {
     'TITLE': config('API_TITLE', default='FOREWARN IBF Portal API'),
@@ -170,6 +396,69 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Prebuilt OpenAPI schema (python manage.py build_openapi_schema)
+OPENAPI_SCHEMA = {
+    'DIR': config('OPENAPI_SCHEMA_DIR', default=str(BASE_DIR / 'openapi')),
+    # Serve the files on disk (built on first request if missing); off in development
+    # so each runserver reload regenerates the schema from the current code
+    'USE_ARTIFACT': config('OPENAPI_SCHEMA_USE_ARTIFACT', default=not DEBUG, cast=bool),
+}
+
+# Email
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='no-reply@forewarn-ibf.org')
+
+# Email outbox (drained by `manage.py dispatch_outbox`)
+EMAIL_OUTBOX = {
+    'TRANSPORT': config('EMAIL_OUTBOX_TRANSPORT', default='smtp'),
+    'BATCH_SIZE': config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int),
+    'PROVIDER_BATCH_SIZE': config('EMAIL_OUTBOX_PROVIDER_BATCH_SIZE', default=50, cast=int),
+    'MAX_ATTEMPTS': config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int),
+    'BACKOFF_SECONDS': config('EMAIL_OUTBOX_BACKOFF_SECONDS', default=30, cast=int),
+    'BACKOFF_MAX_SECONDS': config('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', default=3600, cast=int),
+    # Claimed rows become due again after this long if their dispatcher dies mid-send
+    'CLAIM_SECONDS': config('EMAIL_OUTBOX_CLAIM_SECONDS', default=300, cast=int),
+    'SQS_QUEUE_URL': config('EMAIL_OUTBOX_SQS_QUEUE_URL', default=''),
+    'SQS_ENDPOINT_URL': config('EMAIL_OUTBOX_SQS_ENDPOINT_URL', default=''),
+    'AWS_REGION': config('AWS_REGION', default='us-east-1'),
+}
+
+# Audit log (write-behind, flushed in batches by each worker process)
+AUDIT_LOG = {
+    'FLUSH_SIZE': config('AUDIT_LOG_FLUSH_SIZE', default=100, cast=int),
+    'FLUSH_INTERVAL': config('AUDIT_LOG_FLUSH_INTERVAL', default=2.0, cast=float),
+    'MAX_BUFFER_SIZE': config('AUDIT_LOG_MAX_BUFFER_SIZE', default=10000, cast=int),
+    'PARTITION_MONTHS_AHEAD': config('AUDIT_LOG_PARTITION_MONTHS_AHEAD', default=3, cast=int),
+    'RETENTION_MONTHS': config('AUDIT_LOG_RETENTION_MONTHS', default=24, cast=int),
+}
+
+# Login tracking: last_login / login_count are written behind, at most FLUSH_INTERVAL seconds stale
+LOGIN_TRACKING = {
+    'FLUSH_INTERVAL': config('LOGIN_TRACKING_FLUSH_INTERVAL', default=5.0, cast=float),
+    'MAX_PENDING_USERS': config('LOGIN_TRACKING_MAX_PENDING_USERS', default=50000, cast=int),
+}
+
+# Dashboard trend rollups (hourly buckets older than the retention are compacted into daily ones)
+DASHBOARD_TRENDS = {
+    'HOURLY_RETENTION_DAYS': config('DASHBOARD_TRENDS_HOURLY_RETENTION_DAYS', default=14, cast=int),
+    'MAX_POINTS': config('DASHBOARD_TRENDS_MAX_POINTS', default=1000, cast=int),
+}
+
+# Dashboard Server-Sent Events (api/dashboard/events/, ASGI only)
+DASHBOARD_EVENTS = {
+    'CHANNEL': 'dashboard_events',
+    'MAX_CONNECTIONS': config('DASHBOARD_EVENTS_MAX_CONNECTIONS', default=5000, cast=int),
+    'HEARTBEAT': config('DASHBOARD_EVENTS_HEARTBEAT', default=25, cast=int),
+    'COALESCE_SECONDS': config('DASHBOARD_EVENTS_COALESCE_SECONDS', default=1.0, cast=float),
+    'QUEUE_SIZE': 64,
+    'RETRY_MS': 5000,
+}
+
 # Security Settings
 if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
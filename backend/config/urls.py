@@ -1,23 +1,36 @@
-from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from apps.core.metrics import metrics_view
+from apps.core.views import healthz, lazy_view, openapi_schema
 
 urlpatterns = [
-    # Admin interface
-    path('admin/', admin.site.urls),
-    
-    # API Documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    
+    # Container healthcheck
+    path('healthz/', healthz, name='healthz'),
+
+    # Prometheus scrape endpoint (internal networks only)
+    path('metrics', metrics_view, name='metrics'),
+
     # API endpoints
     path('api/auth/', include('apps.authentication.urls')),
     path('api/users/', include('apps.users.urls')),
     path('api/dashboard/', include('apps.dashboard.urls')),
+    path('api/audit/', include('apps.audit.urls')),
+    path('api/jobs/', include('apps.jobs.urls')),
 ]
 
+# Admin interface (only for deployment roles that serve it)
+if settings.ENABLE_ADMIN:
+    from django.contrib import admin
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+# API Documentation (schema served from the prebuilt artifact, see build_openapi_schema)
+if settings.ENABLE_API_DOCS:
+    urlpatterns += [
+        path('api/schema/', openapi_schema, name='schema'),
+        path('api/docs/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    ]
+
 # Serve media files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
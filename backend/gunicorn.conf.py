@@ -0,0 +1,35 @@
+"""
+Gunicorn settings:  gunicorn -c gunicorn.conf.py config.wsgi
+                    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py config.asgi
+
+Workers share Prometheus metrics through PROMETHEUS_MULTIPROC_DIR (see
+apps.core.metrics). The directory is emptied when the master starts and
+a worker's live gauges are dropped when it exits.
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# uvicorn.workers.UvicornWorker serves config.asgi, including the dashboard event streams
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+
+# Must be set before any worker imports prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+
+def on_starting(server):
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)